@@ -8,12 +8,6 @@ interface ParseResponse {
   error: string | null;
 }
 
-interface GenerateResponse {
-  clean_doc: string;
-  diff_doc: string;
-  error: string | null;
-}
-
 export class HttpWorkerClient implements WorkerClient {
   private readonly baseUrl: string;
 
@@ -22,13 +16,11 @@ export class HttpWorkerClient implements WorkerClient {
   }
 
   async parseFile(content: Buffer, fileType: InputFormat): Promise<ParseResult> {
-    const response = await fetch(`${this.baseUrl}/parse`, {
+    const url = `${this.baseUrl}/parse/raw?file_type=${encodeURIComponent(fileType)}`;
+    const response = await fetch(url, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        file_content: content.toString("base64"),
-        file_type: fileType,
-      }),
+      headers: { "Content-Type": "application/octet-stream" },
+      body: content,
     });
 
     if (!response.ok) {
@@ -49,7 +41,10 @@ export class HttpWorkerClient implements WorkerClient {
   ): Promise<GenerateResult> {
     const response = await fetch(`${this.baseUrl}/generate`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: {
+        "Content-Type": "application/json",
+        Accept: "multipart/form-data",
+      },
       body: JSON.stringify({
         original,
         corrected,
@@ -65,19 +60,27 @@ export class HttpWorkerClient implements WorkerClient {
       throw new ExternalServiceError("Worker", `HTTP ${response.status}`);
     }
 
-    const data = (await response.json()) as GenerateResponse;
-
-    if (data.error) {
+    const error = response.headers.get("X-Error");
+    if (error) {
       return {
         cleanDoc: Buffer.alloc(0),
         diffDoc: Buffer.alloc(0),
-        error: data.error,
+        error: decodeURIComponent(error),
       };
     }
 
+    const form = await response.formData();
     return {
-      cleanDoc: Buffer.from(data.clean_doc, "base64"),
-      diffDoc: Buffer.from(data.diff_doc, "base64"),
+      cleanDoc: await this.readPart(form, "clean_doc"),
+      diffDoc: await this.readPart(form, "diff_doc"),
     };
   }
+
+  private async readPart(form: FormData, name: string): Promise<Buffer> {
+    const part = form.get(name);
+    if (!(part instanceof Blob)) {
+      throw new ExternalServiceError("Worker", `Missing ${name} in response`);
+    }
+    return Buffer.from(await part.arrayBuffer());
+  }
 }
@@ -1,3 +1,3 @@
-from app.api.routes import router
+from app.api.routes import jobs, router
 
-__all__ = ["router"]
+__all__ = ["router", "jobs"]
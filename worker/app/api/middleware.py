@@ -0,0 +1,290 @@
+import asyncio
+import cProfile
+import hmac
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics, profiling
+from app.core.admission import AdmissionController
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+# Room for the JSON or multipart around a file, on top of its base64 encoding
+ENVELOPE_BYTES = 64 * 1024
+
+
+class MetricsMiddleware:
+    """Records HTTP request durations by route and counts requests in flight.
+
+    Requests are labelled with the route's path template, so path parameters
+    such as session ids don't each become a series.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.in_flight = 0
+        metrics.REGISTRY.register(
+            metrics.Gauge(
+                "worker_http_requests_in_flight",
+                "HTTP requests being handled.",
+                lambda: {(): self.in_flight},
+            )
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight -= 1
+            route = scope.get("route")
+            metrics.HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                handler=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+
+class ProfilingMiddleware:
+    """Profiles requests picked by a secret header or at random, one file pair per request.
+
+    A request whose ``X-Profile`` header equals ``token``, or one drawn with
+    probability ``sample_rate``, runs with its pool tasks under cProfile (see
+    ``app.core.profiling``). ``<id>.prof`` holds the merged pstats, readable with
+    ``pstats``, snakeviz or flameprof, and ``<id>.json`` the request's size
+    features and task timings. The id is returned in ``X-Profile-Id``.
+
+    The event loop is profiled as well, by one profiled request at a time; that
+    part includes whatever else the loop ran meanwhile. The middleware is only
+    installed when profiling is configured, so it costs nothing otherwise.
+    ``exempt`` paths (health checks, metrics scrapes) are never profiled.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        token: str | None = None,
+        sample_rate: float = 0.0,
+        exempt: tuple[str, ...] = ("/health", "/metrics"),
+    ) -> None:
+        self.app = app
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.exempt = exempt
+        self._loop_profiled = False
+
+    def _trigger(self, scope: Scope) -> str | None:
+        if scope["path"] in self.exempt:
+            return None
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and hmac.compare_digest(value, self.token):
+                    return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        features: dict[str, Any] = {
+            "id": profile_id,
+            "trigger": trigger,
+            "method": scope["method"],
+            "path": scope["path"],
+            "request_bytes": 0,
+            "response_bytes": 0,
+            "status": 500,
+        }
+
+        async def counting_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                features["request_bytes"] += len(message.get("body", b""))
+            return message
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                features["status"] = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (PROFILE_ID_HEADER, profile_id.encode()),
+                ]
+            elif message["type"] == "http.response.body":
+                features["response_bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        loop_profiler = None
+        if not self._loop_profiled:
+            self._loop_profiled = True
+            loop_profiler = cProfile.Profile()
+            loop_profiler.enable()
+
+        started = time.perf_counter()
+        with profiling.recording() as tasks:
+            try:
+                await self.app(scope, counting_receive, send_with_id)
+            finally:
+                if loop_profiler is not None:
+                    loop_profiler.disable()
+                    self._loop_profiled = False
+                features["seconds"] = round(time.perf_counter() - started, 4)
+                features["event_loop_profiled"] = loop_profiler is not None
+                features["tasks"] = [
+                    {"task": task.task, "seconds": round(task.seconds, 4)} for task in tasks
+                ]
+                await asyncio.to_thread(self._write, profile_id, features, loop_profiler, tasks)
+
+    def _write(
+        self,
+        profile_id: str,
+        features: dict[str, Any],
+        loop_profiler: cProfile.Profile | None,
+        tasks: list[profiling.TaskProfile],
+    ) -> None:
+        raw = [task.stats for task in tasks]
+        if loop_profiler is not None:
+            loop_profiler.create_stats()
+            raw.insert(0, loop_profiler.stats)
+        stats = profiling.merge(raw)
+        if stats is not None:
+            stats.dump_stats(self.directory / f"{profile_id}.prof")
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(features, indent=2))
+
+
+class AdmissionMiddleware:
+    """Rejects requests before they are read when the worker can't take them.
+
+    - A body larger than its limit gets 413: at once when Content-Length says
+      so, otherwise as soon as the bytes received pass the limit, without
+      reading the rest. Raw ``application/octet-stream`` uploads may be up to
+      ``max_file_bytes``; other bodies, which carry a base64 file or text in
+      JSON or multipart, may be a third larger plus ``ENVELOPE_BYTES``. Bodies
+      of ``batch_paths`` have a budget of their own, ``batch_max_body_bytes``,
+      rather than one that grows with the item count; /parse/batch checks each
+      file's own size.
+    - While ``controller`` refuses admission (too many requests in flight, or
+      memory above the watermark), requests get 503 with ``Retry-After``.
+
+    ``exempt`` paths (health checks, metrics scrapes) are never rejected.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        max_file_bytes: int,
+        retry_after: int = 1,
+        exempt: tuple[str, ...] = ("/health", "/metrics"),
+        batch_paths: tuple[str, ...] = ("/parse/batch", "/generate/batch"),
+        batch_max_body_bytes: int | None = None,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.max_file_bytes = max_file_bytes
+        self.retry_after = retry_after
+        self.exempt = exempt
+        self.batch_paths = batch_paths
+        self.batch_max_body_bytes = batch_max_body_bytes
+        metrics.REGISTRY.register(
+            metrics.Gauge(
+                "worker_admission_rejected_total",
+                "Requests rejected before being handled, by reason.",
+                lambda: {(reason,): count for reason, count in controller.rejected.items()},
+                ("reason",),
+                kind="counter",
+            )
+        )
+        metrics.REGISTRY.register(
+            metrics.Gauge(
+                "worker_admission_memory_bytes",
+                "Container memory in use when last sampled for admission.",
+                lambda: {(): controller.memory_bytes() or 0},
+            )
+        )
+
+    def _body_limit(self, scope: Scope) -> int:
+        if scope["path"] in self.batch_paths and self.batch_max_body_bytes is not None:
+            return self.batch_max_body_bytes
+        for name, value in scope["headers"]:
+            if name == b"content-type" and value.startswith(b"application/octet-stream"):
+                return self.max_file_bytes
+        return self.max_file_bytes * 4 // 3 + ENVELOPE_BYTES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._body_limit(scope)
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                self.controller.rejected["body_too_large"] += 1
+                await _reject(send, 413, f"Request body is larger than {limit} bytes")
+                return
+
+        reason = self.controller.try_acquire()
+        if reason is not None:
+            detail = "Too many requests in flight" if reason == "in_flight" else "Memory is low"
+            await _reject(
+                send, 503, f"{detail}, retry later", {"retry-after": str(self.retry_after)}
+            )
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    self.controller.rejected["body_too_large"] += 1
+                    # FastAPI and Starlette turn this into the response while the body is read
+                    raise HTTPException(413, f"Request body is larger than {limit} bytes")
+            return message
+
+        try:
+            await self.app(scope, limited_receive, send)
+        finally:
+            self.controller.release()
+
+
+async def _reject(
+    send: Send, status: int, detail: str, headers: dict[str, str] | None = None
+) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    raw_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        *((name.encode(), value.encode()) for name, value in (headers or {}).items()),
+    ]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,57 @@
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any
+from urllib.parse import quote
+from uuid import uuid4
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MULTIPART_MEDIA_TYPE = "multipart/form-data"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ERROR_HEADER = "X-Error"
+
+
+def wants_multipart(accept: str | None) -> bool:
+    return bool(accept) and MULTIPART_MEDIA_TYPE in accept
+
+
+def wants_ndjson(accept: str | None) -> bool:
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+
+def multipart_response(files: dict[str, bytes], error: str | None = None) -> Response:
+    """Build a multipart/form-data response with one docx part per entry.
+
+    Errors go into the percent-encoded ``X-Error`` header and the body has no parts.
+    """
+    boundary = uuid4().hex
+    chunks: list[bytes] = []
+    if error is None:
+        for name, content in files.items():
+            chunks.append(
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"; filename="{name}.docx"\r\n'
+                f"Content-Type: {DOCX_MEDIA_TYPE}\r\n\r\n".encode()
+            )
+            chunks.append(content)
+            chunks.append(b"\r\n")
+    chunks.append(f"--{boundary}--\r\n".encode())
+
+    headers = {ERROR_HEADER: quote(error)} if error is not None else None
+    return Response(
+        content=b"".join(chunks),
+        media_type=f"{MULTIPART_MEDIA_TYPE}; boundary={boundary}",
+        headers=headers,
+    )
+
+
+async def _ndjson_lines(records: AsyncIterable[dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for record in records:
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode()
+
+
+def ndjson_response(records: AsyncIterable[dict[str, Any]]) -> StreamingResponse:
+    """Stream records as newline-delimited JSON, one line per record."""
+    return StreamingResponse(_ndjson_lines(records), media_type=NDJSON_MEDIA_TYPE)
@@ -1,25 +1,175 @@
-from fastapi import APIRouter
+import asyncio
+import base64
+import sys
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import asdict
+from functools import partial
+from itertools import chain, islice
+from typing import Any, TypeVar
 
-from app.models import DiffRequest, DiffResponse, ParseRequest, ParseResponse
-from app.services import DiffService, ParserService
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from starlette.datastructures import UploadFile
+
+from app.api.responses import (
+    multipart_response,
+    ndjson_response,
+    wants_multipart,
+    wants_ndjson,
+)
+from app.core import ExecutorBusyError, executor, metrics, settings, share_bytes
+from app.models import (
+    DiffBatchRequest,
+    DiffBatchResponse,
+    DiffChunkRequest,
+    DiffChunkResponse,
+    DiffFinalizeRequest,
+    DiffRequest,
+    DiffResponse,
+    DiffSessionRequest,
+    DiffSessionResponse,
+    JobResponse,
+    ParseBatchRequest,
+    ParseBatchResponse,
+    ParseRequest,
+    ParseResponse,
+)
+from app.models.requests import FileType
+from app.services import ParserService, tasks
+from app.services.cache import ResultCache
+from app.services.diff_service import cache_key as generate_cache_key
+from app.services.diff_session import DiffSession, SessionLimitError, SessionStore
+from app.services.jobs import Job, JobQueueFullError, create_job_queue
 from app.services.parser_service import (
     CorruptedFileError,
     EmptyFileError,
+    ParserError,
+    ParseResult,
     UnsupportedFormatError,
 )
+from app.services.pdf_pages import PageReport, split_pages
+from app.services.text_stream import Block, TextStream
 
 router = APIRouter()
 
-parser_service = ParserService()
-diff_service = DiffService()
+T = TypeVar("T")
 
+parser_service = ParserService(
+    cache=ResultCache(
+        max_bytes=settings.parse_cache_max_bytes,
+        disk_dir=settings.parse_cache_dir,
+        disk_max_bytes=settings.parse_cache_disk_max_bytes,
+        size_of=lambda result: sys.getsizeof(result.text),
+    )
+)
 
-@router.post("/parse", response_model=ParseResponse)
-async def parse_document(request: ParseRequest) -> ParseResponse:
-    """Parse document and extract text."""
+# Rendered (clean, diff) documents by generate_cache_key; rendering itself is in the pool
+generate_cache = ResultCache(
+    max_bytes=settings.generate_cache_max_bytes,
+    ttl_seconds=settings.generate_cache_ttl_seconds,
+    size_of=lambda docs: len(docs[0]) + len(docs[1]),
+)
+
+# Idempotency-Key header -> generate_cache_key of the request it was first sent with
+idempotency_keys = ResultCache(
+    max_bytes=1024 * 1024,
+    ttl_seconds=settings.generate_cache_ttl_seconds,
+    size_of=sys.getsizeof,
+)
+
+diff_sessions = SessionStore(
+    max_sessions=settings.diff_session_max,
+    ttl_seconds=settings.diff_session_ttl_seconds,
+)
+
+CACHE_HEADER = "X-Cache"
+
+
+def _busy(e: ExecutorBusyError) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+async def _read_upload(request: Request) -> bytes:
+    """Read a multipart or application/octet-stream body into bytes.
+
+    Raw bodies larger than the upload limit get 413 as soon as they pass it.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        async with request.form() as form:
+            upload = form.get("file")
+            if not isinstance(upload, UploadFile):
+                raise HTTPException(
+                    status_code=422, detail="Multipart upload must contain a 'file' field"
+                )
+            return await upload.read()
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.max_file_size_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File is larger than {settings.max_file_size_bytes} bytes",
+            )
+    return bytes(body)
+
+
+async def _extract_pdf(data: bytes) -> ParseResult:
+    """Extract a PDF with its page ranges spread over the pool."""
+    with share_bytes(data) as source:
+        # Counting the pages admits the request or raises ExecutorBusyError. The ranges then
+        # wait for free slots, so a full pool can't fail the request with part of it done
+        count = await executor.run(tasks.pdf_page_count, source)
+        ranges = split_pages(count, executor.max_workers, settings.pdf_pages_per_task)
+        with executor.waiting():
+            # Wait for every range before the shared memory is released, even if one fails
+            chunks = await asyncio.gather(
+                *(
+                    executor.run(tasks.extract_pdf_pages, source, start, stop)
+                    for start, stop in ranges
+                ),
+                return_exceptions=True,
+            )
+
+    for chunk in chunks:
+        if isinstance(chunk, BaseException):
+            raise chunk
+    return parser_service.join_pdf_pages(chain.from_iterable(chunks))
+
+
+def _observe_parse(data: bytes, file_type: str, text: str, pages: list[PageReport] | None) -> None:
+    file_type = file_type.lower()
+    metrics.observe(metrics.PARSE_INPUT_BYTES, len(data), file_type=file_type)
+    metrics.observe(metrics.PARSE_OUTPUT_CHARS, len(text), file_type=file_type)
+    for page in pages or ():
+        metrics.observe(
+            metrics.PARSE_STAGE_SECONDS, page.seconds, stage="pdf_page", file_type=file_type
+        )
+
+
+async def _parse(data: bytes, file_type: str) -> ParseResponse:
+    """Parse in the pool (or from the cache). ExecutorBusyError propagates."""
     try:
-        text = parser_service.parse(request.file_content, request.file_type)
-        return ParseResponse(text=text)
+        key = parser_service.cache_key(data, file_type)
+        result = parser_service.cache.get(key)
+        if result is None:
+            if data and file_type.lower() == "pdf":
+                result = await _extract_pdf(data)
+            else:
+                result = await executor.run(tasks.parse_bytes, data, file_type)
+            parser_service.cache.put(key, result)
+            _observe_parse(data, file_type, result.text, result.pages)
+        pages = [asdict(page) for page in result.pages] if result.pages is not None else None
+        return ParseResponse(
+            text=result.text,
+            pages=pages,
+            encoding=result.encoding,
+            encoding_confidence=result.encoding_confidence,
+        )
+    except ExecutorBusyError:
+        raise
     except EmptyFileError as e:
         return ParseResponse(text="", error=str(e))
     except CorruptedFileError as e:
@@ -30,22 +180,598 @@ async def parse_document(request: ParseRequest) -> ParseResponse:
         return ParseResponse(text="", error=f"Failed to parse document: {e}")
 
 
+@router.post("/parse", response_model=ParseResponse)
+async def parse_document(request: ParseRequest) -> ParseResponse:
+    """Parse document and extract text."""
+    try:
+        with metrics.timed(
+            metrics.PARSE_STAGE_SECONDS, stage="decode", file_type=request.file_type.lower()
+        ):
+            data = parser_service.decode(request.file_content)
+    except ParserError as e:
+        return ParseResponse(text="", error=str(e))
+    try:
+        return await _parse(data, request.file_type)
+    except ExecutorBusyError as e:
+        raise _busy(e)
+
+
+@router.post("/parse/raw", response_model=ParseResponse)
+async def parse_raw_document(request: Request, file_type: FileType) -> ParseResponse:
+    """Parse a document sent as raw bytes or as the 'file' field of a multipart form."""
+    data = await _read_upload(request)
+    try:
+        return await _parse(data, file_type)
+    except ExecutorBusyError as e:
+        raise _busy(e)
+
+
+async def _pdf_blocks(data: bytes, reports: list[PageReport]) -> AsyncIterator[Block]:
+    """Yield PDF pages in order while a window of page ranges runs in the pool.
+
+    One range per worker is in flight; the next one is submitted as the oldest
+    finishes. Page reports are appended to ``reports``.
+    """
+    with share_bytes(data) as source:
+        count = await executor.run(tasks.pdf_page_count, source)
+        ranges = iter(split_pages(count, count, settings.pdf_stream_pages_per_task))
+        window: deque[asyncio.Future] = deque()
+
+        def submit(n: int) -> None:
+            # As in _extract_pdf, the page count admitted the request; ranges wait for slots
+            with executor.waiting():
+                for start, stop in islice(ranges, n):
+                    window.append(
+                        asyncio.ensure_future(
+                            executor.run(tasks.extract_pdf_pages, source, start, stop)
+                        )
+                    )
+
+        submit(executor.max_workers)
+        has_text = False
+        try:
+            while window:
+                # Shielded: cancelling the caller must not cancel the range, see below
+                chunk = await asyncio.shield(window[0])
+                window.popleft()
+                submit(1)
+                for text, report in chunk:
+                    reports.append(report)
+                    if text:
+                        has_text = has_text or bool(text.strip())
+                        yield "\n", text
+        finally:
+            # A pool task can't be stopped once it runs, and cancelling its run() would only
+            # stop the wait for it. Let the window's ranges (one per worker at most) finish
+            # before the shared memory they read is released
+            await asyncio.gather(*window, return_exceptions=True)
+
+    if not has_text:
+        raise EmptyFileError("Could not extract text from PDF")
+
+
+async def _iterate(blocks: Iterable[Block]) -> AsyncIterator[Block]:
+    for block in blocks:
+        yield block
+
+
+async def _parse_records(data: bytes, file_type: str) -> AsyncIterator[dict[str, Any]]:
+    """Text records for /parse/stream, then a ``done`` record, or an ``error`` record.
+
+    ExecutorBusyError propagates if it happens before the first record.
+    """
+    stream = TextStream()
+    key = parser_service.cache_key(data, file_type)
+    result = parser_service.cache.get(key)
+    reports: list[PageReport] | None = None
+    parts: list[str] = []
+
+    try:
+        if result is None and file_type.lower() in ("txt", "md"):
+            # Plain text is decoded whole either way; parsing it like /parse keeps its encoding
+            result = await executor.run(tasks.parse_bytes, data, file_type)
+            parser_service.cache.put(key, result)
+            _observe_parse(data, file_type, result.text, None)
+
+        if result is not None:
+            reports = result.pages
+            blocks = _iterate(("\n", line) for line in result.text.split("\n"))
+        elif data and file_type.lower() == "pdf":
+            reports = []
+            blocks = _pdf_blocks(data, reports)
+        else:
+            # DOCX paragraphs and table rows arrive as the pool task reads them
+            blocks = executor.stream(tasks.iter_blocks, data, file_type)
+
+        async for separator, text in blocks:
+            for record in stream.push(separator, text):
+                parts += (record["separator"], record["text"])
+                yield record
+        for record in stream.finish():
+            parts += (record["separator"], record["text"])
+            yield record
+    except ExecutorBusyError as e:
+        if stream.count == 0:
+            raise
+        yield {"error": str(e)}
+        return
+    except ParserError as e:
+        yield {"error": str(e)}
+        return
+    except Exception as e:
+        yield {"error": f"Failed to parse document: {e}"}
+        return
+
+    if result is None:
+        text = "".join(parts)
+        parser_service.cache.put(key, ParseResult(text, reports))
+        _observe_parse(data, file_type, text, reports)
+    pages = [asdict(page) for page in reports] if reports is not None else None
+    done = {"done": True, "length": stream.length, "pages": pages}
+    if result is not None and result.encoding is not None:
+        done |= {"encoding": result.encoding, "encoding_confidence": result.encoding_confidence}
+    yield done
+
+
+async def _prepend(first: dict[str, Any], rest: AsyncIterator[dict[str, Any]]):
+    yield first
+    async for record in rest:
+        yield record
+
+
+@router.post("/parse/stream")
+async def parse_stream(request: Request, file_type: FileType) -> Response:
+    """Parse a raw upload like /parse/raw, streaming the text as NDJSON records.
+
+    Text arrives per paragraph or table row (DOCX), page (PDF) or line (plain
+    text) as ``{"index", "start", "end", "separator", "text"}``. ``start`` and
+    ``end`` are offsets into the text /parse would return, which is the
+    concatenation of every record's ``separator`` and ``text``. The last line is
+    ``{"done": true, "length", "pages"}`` (plus ``encoding`` and
+    ``encoding_confidence`` for plain text) or ``{"error": ...}``.
+    """
+    data = await _read_upload(request)
+    records = _parse_records(data, file_type)
+    try:
+        first = await anext(records)
+    except ExecutorBusyError as e:
+        raise _busy(e)
+    return ndjson_response(_prepend(first, records))
+
+
+@router.get("/stats")
+async def get_stats() -> dict[str, dict[str, int]]:
+    """Cache counters."""
+    return {
+        "parse_cache": parser_service.cache.stats().as_dict(),
+        "generate_cache": generate_cache.stats().as_dict(),
+    }
+
+
+async def _generate(request: DiffRequest, idempotency_key: str | None) -> tuple[bytes, bytes, bool]:
+    """Render documents in the pool unless a cached result exists. Returns (clean, diff, hit).
+
+    Raises HTTPException(422) if ``idempotency_key`` was first sent with another request.
+    """
+    key = generate_cache_key(request.original, request.corrected, request.fact_changes)
+    if idempotency_key:
+        first = idempotency_keys.get(idempotency_key)
+        if first is not None and first != key:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+
+    docs = generate_cache.get(key)
+    hit = docs is not None
+    if docs is None:
+        docs = await executor.run(
+            tasks.generate_documents,
+            request.original,
+            request.corrected,
+            request.fact_changes,
+        )
+        generate_cache.put(key, docs)
+
+    if idempotency_key:
+        idempotency_keys.put(idempotency_key, key)
+
+    clean_doc, diff_doc = docs
+    return clean_doc, diff_doc, hit
+
+
 @router.post("/generate", response_model=DiffResponse)
-async def generate_documents(request: DiffRequest) -> DiffResponse:
-    """Generate clean and diff documents."""
+async def generate_documents(
+    request: DiffRequest,
+    response: Response,
+    accept: str | None = Header(default=None),
+    idempotency_key: str | None = Header(default=None),
+) -> DiffResponse | Response:
+    """Generate clean and diff documents.
+
+    Send ``Accept: multipart/form-data`` to receive the raw docx files as
+    ``clean_doc`` and ``diff_doc`` parts instead of base64 strings in JSON.
+    Repeating a request with the same ``Idempotency-Key`` header returns the
+    documents rendered the first time; reusing the key for a different request
+    is rejected with 422.
+    """
+    binary = wants_multipart(accept)
     if not request.original and not request.corrected:
+        return _documents_error("Both original and corrected texts are empty", binary)
+
+    try:
+        clean_doc, diff_doc, hit = await _generate(request, idempotency_key)
+    except ExecutorBusyError as e:
+        raise _busy(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return _documents_error(f"Failed to generate documents: {e}", binary)
+
+    return _documents_response(clean_doc, diff_doc, binary, response, "hit" if hit else "miss")
+
+
+def _documents_error(error: str, binary: bool) -> DiffResponse | Response:
+    if binary:
+        return multipart_response({}, error=error)
+    return DiffResponse(clean_doc="", diff_doc="", error=error)
+
+
+def _documents_response(
+    clean_doc: bytes,
+    diff_doc: bytes,
+    binary: bool,
+    response: Response,
+    cache_status: str | None = None,
+) -> DiffResponse | Response:
+    if binary:
+        result = multipart_response({"clean_doc": clean_doc, "diff_doc": diff_doc})
+        if cache_status is not None:
+            result.headers[CACHE_HEADER] = cache_status
+        return result
+
+    if cache_status is not None:
+        response.headers[CACHE_HEADER] = cache_status
+    with metrics.timed(metrics.GENERATE_STAGE_SECONDS, stage="encode"):
         return DiffResponse(
-            clean_doc="", diff_doc="", error="Both original and corrected texts are empty"
+            clean_doc=base64.b64encode(clean_doc).decode("ascii"),
+            diff_doc=base64.b64encode(diff_doc).decode("ascii"),
         )
 
+
+def _session_or_404(session_id: str) -> DiffSession:
+    """The open session; 409 while it is being finalized."""
+    session = diff_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown or expired diff session: {session_id}"
+        )
+    if session.finalizing:
+        raise HTTPException(status_code=409, detail=f"Diff session {session_id} is being finalized")
+    return session
+
+
+@router.post("/sessions", response_model=DiffSessionResponse)
+async def open_diff_session(request: DiffSessionRequest) -> DiffSessionResponse:
+    """Open a session for diffing a long document chunk by chunk.
+
+    Send each (original, corrected) chunk to ``/sessions/{id}/chunks`` as soon
+    as it is ready; chunks are diffed in the pool as they arrive. ``finalize``
+    then only joins the stored runs, with ``separator`` between chunks, and
+    writes the two documents.
+    """
     try:
-        clean_doc, diff_doc = diff_service.generate(
-            request.original,
-            request.corrected,
-            request.fact_changes,
+        session = diff_sessions.open(request.separator, request.fact_changes)
+    except SessionLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return DiffSessionResponse(
+        session_id=session.session_id, expires_in=settings.diff_session_ttl_seconds
+    )
+
+
+@router.post("/sessions/{session_id}/chunks", response_model=DiffChunkResponse)
+async def submit_diff_chunk(session_id: str, request: DiffChunkRequest) -> DiffChunkResponse:
+    """Diff one chunk and store its runs. Sending an index again replaces that chunk.
+
+    A chunk for a session that is closed or expires before it is stored gets 404,
+    and one sent while the session is being finalized gets 409.
+    """
+    session = _session_or_404(session_id)
+    fact_changes = session.fact_changes + (request.fact_changes or [])
+    try:
+        clean, diff = await executor.run(
+            tasks.diff_chunk, request.original, request.corrected, fact_changes or None
         )
-        return DiffResponse(clean_doc=clean_doc, diff_doc=diff_doc)
+    except ExecutorBusyError as e:
+        raise _busy(e)
+
+    # The session may have been finalized, closed or expired while the chunk was diffed
+    _session_or_404(session_id)
+    session.add(request.index, clean, diff)
+    return DiffChunkResponse(session_id=session_id, index=request.index, chunks=len(session.chunks))
+
+
+@router.post("/sessions/{session_id}/finalize", response_model=DiffResponse)
+async def finalize_diff_session(
+    session_id: str,
+    response: Response,
+    request: DiffFinalizeRequest | None = None,
+    accept: str | None = Header(default=None),
+) -> DiffResponse | Response:
+    """Write the clean and diff documents from the session's chunks and close it.
+
+    Answers like ``/generate``, including ``Accept: multipart/form-data``. With
+    ``total_chunks`` set, any chunk index missing below it is an error and the
+    session stays open for the missing chunks.
+    """
+    binary = wants_multipart(accept)
+    session = _session_or_404(session_id)
+    missing = session.missing(request.total_chunks if request else None)
+    if missing:
+        return _documents_error(f"Missing chunks: {', '.join(map(str, missing))}", binary)
+    if not session.chunks:
+        return _documents_error("No chunks were submitted", binary)
+
+    clean, diff = session.paragraphs()
+    session.finalizing = True
+    try:
+        clean_doc, diff_doc = await executor.run(tasks.write_documents, list(clean), list(diff))
+    except ExecutorBusyError as e:
+        raise _busy(e)
     except Exception as e:
+        return _documents_error(f"Failed to generate documents: {e}", binary)
+    finally:
+        session.finalizing = False
+
+    diff_sessions.close(session_id)
+    return _documents_response(clean_doc, diff_doc, binary, response)
+
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def close_diff_session(session_id: str) -> Response:
+    """Drop a session without writing documents."""
+    if diff_sessions.close(session_id) is None:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown or expired diff session: {session_id}"
+        )
+    return Response(status_code=204)
+
+
+async def _run_job(job: Job) -> dict[str, bytes]:
+    """Run a queued job; its errors are raised and fail the job."""
+    # Jobs wait for room in the pool, where synchronous requests get 503
+    with executor.waiting():
+        return await _job_result(job)
+
+
+async def _job_result(job: Job) -> dict[str, bytes]:
+    if job.kind == "parse":
+        response = await _parse(job.data, job.params["file_type"])
+        if response.error:
+            raise ValueError(response.error)
+        return {"response": response.model_dump_json().encode()}
+
+    request = DiffRequest.model_validate(job.params)
+    if not request.original and not request.corrected:
+        raise ValueError("Both original and corrected texts are empty")
+    try:
+        clean_doc, diff_doc, _ = await _generate(request, None)
+    except Exception as e:
+        raise ValueError(f"Failed to generate documents: {e}") from e
+    return {"clean_doc": clean_doc, "diff_doc": diff_doc}
+
+
+jobs = create_job_queue(
+    settings.job_backend,
+    _run_job,
+    concurrency=settings.job_concurrency,
+    queue_size=settings.job_queue_size,
+    ttl_seconds=settings.job_ttl_seconds,
+    redis_url=settings.job_redis_url,
+)
+metrics.REGISTRY.register(
+    metrics.Gauge(
+        "worker_jobs_running",
+        "Asynchronous jobs being run by this process.",
+        lambda: {(): jobs.running},
+    )
+)
+
+
+def _job_response(job: Job) -> JobResponse:
+    expires_in = None
+    if job.expires_at is not None:
+        expires_in = max(0, round(job.expires_at - time.time()))
+    return JobResponse(
+        job_id=job.job_id,
+        kind=job.kind,
+        status=job.status,
+        error=job.error,
+        expires_in=expires_in,
+    )
+
+
+async def _submit_job(kind: str, params: dict[str, Any], data: bytes = b"") -> JobResponse:
+    try:
+        job = await jobs.submit(kind, params, data)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return _job_response(job)
+
+
+async def _job_or_404(job_id: str, with_result: bool = False) -> Job:
+    job = await jobs.get(job_id, with_result)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return job
+
+
+@router.post("/jobs/parse", response_model=JobResponse, status_code=202)
+async def submit_parse_job(request: Request, file_type: FileType) -> JobResponse:
+    """Queue a raw upload, sent as to /parse/raw, for parsing.
+
+    Poll ``/jobs/{id}`` until its status is ``done`` or ``failed``, then get the
+    ParseResponse from ``/jobs/{id}/result``.
+    """
+    data = await _read_upload(request)
+    return await _submit_job("parse", {"file_type": file_type}, data)
+
+
+@router.post("/jobs/generate", response_model=JobResponse, status_code=202)
+async def submit_generate_job(request: DiffRequest) -> JobResponse:
+    """Queue a /generate request; its documents come from ``/jobs/{id}/result``."""
+    return await _submit_job("generate", request.model_dump())
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str) -> JobResponse:
+    return _job_response(await _job_or_404(job_id))
+
+
+@router.get("/jobs/{job_id}/result", response_model=ParseResponse | DiffResponse)
+async def get_job_result(
+    job_id: str,
+    response: Response,
+    accept: str | None = Header(default=None),
+) -> ParseResponse | DiffResponse | Response:
+    """The finished job's response, as /parse or /generate would have sent it.
+
+    Errors are reported in the response body, like the synchronous endpoints do.
+    Generate results honour ``Accept: multipart/form-data``. A job that hasn't
+    finished yet gets 409.
+    """
+    job = await _job_or_404(job_id, with_result=True)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+
+    if job.kind == "parse":
+        if job.error is not None:
+            return ParseResponse(text="", error=job.error)
+        return ParseResponse.model_validate_json(job.result["response"])
+
+    binary = wants_multipart(accept)
+    if job.error is not None:
+        return _documents_error(job.error, binary)
+    return _documents_response(job.result["clean_doc"], job.result["diff_doc"], binary, response)
+
+
+@router.delete("/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str) -> Response:
+    """Drop a job and its result. A job already running still runs to completion."""
+    if not await jobs.delete(job_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return Response(status_code=204)
+
+
+def _check_batch_size(items: list) -> None:
+    if len(items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch has {len(items)} items (limit {settings.batch_max_items})",
+        )
+
+
+async def _run_batch(calls: list[Callable[[], Awaitable[T]]]) -> AsyncIterator[tuple[int, T]]:
+    """Yield (index, result) of each call as it finishes.
+
+    One call per pool worker runs at a time, so a large batch keeps every core
+    busy without holding every item in memory at once. Calls that fan out over
+    the pool (PDF page ranges) can still fill it; items then wait for a free
+    slot rather than failing because the batch competes with itself.
+    """
+    semaphore = asyncio.Semaphore(executor.max_workers)
+
+    async def run(index: int, call: Callable[[], Awaitable[T]]) -> tuple[int, T]:
+        async with semaphore:
+            with executor.waiting():
+                return index, await call()
+
+    running = [asyncio.ensure_future(run(index, call)) for index, call in enumerate(calls)]
+    try:
+        for finished in asyncio.as_completed(running):
+            yield await finished
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def _batch_results(calls: list[Callable[[], Awaitable[T]]]) -> list[T]:
+    results: list[Any] = [None] * len(calls)
+    async for index, result in _run_batch(calls):
+        results[index] = result
+    return results
+
+
+async def _batch_records(
+    calls: list[Callable[[], Awaitable[Any]]],
+) -> AsyncIterator[dict[str, Any]]:
+    async for index, result in _run_batch(calls):
+        yield {"index": index, **result.model_dump()}
+
+
+async def _parse_item(item: ParseRequest) -> ParseResponse:
+    try:
+        with metrics.timed(
+            metrics.PARSE_STAGE_SECONDS, stage="decode", file_type=item.file_type.lower()
+        ):
+            data = parser_service.decode(item.file_content)
+        if len(data) > settings.max_file_size_bytes:
+            return ParseResponse(
+                text="", error=f"File is larger than {settings.max_file_size_bytes} bytes"
+            )
+        return await _parse(data, item.file_type)
+    except ParserError as e:
+        return ParseResponse(text="", error=str(e))
+
+
+async def _generate_item(item: DiffRequest) -> DiffResponse:
+    if not item.original and not item.corrected:
         return DiffResponse(
-            clean_doc="", diff_doc="", error=f"Failed to generate documents: {e}"
+            clean_doc="", diff_doc="", error="Both original and corrected texts are empty"
         )
+    try:
+        clean_doc, diff_doc, _ = await _generate(item, None)
+    except Exception as e:
+        return DiffResponse(clean_doc="", diff_doc="", error=f"Failed to generate documents: {e}")
+    with metrics.timed(metrics.GENERATE_STAGE_SECONDS, stage="encode"):
+        return DiffResponse(
+            clean_doc=base64.b64encode(clean_doc).decode("ascii"),
+            diff_doc=base64.b64encode(diff_doc).decode("ascii"),
+        )
+
+
+@router.post("/parse/batch", response_model=ParseBatchResponse)
+async def parse_batch(
+    request: ParseBatchRequest,
+    accept: str | None = Header(default=None),
+) -> ParseBatchResponse | Response:
+    """Parse several documents in parallel across the pool.
+
+    Results come back in request order, each with its own ``error``. With
+    ``Accept: application/x-ndjson`` each result is streamed as soon as it is
+    ready, as ``{"index", "text", "error", "pages"}`` in completion order.
+    """
+    _check_batch_size(request.items)
+    calls = [partial(_parse_item, item) for item in request.items]
+    if wants_ndjson(accept):
+        return ndjson_response(_batch_records(calls))
+    return ParseBatchResponse(results=await _batch_results(calls))
+
+
+@router.post("/generate/batch", response_model=DiffBatchResponse)
+async def generate_batch(
+    request: DiffBatchRequest,
+    accept: str | None = Header(default=None),
+) -> DiffBatchResponse | Response:
+    """Generate documents for several text pairs in parallel across the pool.
+
+    Results are base64 documents as in ``/generate``, in request order. With
+    ``Accept: application/x-ndjson`` each result is streamed as soon as it is
+    ready, as ``{"index", "clean_doc", "diff_doc", "error"}``.
+    """
+    _check_batch_size(request.items)
+    calls = [partial(_generate_item, item) for item in request.items]
+    if wants_ndjson(accept):
+        return ndjson_response(_batch_records(calls))
+    return DiffBatchResponse(results=await _batch_results(calls))
@@ -1,3 +1,4 @@
 from app.core.config import settings
+from app.core.executor import ExecutorBusyError, SharedBytes, executor, share_bytes
 
-__all__ = ["settings"]
+__all__ = ["settings", "executor", "ExecutorBusyError", "SharedBytes", "share_bytes"]
@@ -0,0 +1,91 @@
+"""Admission control: turn requests away while the worker is saturated.
+
+Rejecting a request up front with 503 lets the caller back off and retry
+elsewhere, instead of the worker buffering bodies until the container runs
+out of memory.
+"""
+
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+CGROUP = Path("/sys/fs/cgroup")
+
+
+def working_set_bytes() -> int | None:
+    """Memory in use by the container, as the OOM killer would count it.
+
+    This is the cgroup's usage minus its inactive file cache (reclaimable
+    without swapping), the measure kubelet uses too. Outside a cgroup it is this
+    process's RSS. None when neither can be read.
+    """
+    for usage_file, stat_file, inactive_key in (
+        ("memory.current", "memory.stat", "inactive_file"),  # cgroup v2
+        ("memory/memory.usage_in_bytes", "memory/memory.stat", "total_inactive_file"),  # v1
+    ):
+        try:
+            usage = int((CGROUP / usage_file).read_text())
+            stat = (CGROUP / stat_file).read_text()
+        except (OSError, ValueError):
+            continue
+        for line in stat.splitlines():
+            key, _, value = line.partition(" ")
+            if key == inactive_key:
+                return max(0, usage - int(value))
+        return usage
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class AdmissionController:
+    """Admits requests while fewer than ``max_in_flight`` are being handled and the
+    container's memory is below ``memory_watermark_bytes`` (0 disables either check).
+
+    Memory is sampled at most every ``probe_interval`` seconds, so a burst of
+    requests doesn't read the cgroup files once each.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 0,
+        memory_watermark_bytes: int = 0,
+        probe: Callable[[], int | None] = working_set_bytes,
+        probe_interval: float = 0.25,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.memory_watermark_bytes = memory_watermark_bytes
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.in_flight = 0
+        self.rejected = {"body_too_large": 0, "in_flight": 0, "memory": 0}
+        self._memory: int | None = None
+        self._probed_at = -float("inf")
+
+    def memory_bytes(self) -> int | None:
+        now = time.monotonic()
+        if now - self._probed_at >= self.probe_interval:
+            self._memory = self.probe()
+            self._probed_at = now
+        return self._memory
+
+    def try_acquire(self) -> str | None:
+        """Admit a request, or return why it is rejected ("in_flight" or "memory")."""
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            reason = "in_flight"
+        elif self.memory_watermark_bytes and (self.memory_bytes() or 0) >= (
+            self.memory_watermark_bytes
+        ):
+            reason = "memory"
+        else:
+            self.in_flight += 1
+            return None
+        self.rejected[reason] += 1
+        return reason
+
+    def release(self) -> None:
+        self.in_flight -= 1
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,11 +9,92 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
     debug: bool = False
+    # Largest upload; request bodies above it (plus base64 and JSON overhead) get 413
     max_file_size_mb: int = 10
 
+    # Admission control: requests get 503 with Retry-After while this many are being
+    # handled, or while container memory is above the watermark (0 disables either)
+    admission_max_in_flight: int = 64
+    admission_memory_watermark_mb: int = 0
+    admission_retry_after_seconds: int = 1
+
+    # Process pool for CPU-bound parse/generate work (0 = one process per CPU)
+    executor_workers: int = 0
+    executor_queue_size: int = 16
+
+    # Parse result cache (0 disables); evicted entries spill to parse_cache_dir if set
+    parse_cache_max_mb: int = 64
+    parse_cache_dir: str | None = None
+    parse_cache_disk_max_mb: int = 512
+
+    # DOCX text extraction: "iterparse" streams document.xml in body order,
+    # "python-docx" builds the object model and appends tables after the paragraphs
+    docx_engine: Literal["iterparse", "python-docx"] = "iterparse"
+
+    # PDF extraction: pages are split across the pool in ranges of at least this many pages,
+    # and a page taking longer than the timeout is skipped (0 = no limit)
+    pdf_pages_per_task: int = 25
+    pdf_page_timeout_seconds: float = 30.0
+    # Smaller ranges for /parse/stream, so the first pages are sent sooner
+    pdf_stream_pages_per_task: int = 4
+
+    # Sequence diff algorithm: "myers" (linear space, trims common prefix/suffix) or "difflib"
+    diff_engine: Literal["myers", "difflib"] = "myers"
+    # Docx output: "stream" writes OOXML directly into the zip, "python-docx" builds the object model
+    docx_writer: Literal["stream", "python-docx"] = "stream"
+    # Template package for generated documents; None uses python-docx's bundled default.docx
+    docx_template_path: str | None = None
+
+    # Generated documents cache (0 disables)
+    generate_cache_max_mb: int = 128
+    generate_cache_ttl_seconds: int = 3600
+
+    # Most items accepted by /parse/batch and /generate/batch, and their largest request body
+    batch_max_items: int = 100
+    batch_max_body_mb: int = 64
+
+    # Chunked diff sessions: open sessions allowed and idle time before one is dropped
+    diff_session_max: int = 256
+    diff_session_ttl_seconds: int = 1800
+
+    # Asynchronous jobs (/jobs): "memory" keeps them in this process, "redis" shares one
+    # queue between replicas through job_redis_url (needs the redis package). Each process
+    # runs job_concurrency jobs at once; finished jobs are kept job_ttl_seconds
+    job_backend: Literal["memory", "redis"] = "memory"
+    job_redis_url: str | None = None
+    job_concurrency: int = 2
+    job_queue_size: int = 64
+    job_ttl_seconds: int = 3600
+
+    # Request profiling, off unless profile_dir is set: a request is profiled when its
+    # X-Profile header equals profile_token, or at random with profile_sample_rate
+    profile_dir: str | None = None
+    profile_token: str | None = None
+    profile_sample_rate: float = 0.0
+
     @property
     def max_file_size_bytes(self) -> int:
         return self.max_file_size_mb * 1024 * 1024
 
+    @property
+    def batch_max_body_bytes(self) -> int:
+        return self.batch_max_body_mb * 1024 * 1024
+
+    @property
+    def admission_memory_watermark_bytes(self) -> int:
+        return self.admission_memory_watermark_mb * 1024 * 1024
+
+    @property
+    def parse_cache_max_bytes(self) -> int:
+        return self.parse_cache_max_mb * 1024 * 1024
+
+    @property
+    def parse_cache_disk_max_bytes(self) -> int:
+        return self.parse_cache_disk_max_mb * 1024 * 1024
+
+    @property
+    def generate_cache_max_bytes(self) -> int:
+        return self.generate_cache_max_mb * 1024 * 1024
+
 
 settings = Settings()
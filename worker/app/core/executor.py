@@ -0,0 +1,284 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, TypeVar
+
+from app.core import metrics, profiling
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Items a streaming pool task sends at once: 1 first, doubling up to this
+STREAM_BATCH_MAX = 256
+
+
+class ExecutorBusyError(Exception):
+    pass
+
+
+# Whether run() in this context waits for a free slot instead of raising ExecutorBusyError
+_waiting: ContextVar[bool] = ContextVar("executor_waiting", default=False)
+
+
+class TaskExecutor:
+    """Runs CPU-bound calls in a bounded process pool so the event loop only does I/O.
+
+    At most ``max_workers`` tasks run at once and up to ``queue_size`` more wait for
+    a free process; anything beyond that is rejected with ``ExecutorBusyError``,
+    unless the call is made inside ``waiting()``.
+    """
+
+    def __init__(self, max_workers: int = 0, queue_size: int = 0) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self._pool: ProcessPoolExecutor | None = None
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._manager: Any = None  # SyncManager serving stream() queues, started on first use
+        self._manager_lock = threading.Lock()
+        # Threads blocked on stream() queues, kept apart from the loop's default executor
+        self._stream_threads: ThreadPoolExecutor | None = None
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_size
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        if self._stream_threads is not None:
+            self._stream_threads.shutdown(wait=False, cancel_futures=True)
+            self._stream_threads = None
+
+    @contextmanager
+    def waiting(self) -> Iterator[None]:
+        """Make run() calls started in this context, tasks they spawn included, wait
+        for a free slot when the pool is full instead of raising ExecutorBusyError.
+
+        For work that competes with itself, like a batch whose items each fan out
+        over the pool, and has nobody to send a 503 to.
+        """
+        token = _waiting.set(True)
+        try:
+            yield
+        finally:
+            _waiting.reset(token)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` in the pool. ``fn`` and its arguments must be picklable."""
+        if self._in_flight >= self.capacity:
+            if not _waiting.get():
+                raise ExecutorBusyError(
+                    f"Worker is busy: {self._in_flight} tasks in flight (limit {self.capacity})"
+                )
+            await self._wait_for_slot()
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._pool.submit(_collect, fn, profiling.active(), *args)
+        except BrokenProcessPool:
+            self._pool = None
+            raise
+
+        # The slot is held until the process finishes, even if the caller goes away.
+        self._in_flight += 1
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+
+        started = time.perf_counter()
+        try:
+            result, observations, stats = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self._pool = None
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            metrics.observe(metrics.TASK_SECONDS, seconds, task=fn.__name__)
+        metrics.replay(observations)
+        if stats is not None:
+            profiling.add(profiling.TaskProfile(fn.__name__, seconds, stats))
+        return result
+
+    async def stream(self, fn: Callable[..., Iterable[T]], *args: Any) -> AsyncIterator[T]:
+        """Run the generator ``fn(*args)`` in the pool, yielding its items as they come.
+
+        The task takes one slot like run(), and raises ExecutorBusyError the same
+        way, when iteration starts. Items cross over in batches through a queue
+        served by a manager process and read on a thread pool of the executor's
+        own, one thread per slot, so open streams can't take up the threads other
+        to_thread() callers need. If the caller stops early, the task still runs
+        to its end.
+        """
+        if self._stream_threads is None:
+            self._stream_threads = ThreadPoolExecutor(self.capacity, "stream")
+        threads = self._stream_threads
+        loop = asyncio.get_running_loop()
+        queue = await loop.run_in_executor(threads, self._stream_queue)
+        task = asyncio.ensure_future(self.run(_stream_into, queue, fn, *args))
+
+        def finished(task: asyncio.Future) -> None:
+            # The task ends its batches with None, unless it failed before it got to run
+            if task.cancelled() or task.exception() is not None:
+                loop.run_in_executor(None, _end_stream, queue)
+
+        task.add_done_callback(finished)
+        while (batch := await loop.run_in_executor(threads, queue.get)) is not None:
+            for item in batch:
+                yield item
+        await task
+
+    def _stream_queue(self) -> Any:
+        with self._manager_lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            return self._manager.Queue()
+
+    async def _wait_for_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._in_flight >= self.capacity:
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()  # woken, then cancelled: pass the slot on
+                raise
+
+    def _wake(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+
+def _collect(
+    fn: Callable[..., T], profile: bool, *args: Any
+) -> tuple[T, list[metrics.Observation], profiling.RawStats | None]:
+    """Pool-side wrapper returning the call's result with the metrics it observed,
+    and its cProfile stats when ``profile`` is set."""
+    with metrics.collecting() as observations:
+        if profile:
+            result, stats = profiling.run_profiled(fn, *args)
+            return result, observations, stats
+        return fn(*args), observations, None
+
+
+def _end_stream(queue: Any) -> None:
+    with suppress(OSError, EOFError):  # the manager is gone when the executor shut down
+        queue.put(None)
+
+
+def _stream_into(queue: Any, fn: Callable[..., Iterable[Any]], *args: Any) -> int:
+    """Pool-side: put the items of ``fn(*args)`` on ``queue`` in growing batches, then None.
+
+    Returns how many items were sent.
+    """
+    sent = 0
+    batch: list[Any] = []
+    size = 1
+    try:
+        for item in fn(*args):
+            batch.append(item)
+            if len(batch) >= size:
+                queue.put(batch)
+                sent += len(batch)
+                batch = []
+                size = min(size * 2, STREAM_BATCH_MAX)
+    finally:
+        # Items produced before an error are still sent
+        if batch:
+            queue.put(batch)
+            sent += len(batch)
+        queue.put(None)
+    return sent
+
+
+@dataclass(frozen=True)
+class SharedBytes:
+    """Picklable handle to bytes in shared memory.
+
+    Pass it to several pool tasks instead of the bytes themselves, so a large
+    payload is copied into shared memory once rather than pickled per task.
+    """
+
+    name: str
+    size: int
+
+    def read(self) -> bytes:
+        shm = SharedMemory(self.name)
+        try:
+            return bytes(shm.buf[: self.size])
+        finally:
+            shm.close()
+
+
+@contextmanager
+def share_bytes(data: bytes) -> Iterator[SharedBytes]:
+    """Copy ``data`` into shared memory for the duration of the block."""
+    shm = SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        shm.buf[: len(data)] = data
+        yield SharedBytes(shm.name, len(data))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+executor = TaskExecutor(settings.executor_workers, settings.executor_queue_size)
+
+metrics.REGISTRY.register(
+    metrics.Gauge(
+        "worker_executor_in_flight",
+        "Pool tasks running or waiting for a process.",
+        lambda: {(): executor.in_flight},
+    )
+)
+metrics.REGISTRY.register(
+    metrics.Gauge(
+        "worker_executor_queue_depth",
+        "Pool tasks waiting for a free process.",
+        lambda: {(): executor.queue_depth},
+    )
+)
+metrics.REGISTRY.register(
+    metrics.Gauge(
+        "worker_executor_capacity",
+        "Pool tasks accepted at once before requests are rejected.",
+        lambda: {(): executor.capacity},
+    )
+)
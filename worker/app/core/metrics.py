@@ -0,0 +1,280 @@
+"""Minimal Prometheus metrics registry with text exposition.
+
+Pool processes can't update the parent's registry, so while a pool task runs
+(``collecting``) observations are buffered and returned with the result; the
+executor replays them in the parent, which serves ``/metrics``.
+"""
+
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+LabelValues = tuple[str, ...]
+Observation = tuple[str, float, dict[str, str]]  # (metric name, value, labels)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = tuple(float(4**i) for i in range(3, 14))  # 64 .. 64M
+COUNT_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10_000, 50_000, 100_000, 500_000)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def expose(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+    @abstractmethod
+    def _samples(self) -> Iterator[str]:
+        """Exposition lines of the metric's series, after its HELP and TYPE."""
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((key, (list(c), t[0])) for key, (c, t) in self._series.items())
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Gauge(Metric):
+    """A gauge whose values are read from ``collect`` when scraped."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], dict[LabelValues, float]],
+        labelnames: tuple[str, ...] = (),
+        kind: str = "gauge",
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in sorted(self.collect().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        return "\n".join(line for m in self._metrics.values() for line in m.expose()) + "\n"
+
+
+REGISTRY = Registry()
+
+PARSE_STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "worker_parse_stage_seconds",
+        "Time spent in each parsing stage.",
+        ("stage", "file_type"),
+    )
+)
+PARSE_INPUT_BYTES = REGISTRY.register(
+    Histogram(
+        "worker_parse_input_bytes", "Size of parsed files.", ("file_type",), buckets=SIZE_BUCKETS
+    )
+)
+PARSE_OUTPUT_CHARS = REGISTRY.register(
+    Histogram(
+        "worker_parse_output_chars",
+        "Characters of text extracted per file.",
+        ("file_type",),
+        buckets=SIZE_BUCKETS,
+    )
+)
+GENERATE_STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "worker_generate_stage_seconds",
+        "Time spent in each stage of document generation.",
+        ("stage",),
+    )
+)
+GENERATE_INPUT_CHARS = REGISTRY.register(
+    Histogram(
+        "worker_generate_input_chars",
+        "Characters of original plus corrected text per generation.",
+        buckets=SIZE_BUCKETS,
+    )
+)
+GENERATE_OUTPUT_BYTES = REGISTRY.register(
+    Histogram(
+        "worker_generate_output_bytes",
+        "Size of generated docx files.",
+        ("document",),
+        buckets=SIZE_BUCKETS,
+    )
+)
+GENERATE_PARAGRAPHS = REGISTRY.register(
+    Histogram(
+        "worker_generate_paragraphs",
+        "Paragraphs in generated diff documents.",
+        buckets=COUNT_BUCKETS,
+    )
+)
+GENERATE_TOKENS = REGISTRY.register(
+    Histogram(
+        "worker_generate_tokens",
+        "Distinct paragraphs and words interned per generation.",
+        buckets=COUNT_BUCKETS,
+    )
+)
+TASK_SECONDS = REGISTRY.register(
+    Histogram(
+        "worker_task_seconds",
+        "Wall time of process pool tasks, including time waiting for a free process.",
+        ("task",),
+    )
+)
+HTTP_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "worker_http_request_seconds",
+        "HTTP request duration until the response body is sent.",
+        ("handler", "status"),
+    )
+)
+
+_buffer: list[Observation] | None = None
+
+
+def observe(metric: Histogram, value: float, **labels: Any) -> None:
+    """Record ``value``, or buffer it while ``collecting`` inside a pool task."""
+    if _buffer is not None:
+        _buffer.append((metric.name, value, labels))
+    else:
+        metric.observe(value, **labels)
+
+
+@contextmanager
+def timed(metric: Histogram, **labels: Any) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(metric, time.perf_counter() - started, **labels)
+
+
+@contextmanager
+def collecting() -> Iterator[list[Observation]]:
+    """Buffer observations made in the block into the yielded list."""
+    global _buffer
+    previous, _buffer = _buffer, []
+    try:
+        yield _buffer
+    finally:
+        _buffer = previous
+
+
+class TimedIterator(Generic[T]):
+    """Iterator wrapper adding up the time spent producing items and counting them.
+
+    Lets a consumer driving a lazy pipeline tell its own time from the producer's.
+    """
+
+    def __init__(self, items: Iterable[T]) -> None:
+        self._items = iter(items)
+        self.seconds = 0.0
+        self.count = 0
+
+    def __iter__(self) -> "TimedIterator[T]":
+        return self
+
+    def __next__(self) -> T:
+        started = time.perf_counter()
+        try:
+            item = next(self._items)
+        finally:
+            self.seconds += time.perf_counter() - started
+        self.count += 1
+        return item
+
+
+def replay(observations: list[Observation]) -> None:
+    for name, value, labels in observations:
+        metric = REGISTRY.get(name)
+        if isinstance(metric, Histogram):
+            metric.observe(value, **labels)
@@ -0,0 +1,77 @@
+"""Per-request profiles that follow the request into the process pool.
+
+While ``recording`` is active in a request's context, the executor runs that
+request's pool tasks under cProfile and hands their stats back here, so the
+profile of a request shows the parse or diff work and not just the event loop.
+"""
+
+import cProfile
+import pstats
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# Raw cProfile stats: (file, line, function) -> (calls, primitive calls, tottime, cumtime, callers)
+RawStats = dict[tuple[str, int, str], tuple]
+
+
+@dataclass
+class TaskProfile:
+    task: str
+    seconds: float
+    stats: RawStats
+
+
+_tasks: ContextVar[list[TaskProfile] | None] = ContextVar("profiled_tasks", default=None)
+
+
+def active() -> bool:
+    return _tasks.get() is not None
+
+
+@contextmanager
+def recording() -> Iterator[list[TaskProfile]]:
+    """Profile pool tasks started in this context; their profiles land in the yielded list."""
+    tasks: list[TaskProfile] = []
+    token = _tasks.set(tasks)
+    try:
+        yield tasks
+    finally:
+        _tasks.reset(token)
+
+
+def add(profile: TaskProfile) -> None:
+    tasks = _tasks.get()
+    if tasks is not None:
+        tasks.append(profile)
+
+
+def run_profiled(fn: Callable[..., T], *args: Any) -> tuple[T, RawStats]:
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args)
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+class _Loaded:
+    """Adapter letting ``pstats.Stats`` load raw stats that crossed a process boundary."""
+
+    def __init__(self, stats: RawStats) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def merge(profiles: list[RawStats]) -> pstats.Stats | None:
+    """One ``pstats.Stats`` summing several raw profiles, or None if there are none."""
+    if not profiles:
+        return None
+    stats = pstats.Stats(_Loaded(profiles[0]))
+    for raw in profiles[1:]:
+        stats.add(_Loaded(raw))
+    return stats
@@ -1,14 +1,48 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from app.api import jobs, router
+from app.api.middleware import AdmissionMiddleware, MetricsMiddleware, ProfilingMiddleware
+from app.core import executor, metrics, settings
+from app.core.admission import AdmissionController
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    executor.start()
+    jobs.start()
+    yield
+    await jobs.stop()
+    executor.shutdown()
 
-from app.api import router
-from app.core import settings
 
 app = FastAPI(
     title="Red Pen Worker",
     description="Document parsing and diff generation service",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+if settings.profile_dir and (settings.profile_token or settings.profile_sample_rate > 0):
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.profile_dir,
+        token=settings.profile_token,
+        sample_rate=settings.profile_sample_rate,
+    )
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=AdmissionController(
+        settings.admission_max_in_flight, settings.admission_memory_watermark_bytes
+    ),
+    max_file_bytes=settings.max_file_size_bytes,
+    retry_after=settings.admission_retry_after_seconds,
+    batch_max_body_bytes=settings.batch_max_body_bytes,
+)
+app.add_middleware(MetricsMiddleware)
 app.include_router(router)
 
 
@@ -17,6 +51,12 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Prometheus text exposition of the worker's metrics."""
+    return PlainTextResponse(metrics.REGISTRY.expose(), media_type=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,9 +1,35 @@
-from app.models.requests import DiffRequest, ParseRequest
-from app.models.responses import DiffResponse, ParseResponse
+from app.models.requests import (
+    DiffBatchRequest,
+    DiffChunkRequest,
+    DiffFinalizeRequest,
+    DiffRequest,
+    DiffSessionRequest,
+    ParseBatchRequest,
+    ParseRequest,
+)
+from app.models.responses import (
+    DiffBatchResponse,
+    DiffChunkResponse,
+    DiffResponse,
+    DiffSessionResponse,
+    JobResponse,
+    ParseBatchResponse,
+    ParseResponse,
+)
 
 __all__ = [
     "ParseRequest",
     "ParseResponse",
     "DiffRequest",
     "DiffResponse",
+    "ParseBatchRequest",
+    "ParseBatchResponse",
+    "DiffBatchRequest",
+    "DiffBatchResponse",
+    "DiffSessionRequest",
+    "DiffSessionResponse",
+    "DiffChunkRequest",
+    "DiffChunkResponse",
+    "DiffFinalizeRequest",
+    "JobResponse",
 ]
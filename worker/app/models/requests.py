@@ -2,10 +2,12 @@ from typing import Literal
 
 from pydantic import BaseModel, Field
 
+FileType = Literal["docx", "doc", "pdf", "txt", "md"]
+
 
 class ParseRequest(BaseModel):
     file_content: str = Field(..., description="Base64 encoded file content")
-    file_type: Literal["docx", "doc", "pdf", "txt", "md"]
+    file_type: FileType
 
 
 class FactChange(BaseModel):
@@ -19,3 +21,27 @@ class DiffRequest(BaseModel):
     original: str
     corrected: str
     fact_changes: list[FactChange] | None = None
+
+
+class ParseBatchRequest(BaseModel):
+    items: list[ParseRequest]
+
+
+class DiffBatchRequest(BaseModel):
+    items: list[DiffRequest]
+
+
+class DiffSessionRequest(BaseModel):
+    separator: str = "\n\n"  # text between consecutive chunks in the full document
+    fact_changes: list[FactChange] | None = None  # apply to every chunk
+
+
+class DiffChunkRequest(BaseModel):
+    index: int = Field(..., ge=0)
+    original: str
+    corrected: str
+    fact_changes: list[FactChange] | None = None
+
+
+class DiffFinalizeRequest(BaseModel):
+    total_chunks: int | None = Field(default=None, ge=1)  # None = up to the highest index sent
@@ -1,12 +1,49 @@
 from pydantic import BaseModel
 
 
+class PageInfo(BaseModel):
+    index: int  # zero-based page number
+    seconds: float
+    chars: int
+    error: str | None = None  # why the page was skipped
+
+
 class ParseResponse(BaseModel):
     text: str
     error: str | None = None
+    pages: list[PageInfo] | None = None  # per-page extraction report, PDF only
+    encoding: str | None = None  # detected encoding, plain text only
+    encoding_confidence: float | None = None  # 0..1
 
 
 class DiffResponse(BaseModel):
     clean_doc: str  # base64 encoded docx
     diff_doc: str  # base64 encoded docx
     error: str | None = None
+
+
+class ParseBatchResponse(BaseModel):
+    results: list[ParseResponse]  # in request order
+
+
+class DiffBatchResponse(BaseModel):
+    results: list[DiffResponse]  # in request order
+
+
+class DiffSessionResponse(BaseModel):
+    session_id: str
+    expires_in: int  # seconds of inactivity before the session is dropped
+
+
+class DiffChunkResponse(BaseModel):
+    session_id: str
+    index: int
+    chunks: int  # chunks received so far
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str  # parse | generate
+    status: str  # queued | running | done | failed
+    error: str | None = None
+    expires_in: int | None = None  # seconds the result is kept, once finished
@@ -0,0 +1,141 @@
+import re
+import zlib
+from collections import defaultdict
+from collections.abc import Sequence
+
+_WORD = re.compile(r"\w+")
+# Spreads the CRC32 of a shingle over the bins; fixed, so alignments are reproducible
+_PRIME = (1 << 61) - 1
+_MULTIPLIER = 0x5BD1E9955BD1E995 % _PRIME
+_INCREMENT = 0x27D4EB2F165667C5 % _PRIME
+
+
+class ParagraphAligner:
+    """Pairs up the paragraphs of a replaced block that are rewrites of each other.
+
+    Paragraphs are compared by the Jaccard similarity of their word-bigram sets
+    (casefolded, punctuation ignored). Blocks of up to ``exact_pairs`` paragraph
+    pairs are compared pair by pair. Larger ones are fingerprinted with MinHash,
+    and only pairs sharing an LSH bucket (``bands`` bands of ``rows`` rows) are
+    compared, so a rewritten document isn't an all-pairs job. The result is the
+    monotone set of pairs with the highest total similarity, each at least
+    ``min_similarity``: a split or merged paragraph is paired with its closest
+    part and leaves the others unpaired, instead of shifting every later pair.
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = 0.1,
+        exact_pairs: int = 256,
+        bands: int = 32,
+        rows: int = 1,
+    ) -> None:
+        self.min_similarity = min_similarity
+        self.exact_pairs = exact_pairs
+        self.bands = bands
+        self.rows = rows
+        self._bins: list[int | None] = [None] * (bands * rows)
+
+    def align(self, original: Sequence[str], corrected: Sequence[str]) -> list[tuple[int, int]]:
+        """Index pairs (i, j) of matching paragraphs, increasing in both i and j."""
+        a = [self._shingles(text) for text in original]
+        b = [self._shingles(text) for text in corrected]
+        if len(a) * len(b) <= self.exact_pairs:
+            candidates = [(i, j) for i, x in enumerate(a) if x for j, y in enumerate(b) if y]
+        else:
+            candidates = self._candidates(a, b)
+
+        scored = []
+        for i, j in candidates:
+            shared = len(a[i] & b[j])
+            similarity = shared / (len(a[i]) + len(b[j]) - shared)
+            if similarity >= self.min_similarity:
+                scored.append((i, j, similarity))
+        return _heaviest_chain(scored, len(b))
+
+    @staticmethod
+    def _shingles(text: str) -> set[int]:
+        words = _WORD.findall(text.casefold())
+        if len(words) < 2:
+            return {zlib.crc32(word.encode()) for word in words}
+        return {zlib.crc32(f"{x} {y}".encode()) for x, y in zip(words, words[1:])}
+
+    def _signature(self, shingles: set[int]) -> list[tuple[int, int]]:
+        """One-permutation MinHash: each shingle is hashed once into one of the bins,
+        which keep their minimum; an empty bin borrows the next filled one's value
+        with its distance to it, so short paragraphs still fill every band."""
+        size = len(self._bins)
+        bins: list[int | None] = self._bins.copy()
+        for shingle in shingles:
+            value = (_MULTIPLIER * shingle + _INCREMENT) % _PRIME
+            index, value = value % size, value // size
+            if bins[index] is None or value < bins[index]:
+                bins[index] = value
+
+        signature = [(0, 0)] * size
+        borrowed, distance = 0, 0
+        for position in reversed(range(2 * size)):  # twice round, so the last bins can borrow
+            index = position % size
+            if bins[index] is not None:
+                borrowed, distance = bins[index], 0
+            else:
+                distance += 1
+            if position < size:
+                signature[index] = (borrowed, distance)
+        return signature
+
+    def _candidates(self, a: list[set[int]], b: list[set[int]]) -> set[tuple[int, int]]:
+        buckets: defaultdict[tuple, tuple[list[int], list[int]]] = defaultdict(lambda: ([], []))
+        for side, paragraphs in enumerate((a, b)):
+            for index, shingles in enumerate(paragraphs):
+                if not shingles:
+                    continue
+                signature = self._signature(shingles)
+                for band in range(self.bands):
+                    key = (band, *signature[band * self.rows : (band + 1) * self.rows])
+                    buckets[key][side].append(index)
+        return {(i, j) for left, right in buckets.values() for i in left for j in right}
+
+
+def _heaviest_chain(scored: list[tuple[int, int, float]], size: int) -> list[tuple[int, int]]:
+    """The pairs, strictly increasing in both indexes, with the largest total score.
+
+    Pairs are taken row by row; a Fenwick tree over the column gives the best
+    chain ending before each column, so this is O(k log k) for k pairs.
+    """
+    tree = [(0.0, -1)] * (size + 1)  # (best total, pair index) of chains ending in a column
+    previous: list[int] = []
+    best = (0.0, -1)
+
+    scored.sort()
+    row_start = 0
+    for position in range(len(scored) + 1):
+        if position < len(scored) and scored[position][0] == scored[row_start][0]:
+            continue
+        # Query the whole row before updating, so no chain uses a row twice
+        row = range(row_start, position)
+        totals = []
+        for k in row:
+            _, j, similarity = scored[k]
+            prefix = (0.0, -1)
+            column = j  # chains ending in columns < j
+            while column > 0:
+                prefix = max(prefix, tree[column])
+                column -= column & -column
+            previous.append(prefix[1])
+            totals.append((prefix[0] + similarity, k))
+        for total in totals:
+            _, j, _ = scored[total[1]]
+            column = j + 1
+            while column <= size:
+                tree[column] = max(tree[column], total)
+                column += column & -column
+            best = max(best, total)
+        row_start = position
+
+    chain = []
+    k = best[1]
+    while k >= 0:
+        chain.append(scored[k][:2])
+        k = previous[k]
+    return chain[::-1]
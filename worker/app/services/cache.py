@@ -0,0 +1,238 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+    disk_entries: int = 0
+    disk_size_bytes: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float | None = None
+
+
+class ResultCache:
+    """In-memory LRU cache bounded by total value size, with optional TTL and disk tier.
+
+    Entries evicted from memory are spilled to ``disk_dir`` (when set) and promoted
+    back on the next hit. The disk tier has its own byte budget and is indexed from
+    the directory on startup, so it survives restarts.
+
+    Spilled entries are pickled and written by a background thread, so ``put``
+    called from the event loop doesn't wait on the disk; until then they are
+    still served from memory. ``flush`` waits for the writes.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float | None = None,
+        disk_dir: str | Path | None = None,
+        disk_max_bytes: int = 0,
+        size_of: Callable[[Any], int] = len,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_bytes = disk_max_bytes
+        self._size_of = size_of
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._size = 0
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_index: OrderedDict[str, int] = OrderedDict()
+        self._disk_size = 0
+        self._spilling: dict[str, Any] = {}  # evicted values not written to disk yet
+        self._spiller: ThreadPoolExecutor | None = None
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+            self._spiller = ThreadPoolExecutor(1, "cache-spill")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Any | None:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry.expires_at):
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return entry.value
+            if entry is not None:
+                self._remove(key)
+
+            value = self._spilling.pop(key, None)
+            if value is None:
+                value = self._read_disk(key)
+            if value is not None:
+                self._stats.hits += 1
+                self._stats.disk_hits += 1
+                self._insert(key, value, self._size_of(value))
+                return value
+
+            self._stats.misses += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        size = self._size_of(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._spilling.pop(key, None)
+            self._insert(key, value, size)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                disk_hits=self._stats.disk_hits,
+                evictions=self._stats.evictions,
+                entries=len(self._entries),
+                size_bytes=self._size,
+                disk_entries=len(self._disk_index),
+                disk_size_bytes=self._disk_size,
+            )
+
+    def flush(self) -> None:
+        """Wait until the entries evicted so far are on disk."""
+        if self._spiller is not None:
+            self._spiller.submit(lambda: None).result()
+
+    def clear(self) -> None:
+        """Drop every entry, from memory and from the disk tier."""
+        self.flush()
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._spilling.clear()
+            for name in list(self._disk_index):
+                self._drop_disk(name)
+
+    def _expired(self, expires_at: float | None) -> bool:
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def _insert(self, key: str, value: Any, size: int) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = _Entry(value, size, expires_at)
+        self._size += size
+
+        while self._size > self.max_bytes:
+            old_key, old_entry = self._entries.popitem(last=False)
+            self._size -= old_entry.size
+            self._stats.evictions += 1
+            if not self._expired(old_entry.expires_at) and self._spiller is not None:
+                if self.disk_max_bytes > 0:
+                    self._spilling[old_key] = old_entry.value
+                    self._spiller.submit(self._write_disk, old_key, old_entry.value)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    # Disk tier
+
+    def _disk_path(self, key: str) -> Path:
+        return self._disk_dir / hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def _load_disk_index(self) -> None:
+        files = sorted(
+            (f for f in self._disk_dir.iterdir() if f.is_file() and not f.suffix),
+            key=lambda f: f.stat().st_mtime,
+        )
+        for f in files:
+            self._disk_index[f.name] = f.stat().st_size
+            self._disk_size += f.stat().st_size
+
+    def _read_disk(self, key: str) -> Any | None:
+        if self._disk_dir is None:
+            return None
+
+        path = self._disk_path(key)
+        if path.name not in self._disk_index:
+            return None
+
+        try:
+            if self.ttl_seconds and path.stat().st_mtime + self.ttl_seconds <= time.time():
+                raise FileNotFoundError
+            with path.open("rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self._drop_disk(path.name)
+            return None
+
+        self._drop_disk(path.name)
+        return value
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        """Runs on the spill thread; only the index update takes the lock."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._disk_path(key)
+        tmp = path.with_suffix(".tmp")
+        written = len(data) <= self.disk_max_bytes
+        if written:
+            try:
+                tmp.write_bytes(data)
+            except OSError:
+                written = False
+
+        with self._lock:
+            # Promoted back to memory or cleared while it was being written
+            if self._spilling.get(key) is not value:
+                written = False
+            else:
+                del self._spilling[key]
+            if not written:
+                tmp.unlink(missing_ok=True)
+                return
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                return
+
+            self._disk_size -= self._disk_index.pop(path.name, 0)
+            self._disk_index[path.name] = len(data)
+            self._disk_size += len(data)
+            while self._disk_size > self.disk_max_bytes:
+                self._drop_disk(next(iter(self._disk_index)))
+
+    def _drop_disk(self, name: str) -> None:
+        self._disk_size -= self._disk_index.pop(name, 0)
+        try:
+            (self._disk_dir / name).unlink()
+        except OSError:
+            pass
@@ -0,0 +1,239 @@
+import difflib
+import math
+from collections import Counter
+from collections.abc import Sequence
+from typing import Literal, Protocol
+
+from app.services.tokens import encode_chars
+
+Opcode = tuple[str, int, int, int, int]
+EngineName = Literal["myers", "difflib"]
+
+
+class DiffEngine(Protocol):
+    def get_opcodes(self, a: Sequence, b: Sequence) -> list[Opcode]:
+        """Return difflib-compatible opcodes (equal/delete/insert/replace) turning a into b."""
+        ...
+
+
+class DifflibEngine:
+    def __init__(self, autojunk: bool = False) -> None:
+        self.autojunk = autojunk
+
+    def get_opcodes(self, a: Sequence, b: Sequence) -> list[Opcode]:
+        return difflib.SequenceMatcher(None, a, b, autojunk=self.autojunk).get_opcodes()
+
+
+class MyersEngine:
+    """Linear-space Myers diff, O((N+M)·D) time for N+M items and D edits.
+
+    Identical leading and trailing items are trimmed before every split, so a
+    long document with a handful of edits costs little more than one pass over
+    it. Sub-problems whose edit distance exceeds ``max_d`` on each side of the
+    middle snake are handed to difflib instead of degrading quadratically.
+    """
+
+    def __init__(self, max_d: int = 1000, fallback: DiffEngine | None = None) -> None:
+        self.max_d = max_d
+        self.fallback = fallback or DifflibEngine()
+
+    def get_opcodes(self, a: Sequence, b: Sequence) -> list[Opcode]:
+        blocks: list[tuple[int, int, int]] = []
+        self._match(a, 0, len(a), b, 0, len(b), blocks)
+        return _blocks_to_opcodes(blocks, len(a), len(b))
+
+    def get_opcodes_within(self, a: Sequence, b: Sequence, max_edits: int) -> list[Opcode] | None:
+        """Opcodes turning a into b, or None if that takes more than ``max_edits``
+        insertions and deletions.
+
+        The middle snake search of the whole problem stops once the bound can't
+        be met, so a hopeless pair costs O((N+M)·max_edits) at most.
+        """
+        if max_edits < 0:
+            return None
+        if (max_edits + 1) // 2 > self.max_d:
+            # Past max_d the split falls back to difflib, which gives no bound to stop at
+            opcodes = self.get_opcodes(a, b)
+            return opcodes if _edits(opcodes) <= max_edits else None
+
+        blocks: list[tuple[int, int, int]] = []
+        if not self._match(a, 0, len(a), b, 0, len(b), blocks, max_edits):
+            return None
+        return _blocks_to_opcodes(blocks, len(a), len(b))
+
+    def _match(
+        self,
+        a: Sequence,
+        a0: int,
+        a1: int,
+        b: Sequence,
+        b0: int,
+        b1: int,
+        blocks: list[tuple[int, int, int]],
+        max_edits: int | None = None,
+    ) -> bool:
+        """Append matching blocks (i, j, size) of a[a0:a1] and b[b0:b1] in order.
+
+        With ``max_edits``, returns False without finishing once more edits than
+        that are needed.
+        """
+        start = a0
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            a0 += 1
+            b0 += 1
+        if a0 > start:
+            blocks.append((start, b0 - (a0 - start), a0 - start))
+
+        end = a1
+        while a1 > a0 and b1 > b0 and a[a1 - 1] == b[b1 - 1]:
+            a1 -= 1
+            b1 -= 1
+        suffix = (a1, b1, end - a1) if end > a1 else None
+
+        if a0 < a1 and b0 < b1:
+            limit = self.max_d if max_edits is None else (max_edits + 1) // 2
+            snake = self._middle_snake(a, a0, a1, b, b0, b1, limit)
+            if snake is None:
+                if max_edits is not None:
+                    return False
+                for tag, i1, i2, j1, j2 in self.fallback.get_opcodes(a[a0:a1], b[b0:b1]):
+                    if tag == "equal":
+                        blocks.append((a0 + i1, b0 + j1, i2 - i1))
+            else:
+                x, y, u, v, edits = snake
+                if max_edits is not None and edits > max_edits:
+                    return False
+                # The halves need ``edits`` between them, so they need no bound of their own
+                self._match(a, a0, a0 + x, b, b0, b0 + y, blocks)
+                if u > x:
+                    blocks.append((a0 + x, b0 + y, u - x))
+                self._match(a, a0 + u, a1, b, b0 + v, b1, blocks)
+        elif max_edits is not None and (a1 - a0) + (b1 - b0) > max_edits:
+            return False
+
+        if suffix is not None:
+            blocks.append(suffix)
+        return True
+
+    def _middle_snake(
+        self, a: Sequence, a0: int, a1: int, b: Sequence, b0: int, b1: int, max_d: int
+    ) -> tuple[int, int, int, int, int] | None:
+        """Find the middle snake of an optimal edit path, in coordinates relative to (a0, b0).
+
+        Returns (x, y, u, v, edits), with ``edits`` the length of the whole path, or
+        None when more than ``max_d`` edits are needed on either side.
+        """
+        n = a1 - a0
+        m = b1 - b0
+        delta = n - m
+        odd = delta & 1
+        max_d = min((n + m + 1) // 2, max_d)
+
+        offset = max_d + m + 2
+        size = 2 * max_d + n + m + 5
+        forward = [0] * size
+        backward = [0] * size
+        forward[offset + 1] = 0
+        backward[offset + delta - 1] = n
+
+        for d in range(max_d + 1):
+            for k in range(-d, d + 1, 2):
+                if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                    x = forward[offset + k + 1]
+                else:
+                    x = forward[offset + k - 1] + 1
+                y = x - k
+                start_x, start_y = x, y
+                while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                    x += 1
+                    y += 1
+                forward[offset + k] = x
+                if odd and delta - d < k < delta + d and x >= backward[offset + k]:
+                    return start_x, start_y, x, y, 2 * d - 1
+
+            for k in range(delta - d, delta + d + 1, 2):
+                if k == delta + d or (
+                    k != delta - d and backward[offset + k - 1] < backward[offset + k + 1]
+                ):
+                    x = backward[offset + k - 1]
+                else:
+                    x = backward[offset + k + 1] - 1
+                y = x - k
+                end_x, end_y = x, y
+                while x > 0 and y > 0 and a[a0 + x - 1] == b[b0 + y - 1]:
+                    x -= 1
+                    y -= 1
+                backward[offset + k] = x
+                if not odd and -d <= k <= d and x <= forward[offset + k]:
+                    return x, y, end_x, end_y, 2 * d
+
+        return None
+
+
+class SimilarityMatcher:
+    """Character alignment of two strings, when they are similar enough to show one.
+
+    Similarity is ``2 * LCS / (len(a) + len(b))``, difflib's ``ratio`` over an
+    optimal alignment. Cheap upper bounds go first: the shorter length, then
+    the characters the strings have in common. Only then does a Myers search run,
+    and it gives up as soon as the ratio can no longer exceed ``threshold``. When
+    the pair is similar, the alignment found is the character diff itself.
+    """
+
+    def __init__(self, threshold: float = 0.6, engine: MyersEngine | None = None) -> None:
+        self.threshold = threshold
+        self.engine = engine or MyersEngine()
+
+    def opcodes(self, a: str, b: str) -> list[Opcode] | None:
+        """Character opcodes turning a into b if their similarity exceeds the threshold."""
+        total = len(a) + len(b)
+        if total == 0:
+            return []
+        # ratio > threshold  <=>  matched characters > need / 2
+        need = math.floor(round(self.threshold * total, 9))
+        if 2 * min(len(a), len(b)) <= need:
+            return None
+        if 2 * (Counter(a) & Counter(b)).total() <= need:
+            return None
+        # Each character outside the LCS costs one edit: edits = total - 2 * LCS
+        return self.engine.get_opcodes_within(encode_chars(a), encode_chars(b), total - need - 1)
+
+
+def _edits(opcodes: list[Opcode]) -> int:
+    """Insertions plus deletions the opcodes make."""
+    return sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in opcodes if tag != "equal")
+
+
+def _blocks_to_opcodes(blocks: list[tuple[int, int, int]], n: int, m: int) -> list[Opcode]:
+    """Turn ordered matching blocks into difflib-style opcodes, merging adjacent blocks."""
+    merged: list[list[int]] = []
+    for i, j, size in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1][2] += size
+        else:
+            merged.append([i, j, size])
+    merged.append([n, m, 0])
+
+    opcodes: list[Opcode] = []
+    i = j = 0
+    for ai, bj, size in merged:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(("equal", ai, i, bj, j))
+    return opcodes
+
+
+def create_engine(name: EngineName) -> DiffEngine:
+    match name:
+        case "myers":
+            return MyersEngine()
+        case "difflib":
+            return DifflibEngine()
+        case _:
+            raise ValueError(f"Unknown diff engine: {name}")
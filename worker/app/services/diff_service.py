@@ -1,19 +1,53 @@
 import base64
-import difflib
+import hashlib
+import json
 import re
-from io import BytesIO
-
-from docx import Document
-from docx.enum.text import WD_COLOR_INDEX
-from docx.shared import RGBColor
+import time
+from collections.abc import Iterable, Iterator
+from itertools import groupby
+from operator import itemgetter
 
+from app.core import metrics
 from app.models.requests import FactChange
+from app.services.alignment import ParagraphAligner
+from app.services.diff_engine import DiffEngine, MyersEngine, Opcode, SimilarityMatcher
+from app.services.docx_writer import DocxWriter, Paragraph, Run, StreamingDocxWriter
+from app.services.facts import FactMatcher, normalize, overlapping
+from app.services.tokens import TokenTable
+
+# Replaced words whose characters are more alike than this get a character-level diff
+SIMILARITY_THRESHOLD = 0.6
+
+
+def cache_key(
+    original: str,
+    corrected: str,
+    fact_changes: list[FactChange] | None = None,
+) -> str:
+    """Digest of everything that affects the rendered documents.
+
+    Fact changes only contribute their normalized phrases, deduplicated and
+    sorted, since context and source are not rendered.
+    """
+    facts = sorted({(normalize(fc.original), normalize(fc.corrected)) for fc in fact_changes or []})
+    digest = hashlib.blake2b(digest_size=20)
+    for part in (original, corrected, json.dumps(facts, ensure_ascii=False)):
+        encoded = part.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
 
 
 class DiffService:
-    COLOR_ADDED = RGBColor(0x00, 0x50, 0x00)  # dark green on bright green highlight
-    COLOR_DELETED = RGBColor(0x00, 0x00, 0x00)  # black on red highlight
-    COLOR_FACT = RGBColor(0x00, 0x00, 0x00)  # black on yellow highlight
+    def __init__(
+        self,
+        engine: DiffEngine | None = None,
+        writer: DocxWriter | None = None,
+    ) -> None:
+        self.engine = engine or MyersEngine()
+        self.similarity = SimilarityMatcher(SIMILARITY_THRESHOLD)
+        self.aligner = ParagraphAligner()
+        self.writer = writer or StreamingDocxWriter()
 
     def generate(
         self,
@@ -22,200 +56,267 @@ class DiffService:
         fact_changes: list[FactChange] | None = None,
     ) -> tuple[str, str]:
         """Generate clean and diff documents. Returns base64 encoded docx files."""
-        clean_doc = self._create_clean_doc(corrected)
-        diff_doc = self._create_diff_doc(original, corrected, fact_changes)
+        clean_doc, diff_doc = self.render(original, corrected, fact_changes)
+        return (
+            base64.b64encode(clean_doc).decode("ascii"),
+            base64.b64encode(diff_doc).decode("ascii"),
+        )
 
-        return self._doc_to_base64(clean_doc), self._doc_to_base64(diff_doc)
+    def render(
+        self,
+        original: str,
+        corrected: str,
+        fact_changes: list[FactChange] | None = None,
+    ) -> tuple[bytes, bytes]:
+        """Render clean and diff documents. Returns raw docx files."""
+        metrics.observe(metrics.GENERATE_INPUT_CHARS, len(original) + len(corrected))
 
-    def _create_clean_doc(self, text: str) -> Document:
-        doc = Document()
-        for paragraph in text.split("\n"):
-            doc.add_paragraph(paragraph)
-        return doc
+        started = time.perf_counter()
+        clean_doc = self.writer.write(self._clean_paragraphs(corrected))
+        metrics.observe(
+            metrics.GENERATE_STAGE_SECONDS, time.perf_counter() - started, stage="write_clean"
+        )
 
-    def _create_diff_doc(
+        # The writer pulls diff paragraphs lazily, so the diff time is what it spends waiting
+        paragraphs = metrics.TimedIterator(self._diff_paragraphs(original, corrected, fact_changes))
+        started = time.perf_counter()
+        diff_doc = self.writer.write(paragraphs)
+        elapsed = time.perf_counter() - started
+        metrics.observe(metrics.GENERATE_STAGE_SECONDS, paragraphs.seconds, stage="diff")
+        metrics.observe(
+            metrics.GENERATE_STAGE_SECONDS, elapsed - paragraphs.seconds, stage="write_diff"
+        )
+        metrics.observe(metrics.GENERATE_PARAGRAPHS, paragraphs.count)
+        metrics.observe(metrics.GENERATE_OUTPUT_BYTES, len(clean_doc), document="clean")
+        metrics.observe(metrics.GENERATE_OUTPUT_BYTES, len(diff_doc), document="diff")
+        return clean_doc, diff_doc
+
+    def diff_runs(
         self,
         original: str,
         corrected: str,
         fact_changes: list[FactChange] | None = None,
-    ) -> Document:
-        doc = Document()
+    ) -> tuple[list[Paragraph], list[Paragraph]]:
+        """Styled paragraphs of the clean and diff documents, without writing them.
+
+        Runs of consecutive pieces of one text can be joined with ``join_paragraphs``
+        and written once with ``write``.
+        """
+        return (
+            list(self._clean_paragraphs(corrected)),
+            list(self._diff_paragraphs(original, corrected, fact_changes)),
+        )
+
+    def write(self, clean: Iterable[Paragraph], diff: Iterable[Paragraph]) -> tuple[bytes, bytes]:
+        return self.writer.write(clean), self.writer.write(diff)
+
+    @staticmethod
+    def join_paragraphs(pieces: Iterable[list[Paragraph]], separator: str) -> Iterator[Paragraph]:
+        """Paragraphs of the text made by joining the pieces' texts with ``separator``.
 
-        fact_originals = set()
-        fact_corrected = set()
-        if fact_changes:
-            for fc in fact_changes:
-                fact_originals.add(fc.original.lower())
-                fact_corrected.add(fc.corrected.lower())
+        The separator's newlines split paragraphs like they would in the joined
+        text: the last paragraph of one piece and the first of the next are
+        extended with the separator's outer parts, and its inner lines become
+        unstyled paragraphs of their own.
+        """
+        head, *middle = separator.split("\n")
+        tail = middle.pop() if middle else None
+        previous: list[Paragraph] | None = None
+        for paragraphs in pieces:
+            paragraphs = list(paragraphs) or [[]]
+            if previous is None:
+                previous = paragraphs
+                continue
+
+            yield from previous[:-1]
+            joined = previous[-1] + [(head, None)]
+            if tail is None:
+                # No newline in the separator: the two paragraphs become one
+                first = joined + paragraphs[0]
+            else:
+                yield DiffService._coalesce(joined)
+                for line in middle:
+                    yield [(line, None)] if line else []
+                first = [(tail, None)] + paragraphs[0]
+            previous = [DiffService._coalesce(first), *paragraphs[1:]]
+
+        if previous is not None:
+            yield from previous
+
+    def _clean_paragraphs(self, text: str) -> Iterator[Paragraph]:
+        for paragraph in text.split("\n"):
+            yield [(paragraph, None)] if paragraph else []
+
+    def _diff_paragraphs(
+        self,
+        original: str,
+        corrected: str,
+        fact_changes: list[FactChange] | None = None,
+    ) -> Iterator[Paragraph]:
+        # Compiled once per request; each paragraph is then scanned once per side
+        fact_originals = FactMatcher(fc.original for fc in fact_changes or [])
+        fact_corrected = FactMatcher(fc.corrected for fc in fact_changes or [])
 
         original_paragraphs = original.split("\n")
         corrected_paragraphs = corrected.split("\n")
 
-        para_matcher = difflib.SequenceMatcher(
-            None, original_paragraphs, corrected_paragraphs
-        )
+        # Paragraphs and word tokens are interned once per request so the engine
+        # compares int ids; the string lists are only used to emit runs.
+        tokens = TokenTable()
 
-        for tag, i1, i2, j1, j2 in para_matcher.get_opcodes():
+        for tag, i1, i2, j1, j2 in self.engine.get_opcodes(
+            tokens.encode(original_paragraphs), tokens.encode(corrected_paragraphs)
+        ):
             match tag:
                 case "equal":
                     for para_text in original_paragraphs[i1:i2]:
-                        para = doc.add_paragraph()
-                        para.add_run(para_text)
+                        yield [(para_text, None)] if para_text else []
                 case "delete":
                     for para_text in original_paragraphs[i1:i2]:
-                        para = doc.add_paragraph()
-                        self._add_deleted_paragraph(para, para_text)
+                        yield self._deleted_paragraph(para_text)
                 case "insert":
                     for para_text in corrected_paragraphs[j1:j2]:
-                        para = doc.add_paragraph()
-                        self._add_inserted_paragraph(para, para_text, fact_corrected)
+                        yield self._inserted_paragraph(para_text, fact_corrected)
+                case "replace" if i2 - i1 == 1 and j2 - j1 == 1:
+                    yield self._diff_paragraph(
+                        original_paragraphs[i1],
+                        corrected_paragraphs[j1],
+                        fact_originals,
+                        fact_corrected,
+                        tokens,
+                    )
                 case "replace":
-                    for idx in range(max(i2 - i1, j2 - j1)):
-                        para = doc.add_paragraph()
-                        orig_para = (
-                            original_paragraphs[i1 + idx] if i1 + idx < i2 else ""
-                        )
-                        corr_para = (
-                            corrected_paragraphs[j1 + idx] if j1 + idx < j2 else ""
-                        )
+                    yield from self._replace_block(
+                        original_paragraphs[i1:i2],
+                        corrected_paragraphs[j1:j2],
+                        fact_originals,
+                        fact_corrected,
+                        tokens,
+                    )
 
-                        if not orig_para:
-                            self._add_inserted_paragraph(para, corr_para, fact_corrected)
-                        elif not corr_para:
-                            self._add_deleted_paragraph(para, orig_para)
-                        else:
-                            self._add_diff_paragraph(
-                                para, orig_para, corr_para, fact_originals, fact_corrected
-                            )
+        metrics.observe(metrics.GENERATE_TOKENS, len(tokens))
 
-        return doc
+    def _replace_block(
+        self,
+        original: list[str],
+        corrected: list[str],
+        fact_originals: FactMatcher,
+        fact_corrected: FactMatcher,
+        tokens: TokenTable,
+    ) -> Iterator[Paragraph]:
+        """Paragraphs of a replaced block: aligned pairs get a word diff, the rest are
+        shown deleted, then inserted, in between them.
+
+        Blank lines of the original are dropped rather than shown as deleted.
+        """
+        pairs = self.aligner.align(original, corrected)
+        pairs.append((len(original), len(corrected)))  # flushes what follows the last pair
+        i = j = 0
+        for next_i, next_j in pairs:
+            for text in original[i:next_i]:
+                if text:
+                    yield self._deleted_paragraph(text)
+            for text in corrected[j:next_j]:
+                yield self._inserted_paragraph(text, fact_corrected)
+            if next_i < len(original):
+                yield self._diff_paragraph(
+                    original[next_i], corrected[next_j], fact_originals, fact_corrected, tokens
+                )
+            i, j = next_i + 1, next_j + 1
 
-    def _add_deleted_paragraph(self, para, text: str) -> None:
-        run = para.add_run(text)
-        run.font.color.rgb = self.COLOR_DELETED
-        run.font.highlight_color = WD_COLOR_INDEX.RED
+    def _deleted_paragraph(self, text: str) -> Paragraph:
+        return [(text, "deleted")]
 
-    def _add_inserted_paragraph(self, para, text: str, fact_corrected: set) -> None:
+    def _inserted_paragraph(self, text: str, fact_corrected: FactMatcher) -> Paragraph:
         words = self._tokenize(text)
-        for word in words:
-            if word.lower() in fact_corrected:
-                run = para.add_run(word)
-                run.font.color.rgb = self.COLOR_FACT
-                run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-            else:
-                run = para.add_run(word)
-                run.font.color.rgb = self.COLOR_ADDED
-                run.font.highlight_color = WD_COLOR_INDEX.BRIGHT_GREEN
+        facts = overlapping(words, fact_corrected.find(text))
+        return self._coalesce(
+            (word, "fact" if fact else "added") for word, fact in zip(words, facts)
+        )
 
-    def _add_diff_paragraph(
+    def _diff_paragraph(
         self,
-        para,
         original: str,
         corrected: str,
-        fact_originals: set,
-        fact_corrected: set,
-    ) -> None:
+        fact_originals: FactMatcher,
+        fact_corrected: FactMatcher,
+        tokens: TokenTable,
+    ) -> Paragraph:
         orig_words = self._tokenize_words(original)
         corr_words = self._tokenize_words(corrected)
+        # Whether each word overlaps a fact phrase of its side
+        orig_facts = overlapping(orig_words, fact_originals.find(original))
+        corr_facts = overlapping(corr_words, fact_corrected.find(corrected))
+        runs: Paragraph = []
 
-        matcher = difflib.SequenceMatcher(None, orig_words, corr_words, autojunk=False)
-
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        for tag, i1, i2, j1, j2 in self.engine.get_opcodes(
+            tokens.encode(orig_words), tokens.encode(corr_words)
+        ):
             match tag:
                 case "equal":
-                    for word in orig_words[i1:i2]:
-                        para.add_run(word)
+                    runs.extend((word, None) for word in orig_words[i1:i2])
                 case "delete":
-                    for word in orig_words[i1:i2]:
-                        is_fact = word.strip().lower() in fact_originals
-                        run = para.add_run(word)
-                        if is_fact:
-                            run.font.color.rgb = self.COLOR_FACT
-                            run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-                        else:
-                            run.font.color.rgb = self.COLOR_DELETED
-                            run.font.highlight_color = WD_COLOR_INDEX.RED
+                    runs.extend(
+                        (word, "fact" if fact else "deleted")
+                        for word, fact in zip(orig_words[i1:i2], orig_facts[i1:i2])
+                    )
                 case "insert":
-                    for word in corr_words[j1:j2]:
-                        is_fact = word.strip().lower() in fact_corrected
-                        run = para.add_run(word)
-                        if is_fact:
-                            run.font.color.rgb = self.COLOR_FACT
-                            run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-                        else:
-                            run.font.color.rgb = self.COLOR_ADDED
-                            run.font.highlight_color = WD_COLOR_INDEX.BRIGHT_GREEN
+                    runs.extend(
+                        (word, "fact" if fact else "added")
+                        for word, fact in zip(corr_words[j1:j2], corr_facts[j1:j2])
+                    )
                 case "replace":
                     orig_chunk = orig_words[i1:i2]
                     corr_chunk = corr_words[j1:j2]
 
+                    # A replaced fact is shown whole, even when only a few characters
+                    # changed; the chunk's other words stay deleted and added
+                    if any(orig_facts[i1:i2]) or any(corr_facts[j1:j2]):
+                        runs.extend(
+                            (word, "fact" if fact else "deleted")
+                            for word, fact in zip(orig_chunk, orig_facts[i1:i2])
+                        )
+                        runs.extend(
+                            (word, "fact" if fact else "added")
+                            for word, fact in zip(corr_chunk, corr_facts[j1:j2])
+                        )
+                        continue
+
                     orig_text = "".join(orig_chunk)
                     corr_text = "".join(corr_chunk)
 
-                    similarity = difflib.SequenceMatcher(None, orig_text, corr_text).ratio()
-
-                    if similarity > 0.6:
-                        self._add_char_diff(para, orig_text, corr_text, fact_originals, fact_corrected)
+                    char_opcodes = self.similarity.opcodes(orig_text, corr_text)
+                    if char_opcodes is not None:
+                        runs.extend(self._char_diff(orig_text, corr_text, char_opcodes))
                     else:
-                        is_fact_replacement = (
-                            orig_text.strip().lower() in fact_originals
-                            or corr_text.strip().lower() in fact_corrected
-                        )
+                        runs.extend((word, "deleted") for word in orig_chunk)
+                        runs.extend((word, "added") for word in corr_chunk)
 
-                        for word in orig_chunk:
-                            run = para.add_run(word)
-                            if is_fact_replacement:
-                                run.font.color.rgb = self.COLOR_FACT
-                                run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-                            else:
-                                run.font.color.rgb = self.COLOR_DELETED
-                                run.font.highlight_color = WD_COLOR_INDEX.RED
-
-                        for word in corr_chunk:
-                            run = para.add_run(word)
-                            if is_fact_replacement:
-                                run.font.color.rgb = self.COLOR_FACT
-                                run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-                            else:
-                                run.font.color.rgb = self.COLOR_ADDED
-                                run.font.highlight_color = WD_COLOR_INDEX.BRIGHT_GREEN
-
-    def _add_char_diff(
-        self,
-        para,
-        original: str,
-        corrected: str,
-        fact_originals: set,
-        fact_corrected: set,
-    ) -> None:
-        """Character-level diff for similar strings - shows precise changes."""
-        matcher = difflib.SequenceMatcher(None, original, corrected, autojunk=False)
+        return self._coalesce(runs)
 
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    def _char_diff(self, original: str, corrected: str, opcodes: list[Opcode]) -> Paragraph:
+        """Character-level diff for similar strings - shows precise changes."""
+        runs: Paragraph = []
+        for tag, i1, i2, j1, j2 in opcodes:
             match tag:
                 case "equal":
-                    para.add_run(original[i1:i2])
+                    runs.append((original[i1:i2], None))
                 case "delete":
-                    chunk = original[i1:i2]
-                    run = para.add_run(chunk)
-                    run.font.color.rgb = self.COLOR_DELETED
-                    run.font.highlight_color = WD_COLOR_INDEX.RED
+                    runs.append((original[i1:i2], "deleted"))
                 case "insert":
-                    chunk = corrected[j1:j2]
-                    run = para.add_run(chunk)
-                    run.font.color.rgb = self.COLOR_ADDED
-                    run.font.highlight_color = WD_COLOR_INDEX.BRIGHT_GREEN
+                    runs.append((corrected[j1:j2], "added"))
                 case "replace":
-                    del_chunk = original[i1:i2]
-                    ins_chunk = corrected[j1:j2]
-
-                    run = para.add_run(del_chunk)
-                    run.font.color.rgb = self.COLOR_DELETED
-                    run.font.highlight_color = WD_COLOR_INDEX.RED
+                    runs.append((original[i1:i2], "deleted"))
+                    runs.append((corrected[j1:j2], "added"))
+        return runs
 
-                    run = para.add_run(ins_chunk)
-                    run.font.color.rgb = self.COLOR_ADDED
-                    run.font.highlight_color = WD_COLOR_INDEX.BRIGHT_GREEN
+    @staticmethod
+    def _coalesce(runs: Iterable[Run]) -> Paragraph:
+        """Merge adjacent runs that share a style and drop empty ones."""
+        return [
+            ("".join(text for text, _ in group), style)
+            for style, group in groupby((run for run in runs if run[0]), key=itemgetter(1))
+        ]
 
     def _tokenize(self, text: str) -> list[str]:
         """
@@ -244,9 +345,3 @@ class DiffService:
         if current:
             tokens.append(current)
         return tokens if tokens else [text]
-
-    def _doc_to_base64(self, doc: Document) -> str:
-        buffer = BytesIO()
-        doc.save(buffer)
-        buffer.seek(0)
-        return base64.b64encode(buffer.read()).decode("utf-8")
@@ -0,0 +1,93 @@
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from app.models.requests import FactChange
+from app.services.diff_service import DiffService
+from app.services.docx_writer import Paragraph
+
+
+class SessionLimitError(Exception):
+    pass
+
+
+@dataclass
+class DiffSession:
+    """Chunks of one document, diffed as they arrive and joined on finalize."""
+
+    session_id: str
+    separator: str = "\n\n"
+    fact_changes: list[FactChange] = field(default_factory=list)
+    expires_at: float = 0.0
+    finalizing: bool = False  # documents are being written; chunks are refused meanwhile
+    # index -> (clean paragraphs, diff paragraphs) of that chunk
+    chunks: dict[int, tuple[list[Paragraph], list[Paragraph]]] = field(default_factory=dict)
+
+    def add(self, index: int, clean: list[Paragraph], diff: list[Paragraph]) -> None:
+        self.chunks[index] = (clean, diff)
+
+    def missing(self, total: int | None = None) -> list[int]:
+        """Chunk indices below ``total`` (or below the highest index seen) not submitted yet."""
+        if total is None:
+            total = max(self.chunks, default=-1) + 1
+        return [index for index in range(total) if index not in self.chunks]
+
+    def paragraphs(self) -> tuple[Iterator[Paragraph], Iterator[Paragraph]]:
+        """Clean and diff paragraphs of the whole document, chunks in index order."""
+        ordered = [self.chunks[index] for index in sorted(self.chunks)]
+        return (
+            DiffService.join_paragraphs((clean for clean, _ in ordered), self.separator),
+            DiffService.join_paragraphs((diff for _, diff in ordered), self.separator),
+        )
+
+
+class SessionStore:
+    """Open diff sessions, each expiring ``ttl_seconds`` after it was last used.
+
+    Used from the event loop only, so there is no locking.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float) -> None:
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: OrderedDict[str, DiffSession] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def open(
+        self, separator: str = "\n\n", fact_changes: list[FactChange] | None = None
+    ) -> DiffSession:
+        self._purge()
+        if len(self._sessions) >= self.max_sessions:
+            raise SessionLimitError(f"Too many open diff sessions (limit {self.max_sessions})")
+
+        session = DiffSession(uuid.uuid4().hex, separator, list(fact_changes or []))
+        self._sessions[session.session_id] = session
+        self._touch(session)
+        return session
+
+    def get(self, session_id: str) -> DiffSession | None:
+        self._purge()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._touch(session)
+        return session
+
+    def close(self, session_id: str) -> DiffSession | None:
+        return self._sessions.pop(session_id, None)
+
+    def _touch(self, session: DiffSession) -> None:
+        session.expires_at = time.monotonic() + self.ttl_seconds
+        self._sessions.move_to_end(session.session_id)
+
+    def _purge(self) -> None:
+        # Sessions are kept in order of last use, so expired ones are at the front
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.expires_at > now:
+                break
+            del self._sessions[session.session_id]
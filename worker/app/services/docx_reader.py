@@ -0,0 +1,128 @@
+"""Streaming text extraction from ``word/document.xml``."""
+
+import posixpath
+import zipfile
+from collections.abc import Iterator
+from typing import IO
+
+from lxml import etree
+
+from app.services.text_stream import Block
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+P, R, T, TAB, PTAB, BR, CR, NO_BREAK_HYPHEN = map(
+    _w, ("p", "r", "t", "tab", "ptab", "br", "cr", "noBreakHyphen")
+)
+TR, TC = map(_w, ("tr", "tc"))
+# Content that is not part of the visible body text: text boxes (python-docx skips them and
+# their VML fallback repeats them) and tracked deletions
+SKIPPED = tuple(map(_w, ("txbxContent", "del", "moveFrom")))
+
+RUN_CONTENT = (T, TAB, PTAB, BR, CR, NO_BREAK_HYPHEN)
+
+TAGS = (P, R, TR, TC, *RUN_CONTENT, *SKIPPED)
+
+
+def main_part_name(package: zipfile.ZipFile) -> str:
+    """Name of the main document part, from the package relationships."""
+    try:
+        rels = etree.fromstring(package.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels.iter(f"{{{RELS_NS}}}Relationship"):
+        if rel.get("Type") == OFFICE_DOCUMENT_REL:
+            return posixpath.normpath(rel.get("Target").lstrip("/"))
+    return "word/document.xml"
+
+
+def iter_docx_blocks(file: IO[bytes]) -> Iterator[Block]:
+    """Yield body paragraphs and table rows of a docx in document order.
+
+    The main part is read with ``iterparse``, and each body paragraph or table
+    row is freed once its text is out, so memory stays flat however long the
+    document is. A row is its cells' text joined by tabs, and a cell is its paragraphs
+    joined by newlines. A nested table becomes lines inside its outer cell.
+    Merged cells are stored once in the XML and are read once. Raises
+    ``zipfile.BadZipFile``, ``KeyError`` or ``etree.XMLSyntaxError`` on a
+    broken package.
+    """
+    with zipfile.ZipFile(file) as package, package.open(main_part_name(package)) as xml:
+        paragraph: list[str] = []
+        rows: list[list[str]] = []  # open table rows, innermost last
+        cells: list[list[str]] = []  # paragraphs of open cells, innermost last
+        runs = 0
+        skipped = 0
+
+        for event, element in etree.iterparse(xml, events=("start", "end"), tag=TAGS):
+            tag = element.tag
+            if tag in SKIPPED:
+                skipped += 1 if event == "start" else -1
+                continue
+            if skipped:
+                continue
+
+            if event == "start":
+                if tag == R:
+                    runs += 1
+                elif tag == P:
+                    paragraph = []
+                elif tag == TR:
+                    rows.append([])
+                elif tag == TC:
+                    cells.append([])
+                continue
+
+            if tag == R:
+                runs -= 1
+            elif tag in RUN_CONTENT:
+                if runs:  # a w:tab outside a run is a tab stop definition
+                    paragraph.append(_run_text(element))
+            elif tag == P:
+                text = "".join(paragraph)
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield "\n", text
+                    _free(element)
+            elif tag == TC:
+                rows[-1].append("\n".join(cells.pop()))
+            elif tag == TR:
+                text = "\t".join(rows.pop())
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield "\n", text
+                    _free(element)
+
+
+def _run_text(element: etree._Element) -> str:
+    """Text of a run content element, matching python-docx's ``Run.text``."""
+    tag = element.tag
+    if tag == T:
+        return element.text or ""
+    if tag in (TAB, PTAB):
+        return "\t"
+    if tag == BR:
+        return "\n" if element.get(_w("type"), "textWrapping") == "textWrapping" else ""
+    if tag == CR:
+        return "\n"
+    return "-"  # noBreakHyphen
+
+
+def _free(element: etree._Element) -> None:
+    """Drop an element that has been read, and the already-read siblings before it."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
@@ -0,0 +1,148 @@
+"""Docx template loaded once and reused for every generated document."""
+
+import copy
+import functools
+import zipfile
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Literal
+
+import docx
+from docx.document import Document as DocumentObject
+from lxml import etree
+
+RunStyle = Literal["added", "deleted", "fact"]
+
+
+@dataclass(frozen=True)
+class CharacterStyle:
+    style_id: str
+    color: str  # text color, hex RGB
+    fill: str  # background shading, hex RGB
+
+
+# Defined once per document as character styles and referenced by id from each run.
+# The background is shading, not highlight: Word treats highlight as direct formatting only.
+STYLES: dict[RunStyle, CharacterStyle] = {
+    "added": CharacterStyle("Added", color="005000", fill="00FF00"),  # dark green on green
+    "deleted": CharacterStyle("Deleted", color="000000", fill="FF0000"),  # black on red
+    "fact": CharacterStyle("Fact", color="000000", fill="FFFF00"),  # black on yellow
+}
+
+DEFAULT_TEMPLATE = Path(docx.__file__).parent / "templates" / "default.docx"
+DOCUMENT_PART = "word/document.xml"
+STYLES_PART = "word/styles.xml"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_BODY_MARKER = b"<!--body-->"
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+class DocxSkeleton:
+    """A template package split once into the parts every new document shares.
+
+    ``package`` is the template zip without ``word/document.xml``, and
+    ``document_head``/``document_tail`` are the bytes of that part around the
+    body content, so a document is a copy of ``package`` plus one streamed part.
+    The template body is emptied (its section properties are kept) and the diff
+    character styles are added to its styles.xml.
+    """
+
+    def __init__(self, template: bytes) -> None:
+        with zipfile.ZipFile(BytesIO(template)) as source:
+            names = source.namelist()
+            parts = {name: source.read(name) for name in names}
+        if DOCUMENT_PART not in parts or STYLES_PART not in parts:
+            raise ValueError(f"Docx template must contain {DOCUMENT_PART} and {STYLES_PART}")
+
+        # A .dotx template declares its main part as a template; documents made from it must not
+        parts[CONTENT_TYPES_PART] = parts[CONTENT_TYPES_PART].replace(
+            b"wordprocessingml.template.main+xml", b"wordprocessingml.document.main+xml"
+        )
+        parts[STYLES_PART] = _add_character_styles(parts[STYLES_PART])
+        self.document_head, self.document_tail = _split_body(parts[DOCUMENT_PART])
+
+        package = BytesIO()
+        with zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as target:
+            for name in names:
+                if name != DOCUMENT_PART:
+                    target.writestr(name, parts[name])
+        self.package = package.getvalue()
+
+        document = BytesIO(self.package)
+        with zipfile.ZipFile(document, "a", zipfile.ZIP_DEFLATED) as target:
+            target.writestr(DOCUMENT_PART, self.document_head + self.document_tail)
+        self._document = docx.Document(document)
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "DocxSkeleton":
+        """Load a template from ``path``, or python-docx's bundled default template."""
+        return cls(Path(path or DEFAULT_TEMPLATE).read_bytes())
+
+    def new_document(self) -> DocumentObject:
+        """Return an empty python-docx document; a deep copy, not a re-parse of the template."""
+        return copy.deepcopy(self._document)
+
+
+@functools.cache
+def default_skeleton() -> DocxSkeleton:
+    return DocxSkeleton.load()
+
+
+def _add_character_styles(styles_xml: bytes) -> bytes:
+    root = etree.fromstring(styles_xml)
+    style_ids = {style.get(_w("styleId")) for style in root.iter(_w("style"))}
+
+    base_id = next(
+        (
+            style.get(_w("styleId"))
+            for style in root.iter(_w("style"))
+            if style.get(_w("type")) == "character" and style.get(_w("default")) in ("1", "true")
+        ),
+        None,
+    )
+    if base_id is None:
+        base_id = "DefaultParagraphFont"
+        root.append(
+            etree.fromstring(
+                f'<w:style xmlns:w="{W_NS}" w:type="character" w:default="1" '
+                f'w:styleId="{base_id}"><w:name w:val="Default Paragraph Font"/>'
+                '<w:uiPriority w:val="1"/><w:semiHidden/><w:unhideWhenUsed/></w:style>'
+            )
+        )
+
+    for style in STYLES.values():
+        if style.style_id in style_ids:
+            continue
+        root.append(
+            etree.fromstring(
+                f'<w:style xmlns:w="{W_NS}" w:type="character" w:customStyle="1" '
+                f'w:styleId="{style.style_id}"><w:name w:val="{style.style_id}"/>'
+                f'<w:basedOn w:val="{base_id}"/><w:rPr><w:color w:val="{style.color}"/>'
+                f'<w:shd w:val="clear" w:color="auto" w:fill="{style.fill}"/></w:rPr></w:style>'
+            )
+        )
+
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def _split_body(document_xml: bytes) -> tuple[bytes, bytes]:
+    """Empty the template body, keeping its final sectPr, and split it where content goes."""
+    root = etree.fromstring(document_xml)
+    body = root.find(_w("body"))
+    if body is None:
+        raise ValueError(f"Docx template has no body in {DOCUMENT_PART}")
+
+    for child in list(body):
+        if child.tag != _w("sectPr"):
+            body.remove(child)
+    body.insert(0, etree.Comment(_BODY_MARKER[4:-3].decode()))
+
+    xml = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    head, tail = xml.split(_BODY_MARKER)
+    return head, tail
@@ -0,0 +1,109 @@
+import re
+import zipfile
+from collections.abc import Iterable
+from io import BytesIO
+from typing import Literal, Protocol
+
+from app.services.docx_skeleton import (
+    DOCUMENT_PART,
+    STYLES,
+    DocxSkeleton,
+    RunStyle,
+    default_skeleton,
+)
+
+Run = tuple[str, RunStyle | None]
+Paragraph = list[Run]
+WriterName = Literal["stream", "python-docx"]
+
+
+class DocxWriter(Protocol):
+    def write(self, paragraphs: Iterable[Paragraph]) -> bytes:
+        """Render paragraphs of styled runs into a docx file."""
+        ...
+
+
+class PythonDocxWriter:
+    """Builds the document through python-docx's object model."""
+
+    def __init__(self, skeleton: DocxSkeleton | None = None) -> None:
+        self.skeleton = skeleton or default_skeleton()
+
+    def write(self, paragraphs: Iterable[Paragraph]) -> bytes:
+        doc = self.skeleton.new_document()
+        for runs in paragraphs:
+            para = doc.add_paragraph()
+            for text, style in runs:
+                run = para.add_run(text)
+                if style is not None:
+                    # Set the style id on the element directly; add_run(style=...) looks the
+                    # style up by scanning styles.xml for every run.
+                    run._r.style = STYLES[style].style_id
+
+        buffer = BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+
+# Characters that are not allowed in XML 1.0 documents (and lone surrogates)
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+_BREAKS = re.compile(r"(\t|\r)")
+
+
+def _escape(text: str) -> str:
+    text = _INVALID_XML_CHARS.sub("", text)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class StreamingDocxWriter:
+    """Writes ``word/document.xml`` straight into the zip, one paragraph at a time.
+
+    No python-docx objects or XML tree are built; the other package parts are
+    copied from the skeleton as already-compressed zip entries. Tabs and carriage
+    returns become ``<w:tab/>`` and ``<w:br/>`` like python-docx's ``add_run`` does.
+    """
+
+    def __init__(self, skeleton: DocxSkeleton | None = None) -> None:
+        self.skeleton = skeleton or default_skeleton()
+        self._rpr = {
+            name: f'<w:rPr><w:rStyle w:val="{style.style_id}"/></w:rPr>'
+            for name, style in STYLES.items()
+        }
+
+    def write(self, paragraphs: Iterable[Paragraph]) -> bytes:
+        buffer = BytesIO(self.skeleton.package)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as package:
+            with package.open(DOCUMENT_PART, "w") as document:
+                document.write(self.skeleton.document_head)
+                for runs in paragraphs:
+                    document.write(self._paragraph_xml(runs).encode())
+                document.write(self.skeleton.document_tail)
+
+        return buffer.getvalue()
+
+    def _paragraph_xml(self, runs: Paragraph) -> str:
+        parts = ["<w:p>"]
+        for text, style in runs:
+            parts.append("<w:r>")
+            if style is not None:
+                parts.append(self._rpr[style])
+            for piece in _BREAKS.split(text):
+                if piece == "\t":
+                    parts.append("<w:tab/>")
+                elif piece == "\r":
+                    parts.append("<w:br/>")
+                elif piece:
+                    parts.append(f'<w:t xml:space="preserve">{_escape(piece)}</w:t>')
+            parts.append("</w:r>")
+        parts.append("</w:p>")
+        return "".join(parts)
+
+
+def create_writer(name: WriterName, skeleton: DocxSkeleton | None = None) -> DocxWriter:
+    match name:
+        case "stream":
+            return StreamingDocxWriter(skeleton)
+        case "python-docx":
+            return PythonDocxWriter(skeleton)
+        case _:
+            raise ValueError(f"Unknown docx writer: {name}")
@@ -0,0 +1,172 @@
+"""Encoding detection for plain-text uploads.
+
+The detector looks at a bounded sample instead of trial-decoding the whole
+file. It checks, in order:
+- byte order marks
+- BOM-less UTF-16, from where the zero and 0x04 high bytes fall
+- UTF-8 validity
+- otherwise it scores the single-byte Cyrillic code pages against Russian
+  letter frequencies
+
+The file is then decoded once with the chosen codec.
+"""
+
+import codecs
+import math
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+SAMPLE_SIZE = 64 * 1024
+CHUNK_SIZE = 1024 * 1024  # files above this are decoded incrementally, chunk by chunk
+
+# Longest first: the UTF-32 LE mark starts with the UTF-16 LE one
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# Tried in this order, so ties (text in lowercase letters shared by both) go to cp1251
+SINGLE_BYTE = ("cp1251", "koi8-r", "mac-cyrillic")
+
+# Letter frequencies of Russian prose, in percent
+LETTER_FREQUENCIES = {
+    "о": 10.97, "е": 8.45, "а": 8.01, "и": 7.35, "н": 6.70, "т": 6.26, "с": 5.47, "р": 4.73,
+    "в": 4.54, "л": 4.40, "к": 3.49, "м": 3.21, "д": 2.98, "п": 2.81, "у": 2.62, "я": 2.01,
+    "ы": 1.90, "ь": 1.74, "г": 1.70, "з": 1.65, "б": 1.59, "ч": 1.44, "й": 1.21, "х": 0.97,
+    "ж": 0.94, "ш": 0.73, "ю": 0.64, "ц": 0.48, "щ": 0.36, "э": 0.32, "ф": 0.26, "ъ": 0.04,
+    "ё": 0.04,
+}  # fmt: skip
+_LOG_FREQUENCY = {letter: math.log(share / 100) for letter, share in LETTER_FREQUENCIES.items()}
+# A letter whose case breaks its word's pattern (lowercase then capitals, or capitals then
+# lowercase past a word's first letter). Reading cp1251 as KOI8-R or the other way round swaps
+# the case of most letters, so mixed text turns into such words; all-capitals text doesn't
+_CASE_PENALTY = math.log(0.05)
+_OTHER = math.log(1e-5)  # a non-ASCII byte that decodes to something other than a letter
+_EVIDENCE_CAP = 20  # characters of evidence counted towards confidence
+_FULL_EVIDENCE = 32  # fewer characters than this scale the confidence down
+
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+_ASCII = bytes(range(0x80))
+
+
+@dataclass(frozen=True)
+class Detection:
+    encoding: str  # Python codec name
+    confidence: float  # 0..1
+    bom: int = 0  # length of the byte order mark to skip
+
+
+def detect(data: bytes, sample_size: int = SAMPLE_SIZE) -> Detection:
+    """Pick the encoding of ``data`` from at most ``sample_size`` bytes of it."""
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return Detection(encoding, 1.0, len(bom))
+
+    utf16 = _detect_utf16(data[:sample_size])
+    if utf16 is not None:
+        return utf16
+
+    # Sample from the first non-ASCII byte: an ASCII prefix says nothing about the rest
+    first = _NON_ASCII.search(data)
+    if first is None:
+        return Detection("utf-8", 1.0)
+    sample = data[first.start() : first.start() + sample_size]
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=len(sample) < sample_size)
+    except UnicodeDecodeError:
+        pass
+    else:
+        return Detection("utf-8", 0.99)  # multi-byte sequences rarely validate by chance
+
+    return _score_single_byte(sample)
+
+
+def decode(data: bytes, detection: Detection, chunk_size: int = CHUNK_SIZE) -> str:
+    """Decode ``data`` once with the detected encoding.
+
+    Large files go through an incremental decoder chunk by chunk, so no copy of
+    the bytes without their BOM is made. Bytes the codec can't map (UTF-8
+    errors outside the sample, cp1251's unused 0x98) become U+FFFD.
+    """
+    return "".join(iter_decode(data, detection, chunk_size))
+
+
+def iter_decode(data: bytes, detection: Detection, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    view = memoryview(data)[detection.bom :]
+    if len(view) <= chunk_size:
+        yield str(view, detection.encoding, "replace")
+        return
+
+    decoder = codecs.getincrementaldecoder(detection.encoding)("replace")
+    for start in range(0, len(view), chunk_size):
+        yield decoder.decode(view[start : start + chunk_size])
+    yield decoder.decode(b"", final=True)
+
+
+def _detect_utf16(sample: bytes) -> Detection | None:
+    """UTF-16 without a BOM: one byte of each pair is almost always 0x00 (ASCII) or 0x04
+    (Cyrillic), and the other almost never is."""
+    sample = sample[: len(sample) & ~1]
+    if len(sample) < 4:
+        return None
+
+    pairs = len(sample) // 2
+    even = (sample[0::2].count(0) + sample[0::2].count(4)) / pairs
+    odd = (sample[1::2].count(0) + sample[1::2].count(4)) / pairs
+    for encoding, high, low in (("utf-16-le", odd, even), ("utf-16-be", even, odd)):
+        if high > 0.9 and low < 0.5:
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(sample)
+            except UnicodeDecodeError:
+                continue
+            return Detection(encoding, round(high, 2))
+    return None
+
+
+def _score(text: str) -> float:
+    """Mean log-likelihood per non-ASCII character of ``text`` being Russian."""
+    total = 0.0
+    count = 0
+    upper = lower = 0  # letters of each case in the current word
+    for char in text:
+        if char < "\x80":
+            upper = lower = 0
+            continue
+        count += 1
+        score = _LOG_FREQUENCY.get(char.lower())
+        if score is None:
+            total += _OTHER
+            upper = lower = 0
+            continue
+        total += score
+        if char.isupper():
+            if lower:
+                total += _CASE_PENALTY
+            upper += 1
+        else:
+            if upper > 1:
+                total += _CASE_PENALTY
+            lower += 1
+    return total / count if count else _OTHER
+
+
+def _score_single_byte(sample: bytes) -> Detection:
+    scores = {encoding: _score(sample.decode(encoding, "replace")) for encoding in SINGLE_BYTE}
+    best = max(SINGLE_BYTE, key=scores.__getitem__)
+
+    # Softmax over the candidates, with the evidence of a short sample counting in full
+    # and a long one capped, so the confidence reflects per-character plausibility
+    chars = len(sample.translate(None, _ASCII))
+    evidence = min(chars, _EVIDENCE_CAP)
+    weights = {e: math.exp((s - scores[best]) * evidence) for e, s in scores.items()}
+    confidence = weights[best] / sum(weights.values())
+    # A short sample can read as Russian in more than one code page
+    confidence *= min(1.0, chars / _FULL_EVIDENCE)
+    # Text with few letters (symbols, another script) is a guess whatever the margin
+    confidence *= min(1.0, math.exp(scores[best] - math.log(0.01)))
+    return Detection(best, round(min(confidence, 0.99), 2))
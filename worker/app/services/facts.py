@@ -0,0 +1,194 @@
+import re
+from bisect import bisect_right
+from collections import deque
+from collections.abc import Iterable
+
+Span = tuple[int, int]  # [start, end) character offsets
+
+# Whitespace that normalizing changes: runs, and single characters other than a space
+_WHITESPACE = re.compile(r"\s{2,}|[^\S ]")
+
+
+def normalize(phrase: str) -> str:
+    """Casefolded ``phrase`` with whitespace runs collapsed to single spaces."""
+    return " ".join(phrase.casefold().split())
+
+
+class FactMatcher:
+    """Finds fact phrases in text with an Aho–Corasick automaton, in one pass per text.
+
+    Phrases and text are compared casefolded, with any run of whitespace equal
+    to a single space, so "Дональд  Трамп" in a document matches the fact
+    "дональд трамп". A match must start at a word boundary. It must also end at
+    one unless the phrase ends in a letter, so "Трамп" still finds "Трампа" but
+    "2019" doesn't find "20190". Building is linear in the phrases' total length
+    and scanning in the text's, however many phrases there are.
+
+    While no match is in progress the scan jumps, with one regex search, to the
+    next word start whose character begins some phrase, so most of a paragraph
+    never goes through the Python loop.
+    """
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        # Per state: (length, ends in a letter) of each phrase ending there, suffixes included
+        self._outputs: list[list[tuple[int, bool]]] = [[]]
+        for phrase in {normalize(phrase) for phrase in phrases}:
+            if phrase:
+                self._add(phrase)
+        self._fail = self._link()
+        # Where a match can start: not after a letter or digit, at a phrase's first character
+        firsts = "".join(sorted(self._goto[0]))
+        self._starts = re.compile(rf"(?<![^\W_])[{re.escape(firsts)}]") if firsts else None
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+    def _add(self, phrase: str) -> None:
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(phrase), phrase[-1].isalpha()))
+
+    def _link(self) -> list[int]:
+        """Failure links, breadth first, merging each state's outputs with its link's."""
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                link = fail[state]
+                while link and char not in self._goto[link]:
+                    link = fail[link]
+                fail[child] = self._goto[link].get(char, 0) if state else 0
+                self._outputs[child] += self._outputs[fail[child]]
+                queue.append(child)
+        return fail
+
+    def find(self, text: str) -> list[Span]:
+        """Sorted, non-overlapping spans of ``text`` covered by a fact phrase."""
+        if not self:
+            return []
+
+        goto, fail, outputs, starts = self._goto, self._fail, self._outputs, self._starts
+        normalized, offsets = _normalize_with_offsets(text)
+        spans: list[Span] = []
+        state = 0
+        position = -1
+        while True:
+            position += 1
+            if not state:
+                start = starts.search(normalized, position)
+                if start is None:
+                    break
+                position = start.start()
+            elif position == len(normalized):
+                break
+            char = normalized[position]
+            next_state = goto[state].get(char)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto[state].get(char)
+            state = next_state or 0
+            for length, ends_in_letter in outputs[state]:
+                start = offsets.original(position - length + 1)
+                end = offsets.original(position) + 1
+                if start and text[start - 1].isalnum():
+                    continue
+                if not ends_in_letter and end < len(text) and text[end].isalnum():
+                    continue
+                spans.append((start, end))
+        return _merge(spans)
+
+
+class _Offsets:
+    """Maps positions in a normalized text back to the text it was made from.
+
+    Only the positions where the shift between the two changes are stored, so
+    text with single spaces and no expanding case folds needs no entries.
+    ``inner`` maps on from there when the text was itself normalized.
+    """
+
+    def __init__(self, inner: "_Offsets | None" = None) -> None:
+        self.inner = inner
+        self.positions: list[int] = []  # from this position on...
+        self.shifts: list[int] = []  # ...add this to get the source one
+        self._shift = 0
+
+    def add(self, position: int, shift: int) -> None:
+        if shift != self._shift:
+            self.positions.append(position)
+            self.shifts.append(shift)
+            self._shift = shift
+
+    def original(self, position: int) -> int:
+        index = bisect_right(self.positions, position) - 1
+        if index >= 0:
+            position += self.shifts[index]
+        return self.inner.original(position) if self.inner else position
+
+
+def _normalize_with_offsets(text: str) -> tuple[str, _Offsets]:
+    folding = None
+    folded = text.casefold()
+    if len(folded) != len(text):
+        # Some character folds to several ("ß" to "ss"): map each of them back to it
+        folding = _Offsets()
+        pieces = []
+        for index, char in enumerate(text):
+            piece = char.casefold()
+            for extra in range(len(piece)):
+                folding.add(len(pieces) + extra, index - len(pieces) - extra)
+            pieces += piece
+        folded = "".join(pieces)
+
+    # Whitespace other than a space is unprintable, so this skips the regex for most text
+    if "  " not in folded and folded.isprintable():
+        return folded, folding or _Offsets()
+
+    # Whitespace runs become single spaces, shifting what follows by the run's extra length
+    spacing = _Offsets(folding)
+    pieces = []
+    removed = 0
+    last = 0
+    for match in _WHITESPACE.finditer(folded):
+        start, end = match.span()
+        pieces += (folded[last:start], " ")
+        last = end
+        if end - start > 1:
+            removed += end - start - 1
+            spacing.add(end - removed, removed)
+    pieces.append(folded[last:])
+    return "".join(pieces), spacing
+
+
+def _merge(spans: list[Span]) -> list[Span]:
+    merged: list[Span] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def overlapping(tokens: list[str], spans: list[Span]) -> list[bool]:
+    """For each of the consecutive ``tokens``, whether it overlaps one of ``spans``."""
+    if not spans:
+        return [False] * len(tokens)
+    flags = []
+    position = 0
+    span = 0
+    for token in tokens:
+        end = position + len(token)
+        while span < len(spans) and spans[span][1] <= position:
+            span += 1
+        flags.append(span < len(spans) and spans[span][0] < end)
+        position = end
+    return flags
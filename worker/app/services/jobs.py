@@ -0,0 +1,339 @@
+"""Asynchronous jobs: a request is queued and answered with a job id at once.
+
+Clients poll the job's status and fetch its result, which is kept for
+``ttl_seconds`` after the job finishes. A dropped connection then no longer
+throws away a long parse or render. ``concurrency`` consumer tasks per process
+take jobs from the queue and run them with ``handler``.
+
+``MemoryJobQueue`` keeps jobs in this process. ``RedisJobQueue`` keeps them in
+Redis, so replicas behind one address share a queue and any of them can answer
+for any job.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+JobKind = Literal["parse", "generate"]
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str  # JobKind
+    params: dict[str, Any]  # JSON-serializable arguments
+    data: bytes = b""  # uploaded file of a parse job, dropped once it has run
+    status: str = "queued"  # JobStatus
+    error: str | None = None
+    result: dict[str, bytes] | None = None  # named parts, once done
+    expires_at: float | None = None  # time.time() when a finished job is dropped
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+Handler = Callable[[Job], Awaitable[dict[str, bytes]]]
+
+
+class JobQueue(ABC):
+    """Runs queued jobs with ``handler`` on ``concurrency`` consumer tasks.
+
+    Backends implement storage; a handler's exception fails the job with its
+    message. Consumers start with the first submitted job, or with ``start``.
+    """
+
+    def __init__(
+        self, handler: Handler, concurrency: int, queue_size: int, ttl_seconds: float
+    ) -> None:
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.ttl_seconds = ttl_seconds
+        self.running = 0
+        self._consumers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if not self._consumers:
+            self._consumers = [
+                asyncio.create_task(self._consume()) for _ in range(self.concurrency)
+            ]
+
+    async def stop(self) -> None:
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+    async def submit(self, kind: str, params: dict[str, Any], data: bytes = b"") -> Job:
+        """Queue a job. Raises JobQueueFullError when ``queue_size`` jobs are waiting."""
+        job = Job(uuid.uuid4().hex, kind, params, data)
+        await self._push(job)
+        self.start()
+        return job
+
+    @abstractmethod
+    async def get(self, job_id: str, with_result: bool = False) -> Job | None:
+        """The job, None if unknown or expired. Its result may be left out unless
+        ``with_result``."""
+
+    @abstractmethod
+    async def delete(self, job_id: str) -> bool:
+        """Drop a job; False if it was unknown. A running job still runs."""
+
+    @abstractmethod
+    async def _push(self, job: Job) -> None:
+        """Store and queue a new job, or raise JobQueueFullError."""
+
+    @abstractmethod
+    async def _next(self) -> Job:
+        """Wait for the next queued job and mark it running."""
+
+    @abstractmethod
+    async def _finish(self, job: Job) -> None:
+        """Store a finished job's status and result, unless it was deleted meanwhile."""
+
+    async def _abandon(self, job: Job) -> None:
+        """Called when a consumer is stopped while it runs ``job``."""
+
+    async def _consume(self) -> None:
+        while True:
+            job = await self._next()
+            self.running += 1
+            try:
+                job.result = await self.handler(job)
+                job.status = "done"
+            except asyncio.CancelledError:
+                await self._abandon(job)
+                raise
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e) or type(e).__name__
+            finally:
+                self.running -= 1
+            job.data = b""
+            job.expires_at = time.time() + self.ttl_seconds
+            await self._finish(job)
+
+
+class MemoryJobQueue(JobQueue):
+    """Jobs in this process's memory. They are lost when it exits.
+
+    Used from the event loop only, so there is no locking.
+    """
+
+    def __init__(
+        self, handler: Handler, concurrency: int, queue_size: int, ttl_seconds: float
+    ) -> None:
+        super().__init__(handler, concurrency, queue_size, ttl_seconds)
+        self._jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self._finished: OrderedDict[str, float] = OrderedDict()  # job id -> expiry, in order
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    async def get(self, job_id: str, with_result: bool = False) -> Job | None:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    async def delete(self, job_id: str) -> bool:
+        # A queued job's id stays in the queue; the consumer skips it
+        self._finished.pop(job_id, None)
+        return self._jobs.pop(job_id, None) is not None
+
+    async def _push(self, job: Job) -> None:
+        self._purge()
+        try:
+            self._queue.put_nowait(job.job_id)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Job queue is full (limit {self.queue_size})") from None
+        self._jobs[job.job_id] = job
+
+    async def _next(self) -> Job:
+        while True:
+            job = self._jobs.get(await self._queue.get())
+            if job is not None:
+                job.status = "running"
+                return job
+
+    async def _finish(self, job: Job) -> None:
+        if job.job_id in self._jobs:
+            self._finished[job.job_id] = job.expires_at
+
+    def _purge(self) -> None:
+        # Finished jobs all live ttl_seconds, so the earliest to expire are at the front
+        now = time.time()
+        while self._finished:
+            job_id, expires_at = next(iter(self._finished.items()))
+            if expires_at > now:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+
+# Queues a job unless the queue is full, atomically so replicas can't both take the last place.
+# KEYS: queue list, job hash. ARGV: queue size, ttl seconds, job id, then hash field/value pairs.
+_PUSH_SCRIPT = """
+if redis.call("LLEN", KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("HSET", KEYS[2], unpack(ARGV, 4))
+redis.call("EXPIRE", KEYS[2], ARGV[2])
+redis.call("LPUSH", KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class RedisJobQueue(JobQueue):
+    """Jobs in Redis, shared by every worker replica using the same ``url`` and ``prefix``.
+
+    Each job is a hash that expires ``ttl_seconds`` after it is submitted, and
+    again after it finishes. Queued ids wait in a list. A replica that shuts
+    down puts its running jobs back at the head of the queue. One that crashes
+    loses them; they stay "running" until they expire.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        url: str,
+        concurrency: int,
+        queue_size: int,
+        ttl_seconds: float,
+        prefix: str = "worker:jobs:",
+    ) -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "JOB_BACKEND=redis needs the redis package: pip install 'red-pen-worker[redis]'"
+            ) from e
+
+        super().__init__(handler, concurrency, queue_size, ttl_seconds)
+        self._redis = redis.from_url(url)
+        self._push_script = self._redis.register_script(_PUSH_SCRIPT)
+        self._queue_key = f"{prefix}queue"
+        self._prefix = prefix
+
+    def _key(self, job_id: str) -> str:
+        return f"{self._prefix}{job_id}"
+
+    async def stop(self) -> None:
+        await super().stop()
+        await self._redis.aclose()
+
+    async def get(self, job_id: str, with_result: bool = False) -> Job | None:
+        if with_result:
+            fields = await self._redis.hgetall(self._key(job_id))
+            fields.pop(b"data", None)
+        else:
+            # Status polls leave the upload and the result documents in Redis
+            names = (b"kind", b"params", b"status", b"error", b"expires_at")
+            values = await self._redis.hmget(self._key(job_id), names)
+            fields = {name: value for name, value in zip(names, values) if value is not None}
+        if not fields:
+            return None
+        return _job_from_hash(job_id, fields)
+
+    async def delete(self, job_id: str) -> bool:
+        return bool(await self._redis.delete(self._key(job_id)))
+
+    async def _push(self, job: Job) -> None:
+        fields = [part for field in _job_to_hash(job).items() for part in field]
+        queued = await self._push_script(
+            keys=[self._queue_key, self._key(job.job_id)],
+            args=[self.queue_size, int(self.ttl_seconds), job.job_id, *fields],
+        )
+        if not queued:
+            raise JobQueueFullError(f"Job queue is full (limit {self.queue_size})")
+
+    async def _next(self) -> Job:
+        while True:
+            _, job_id = await self._redis.brpop([self._queue_key], timeout=0)
+            job_id = job_id.decode()
+            fields = await self._redis.hgetall(self._key(job_id))
+            if not fields:
+                continue  # deleted or expired while queued
+            await self._redis.hset(self._key(job_id), "status", "running")
+            job = _job_from_hash(job_id, fields)
+            job.status = "running"
+            return job
+
+    async def _finish(self, job: Job) -> None:
+        key = self._key(job.job_id)
+        if not await self._redis.exists(key):
+            return  # deleted while running
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(key, "data")
+            pipe.hset(key, mapping=_job_to_hash(job))
+            pipe.expire(key, int(self.ttl_seconds))
+            await pipe.execute()
+
+    async def _abandon(self, job: Job) -> None:
+        job.status = "queued"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job.job_id), "status", "queued")
+            pipe.rpush(self._queue_key, job.job_id)
+            await pipe.execute()
+
+
+def _job_to_hash(job: Job) -> dict[str, str | bytes]:
+    fields: dict[str, str | bytes] = {
+        "kind": job.kind,
+        "params": json.dumps(job.params),
+        "status": job.status,
+    }
+    if job.data:
+        fields["data"] = job.data
+    if job.error is not None:
+        fields["error"] = job.error
+    if job.expires_at is not None:
+        fields["expires_at"] = repr(job.expires_at)
+    for name, part in (job.result or {}).items():
+        fields[f"result:{name}"] = part
+    return fields
+
+
+def _job_from_hash(job_id: str, fields: dict[bytes, bytes]) -> Job:
+    result = {
+        name.decode().removeprefix("result:"): value
+        for name, value in fields.items()
+        if name.startswith(b"result:")
+    }
+    return Job(
+        job_id,
+        fields[b"kind"].decode(),
+        json.loads(fields[b"params"]),
+        fields.get(b"data", b""),
+        fields[b"status"].decode(),
+        fields[b"error"].decode() if b"error" in fields else None,
+        result or None,
+        float(fields[b"expires_at"]) if b"expires_at" in fields else None,
+    )
+
+
+def create_job_queue(
+    backend: str,
+    handler: Handler,
+    concurrency: int,
+    queue_size: int,
+    ttl_seconds: float,
+    redis_url: str | None = None,
+) -> JobQueue:
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("JOB_BACKEND=redis needs JOB_REDIS_URL")
+        return RedisJobQueue(handler, redis_url, concurrency, queue_size, ttl_seconds)
+    return MemoryJobQueue(handler, concurrency, queue_size, ttl_seconds)
@@ -1,10 +1,27 @@
 import base64
 import binascii
+import hashlib
+import zipfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from io import BytesIO
+from typing import Literal
 
 from docx import Document
+from lxml import etree
 from pypdf import PdfReader
 
+from app.services.cache import ResultCache
+from app.services.docx_reader import iter_docx_blocks
+from app.services.encoding import decode, detect
+from app.services.pdf_pages import PageReport, extract_pages, iter_pages
+from app.services.text_stream import Block, join_blocks
+
+# Bump when the cached value shape changes, so entries spilled to disk by older versions miss
+CACHE_VERSION = 3
+
+DocxEngine = Literal["iterparse", "python-docx"]
+
 
 class ParserError(Exception):
     pass
@@ -22,17 +39,60 @@ class UnsupportedFormatError(ParserError):
     pass
 
 
+@dataclass
+class ParseResult:
+    text: str
+    pages: list[PageReport] | None = None  # PDF only
+    encoding: str | None = None  # detected encoding, plain text only
+    encoding_confidence: float | None = None
+
+
 class ParserService:
+    def __init__(
+        self,
+        cache: ResultCache | None = None,
+        page_timeout: float = 0,
+        docx_engine: DocxEngine = "iterparse",
+    ) -> None:
+        if docx_engine not in ("iterparse", "python-docx"):
+            raise ValueError(f"Unknown docx engine: {docx_engine}")
+        self.cache = cache
+        self.page_timeout = page_timeout  # seconds per PDF page, 0 = unlimited
+        self.docx_engine = docx_engine
+
     def parse(self, file_content: str, file_type: str) -> str:
         """Parse document and extract text."""
+        return self.parse_bytes(self.decode(file_content), file_type)
+
+    def decode(self, file_content: str) -> bytes:
+        """Decode base64 file content."""
         if not file_content:
             raise EmptyFileError("File content is empty")
 
         try:
-            data = base64.b64decode(file_content)
+            return base64.b64decode(file_content)
         except binascii.Error as e:
             raise CorruptedFileError(f"Invalid base64 encoding: {e}")
 
+    def parse_bytes(self, data: bytes, file_type: str) -> str:
+        """Parse raw (already decoded) file content, using the cache when configured."""
+        if self.cache is None:
+            return self.extract(data, file_type).text
+
+        key = self.cache_key(data, file_type)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.extract(data, file_type)
+            self.cache.put(key, result)
+        return result.text
+
+    @staticmethod
+    def cache_key(data: bytes, file_type: str) -> str:
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        return f"v{CACHE_VERSION}:{file_type.lower()}:{digest}"
+
+    def extract(self, data: bytes, file_type: str) -> ParseResult:
+        """Extract text from raw file content."""
         if not data:
             raise EmptyFileError("File is empty")
 
@@ -40,7 +100,7 @@ class ParserService:
 
         match file_type.lower():
             case "docx":
-                return self._parse_docx(buffer)
+                return ParseResult(self._parse_docx(buffer))
             case "pdf":
                 return self._parse_pdf(buffer)
             case "txt" | "md":
@@ -52,31 +112,94 @@ class ParserService:
             case _:
                 raise UnsupportedFormatError(f"Unsupported file type: {file_type}")
 
+    def iter_blocks(self, data: bytes, file_type: str) -> Iterator[Block]:
+        """Yield the document text as (separator, text) blocks in reading order.
+
+        ``join_blocks`` of the blocks is the text ``extract`` returns: DOCX yields
+        paragraphs and then table rows, PDF yields pages with text, plain text
+        yields lines.
+        """
+        if not data:
+            raise EmptyFileError("File is empty")
+
+        match file_type.lower():
+            case "docx":
+                yield from self._docx_blocks(BytesIO(data))
+            case "pdf":
+                yield from self._pdf_blocks(BytesIO(data))
+            case "txt" | "md":
+                for line in self._parse_text(data).text.split("\n"):
+                    yield "\n", line
+            case "doc":
+                raise UnsupportedFormatError(
+                    "Legacy .doc format not supported. Please convert to .docx"
+                )
+            case _:
+                raise UnsupportedFormatError(f"Unsupported file type: {file_type}")
+
     def _parse_docx(self, buffer: BytesIO) -> str:
+        return join_blocks(self._docx_blocks(buffer))
+
+    def _docx_blocks(self, buffer: BytesIO) -> Iterator[Block]:
+        if self.docx_engine == "python-docx":
+            blocks = self._python_docx_blocks(buffer)
+        else:
+            blocks = self._iterparse_docx_blocks(buffer)
+
+        has_text = False
+        for separator, text in blocks:
+            has_text = has_text or bool(text.strip())
+            yield separator, text
+
+        if not has_text:
+            raise EmptyFileError("File is empty")
+
+    def _iterparse_docx_blocks(self, buffer: BytesIO) -> Iterator[Block]:
+        """Paragraphs and table rows in body order, streamed from the XML."""
+        try:
+            yield from iter_docx_blocks(buffer)
+        except (zipfile.BadZipFile, KeyError, etree.XMLSyntaxError) as e:
+            raise CorruptedFileError(f"Cannot parse DOCX file: {e}")
+
+    def _python_docx_blocks(self, buffer: BytesIO) -> Iterator[Block]:
+        """All body paragraphs, then all table rows, through python-docx's object model."""
         try:
             doc = Document(buffer)
         except Exception as e:
             raise CorruptedFileError(f"Cannot parse DOCX file: {e}")
 
-        paragraphs = [p.text for p in doc.paragraphs]
+        for paragraph in doc.paragraphs:
+            yield "\n", paragraph.text
 
-        tables_text = []
+        separator = "\n\n"  # tables follow the paragraphs after a blank line
         for table in doc.tables:
             for row in table.rows:
-                cells = [cell.text for cell in row.cells]
-                tables_text.append("\t".join(cells))
-
-        all_text = "\n".join(paragraphs)
-        if tables_text:
-            all_text += "\n\n" + "\n".join(tables_text)
-
-        text = all_text.strip()
-        if not text:
-            raise EmptyFileError("File is empty")
+                yield separator, "\t".join(cell.text for cell in row.cells)
+                separator = "\n"
+
+    def pdf_page_count(self, data: bytes) -> int:
+        return len(self._open_pdf(BytesIO(data)).pages)
+
+    def extract_pdf_pages(self, data: bytes, start: int, stop: int) -> list[tuple[str, PageReport]]:
+        """Extract pages ``start:stop`` of a PDF; lets callers spread one file over processes."""
+        return extract_pages(self._open_pdf(BytesIO(data)), start, stop, self.page_timeout)
+
+    @staticmethod
+    def join_pdf_pages(pages: Iterable[tuple[str, PageReport]]) -> ParseResult:
+        texts = []
+        reports = []
+        for text, report in pages:
+            if text:
+                texts.append(text)
+            reports.append(report)
+
+        result = "\n".join(texts).strip()
+        if not result:
+            raise EmptyFileError("Could not extract text from PDF")
 
-        return text
+        return ParseResult(result, reports)
 
-    def _parse_pdf(self, buffer: BytesIO) -> str:
+    def _open_pdf(self, buffer: BytesIO) -> PdfReader:
         try:
             reader = PdfReader(buffer)
         except Exception as e:
@@ -85,30 +208,28 @@ class ParserService:
         if len(reader.pages) == 0:
             raise EmptyFileError("PDF file has no pages")
 
-        text_parts = []
-        for page in reader.pages:
-            try:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
-            except Exception:
-                continue
+        return reader
 
-        result = "\n".join(text_parts).strip()
-        if not result:
-            raise EmptyFileError("Could not extract text from PDF")
-
-        return result
+    def _pdf_blocks(self, buffer: BytesIO) -> Iterator[Block]:
+        reader = self._open_pdf(buffer)
+        has_text = False
+        for text, _ in iter_pages(reader, 0, len(reader.pages), self.page_timeout):
+            if text:
+                has_text = has_text or bool(text.strip())
+                yield "\n", text
 
-    def _parse_text(self, data: bytes) -> str:
-        encodings = ["utf-8", "cp1251", "latin-1"]
+        if not has_text:
+            raise EmptyFileError("Could not extract text from PDF")
 
-        for encoding in encodings:
-            try:
-                text = data.decode(encoding).strip()
-                if text:
-                    return text
-            except (UnicodeDecodeError, LookupError):
-                continue
+    def _parse_pdf(self, buffer: BytesIO) -> ParseResult:
+        reader = self._open_pdf(buffer)
+        return self.join_pdf_pages(extract_pages(reader, 0, len(reader.pages), self.page_timeout))
 
-        raise CorruptedFileError("Cannot decode text file. Unsupported encoding")
+    def _parse_text(self, data: bytes) -> ParseResult:
+        detection = detect(data)
+        text = decode(data, detection).strip()
+        if not text:
+            raise CorruptedFileError("Cannot decode text file. Unsupported encoding")
+        return ParseResult(
+            text, encoding=detection.encoding, encoding_confidence=detection.confidence
+        )
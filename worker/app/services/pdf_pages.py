@@ -0,0 +1,88 @@
+import signal
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from pypdf import PdfReader
+
+
+@dataclass
+class PageReport:
+    index: int  # zero-based page number
+    seconds: float
+    chars: int
+    error: str | None = None  # set when the page was skipped
+
+
+class PageTimeoutError(BaseException):
+    """Raised by SIGALRM inside ``extract_text``.
+
+    Derives from BaseException so the ``except Exception`` blocks inside pypdf
+    don't swallow it.
+    """
+
+
+@contextmanager
+def _time_budget(seconds: float) -> Iterator[None]:
+    """Interrupt the block with PageTimeoutError after ``seconds``.
+
+    Signals only reach the main thread, so elsewhere the budget is not enforced.
+    """
+    if (
+        seconds <= 0
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise PageTimeoutError
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def iter_pages(
+    reader: PdfReader, start: int, stop: int, timeout: float = 0
+) -> Iterator[tuple[str, PageReport]]:
+    """Extract text from pages ``start:stop``, giving each page ``timeout`` seconds.
+
+    Pages that fail or run out of time yield empty text and a report with the error.
+    """
+    for index in range(start, stop):
+        started = time.perf_counter()
+        text = ""
+        error = None
+        try:
+            with _time_budget(timeout):
+                text = reader.pages[index].extract_text() or ""
+        except PageTimeoutError:
+            error = f"Timed out after {timeout:g}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - started
+        yield text, PageReport(index, round(seconds, 4), len(text), error)
+
+
+def extract_pages(
+    reader: PdfReader, start: int, stop: int, timeout: float = 0
+) -> list[tuple[str, PageReport]]:
+    return list(iter_pages(reader, start, stop, timeout))
+
+
+def split_pages(count: int, workers: int, pages_per_task: int) -> list[tuple[int, int]]:
+    """Split ``count`` pages into at most ``workers`` contiguous (start, stop) ranges.
+
+    Each range gets at least ``pages_per_task`` pages, so short documents stay one task.
+    """
+    tasks = max(1, min(workers, -(-count // max(1, pages_per_task))))
+    size = max(1, -(-count // tasks))
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
@@ -0,0 +1,66 @@
+"""Entry points executed inside the worker process pool.
+
+Each pool process keeps its own service instances, so only the call arguments
+and the result cross the process boundary.
+"""
+
+from collections.abc import Iterator
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.executor import SharedBytes
+from app.models.requests import FactChange
+from app.services.diff_engine import create_engine
+from app.services.diff_service import DiffService
+from app.services.docx_skeleton import DocxSkeleton
+from app.services.docx_writer import Paragraph, create_writer
+from app.services.parser_service import ParseResult, ParserService
+from app.services.pdf_pages import PageReport
+from app.services.text_stream import Block
+
+_parser_service = ParserService(
+    page_timeout=settings.pdf_page_timeout_seconds,
+    docx_engine=settings.docx_engine,
+)
+_diff_service = DiffService(
+    engine=create_engine(settings.diff_engine),
+    writer=create_writer(settings.docx_writer, DocxSkeleton.load(settings.docx_template_path)),
+)
+
+
+def parse_bytes(data: bytes, file_type: str) -> ParseResult:
+    with metrics.timed(metrics.PARSE_STAGE_SECONDS, stage="extract", file_type=file_type.lower()):
+        return _parser_service.extract(data, file_type)
+
+
+def iter_blocks(data: bytes, file_type: str) -> Iterator[Block]:
+    with metrics.timed(metrics.PARSE_STAGE_SECONDS, stage="extract", file_type=file_type.lower()):
+        yield from _parser_service.iter_blocks(data, file_type)
+
+
+def pdf_page_count(source: SharedBytes) -> int:
+    return _parser_service.pdf_page_count(source.read())
+
+
+def extract_pdf_pages(source: SharedBytes, start: int, stop: int) -> list[tuple[str, PageReport]]:
+    return _parser_service.extract_pdf_pages(source.read(), start, stop)
+
+
+def generate_documents(
+    original: str,
+    corrected: str,
+    fact_changes: list[FactChange] | None = None,
+) -> tuple[bytes, bytes]:
+    return _diff_service.render(original, corrected, fact_changes)
+
+
+def diff_chunk(
+    original: str,
+    corrected: str,
+    fact_changes: list[FactChange] | None = None,
+) -> tuple[list[Paragraph], list[Paragraph]]:
+    return _diff_service.diff_runs(original, corrected, fact_changes)
+
+
+def write_documents(clean: list[Paragraph], diff: list[Paragraph]) -> tuple[bytes, bytes]:
+    return _diff_service.write(clean, diff)
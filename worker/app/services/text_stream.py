@@ -0,0 +1,69 @@
+from collections.abc import Iterable
+from typing import Any
+
+Block = tuple[str, str]  # (separator placed before the block, block text)
+
+
+def join_blocks(blocks: Iterable[Block]) -> str:
+    """Join blocks the way ``/parse`` returns them: separators between blocks, stripped."""
+    parts = []
+    for separator, text in blocks:
+        if parts:
+            parts.append(separator)
+        parts.append(text)
+    return "".join(parts).strip()
+
+
+class TextStream:
+    """Turns (separator, text) blocks into records with offsets, as the blocks arrive.
+
+    Offsets index into ``join_blocks`` of the same blocks, so a client can
+    rebuild the ``/parse`` text as the concatenation of each record's
+    ``separator`` and ``text``. Leading whitespace is dropped as it comes. The
+    last block with text is held back until the next one arrives, because only
+    the end of the stream shows whether its trailing whitespace gets stripped.
+    Whitespace-only blocks produce no record of their own; they go into the
+    next record's ``separator``.
+    """
+
+    def __init__(self) -> None:
+        self.length = 0  # characters emitted so far
+        self.count = 0  # records emitted so far
+        self._held: Block | None = None
+        self._gap = ""
+
+    def push(self, separator: str, text: str) -> list[dict[str, Any]]:
+        if not text.strip():
+            if self._held is not None:
+                self._gap += separator + text
+            return []
+
+        if self._held is None:
+            self._held = ("", text.lstrip())
+            return []
+
+        record = self._record(*self._held)
+        self._held = (self._gap + separator, text)
+        self._gap = ""
+        return [record]
+
+    def finish(self) -> list[dict[str, Any]]:
+        if self._held is None:
+            return []
+        separator, text = self._held
+        self._held = None
+        self._gap = ""
+        return [self._record(separator, text.rstrip())]
+
+    def _record(self, separator: str, text: str) -> dict[str, Any]:
+        start = self.length + len(separator)
+        record = {
+            "index": self.count,
+            "start": start,
+            "end": start + len(text),
+            "separator": separator,
+            "text": text,
+        }
+        self.length = record["end"]
+        self.count += 1
+        return record
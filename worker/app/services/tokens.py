@@ -0,0 +1,31 @@
+import sys
+from array import array
+from collections.abc import Iterable
+
+_UTF32 = "utf-32-le" if sys.byteorder == "little" else "utf-32-be"
+
+
+class TokenTable:
+    """Per-request interning table that maps each distinct token to a compact int id.
+
+    Diff engines then compare machine-sized ints in ``array('I')`` buffers instead of
+    Unicode objects; callers keep the original token lists to emit text.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def encode(self, tokens: Iterable[str]) -> array:
+        ids = self._ids
+        setdefault = ids.setdefault
+        return array("I", [setdefault(token, len(ids)) for token in tokens])
+
+
+def encode_chars(text: str) -> array:
+    """Code points of ``text`` as an ``array('I')``, built without per-character objects."""
+    codes = array("I")
+    codes.frombytes(text.encode(_UTF32))
+    return codes
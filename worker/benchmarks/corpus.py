@@ -0,0 +1,253 @@
+"""Deterministic synthetic Russian corpora for the benchmarks.
+
+Everything is generated from a seed, so a given (pages, seed) always produces
+the same documents and the same edits, and results stay comparable across runs.
+"""
+
+import random
+import re
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Literal
+
+from docx import Document
+from pypdf import PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+)
+
+EditKind = Literal["punctuation", "rewrite", "facts", "moves"]
+EDIT_KINDS: tuple[EditKind, ...] = ("punctuation", "rewrite", "facts", "moves")
+
+PAGE_CHARS = 1800  # roughly one printed page of Russian prose
+PDF_LINE_CHARS = 90
+
+WORDS = (
+    "документ проект отчёт система решение вопрос работа время задача процесс развитие "
+    "результат компания рынок клиент договор условие срок качество анализ данные модель "
+    "управление изменение подход уровень оценка план стратегия бюджет команда руководитель "
+    "сотрудник специалист отдел предложение требование показатель рост снижение объём "
+    "производство поставка продукт услуга цена стоимость расход доход прибыль инвестиция "
+    "технология разработка внедрение поддержка безопасность риск контроль проверка отчётность "
+    "год месяц неделя период этап часть основа пример причина следствие возможность "
+    "необходимость ответственность участие совещание обсуждение согласование утверждение "
+    "важный новый основной общий значительный существенный текущий следующий последний "
+    "первый крупный небольшой высокий низкий быстрый эффективный дополнительный отдельный "
+    "региональный федеральный внутренний внешний стратегический финансовый технический "
+    "рассматривать обеспечивать определять составлять проводить получать использовать "
+    "представлять учитывать выполнять подготовить согласовать утвердить направить "
+    "рассмотреть обсудить предложить оценить увеличить сократить сохранить изменить "
+    "также однако поэтому кроме того при этом в частности в результате вместе с тем "
+    "для по на в с о при после перед между через около"
+).split()
+CONJUNCTIONS = ("что", "но", "а", "который", "поскольку", "если", "когда")
+FIRST_NAMES = ("Иван", "Мария", "Алексей", "Ольга", "Дмитрий", "Елена", "Сергей", "Анна")
+SURNAMES = ("Петров", "Смирнова", "Кузнецов", "Попова", "Волков", "Соколова", "Морозов", "Лебедева")
+CITIES = ("Москве", "Казани", "Новосибирске", "Екатеринбурге", "Самаре", "Томске", "Перми")
+
+# Fact kinds: how one appears in a sentence, and a pattern finding it again for swaps
+_FACTS = (
+    (lambda rng: f"в {rng.randint(1990, 2025)} году", r"[12]\d{3} году"),
+    (
+        lambda rng: f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+        r"[А-ЯЁ][а-яё]+ [А-ЯЁ][а-яё]+",
+    ),
+    (lambda rng: f"в городе {rng.choice(CITIES)}", r"городе [А-ЯЁ][а-яё]+"),
+    (lambda rng: f"{rng.randint(1, 999)},{rng.randint(1, 9)} млн рублей", r"\d+,\d млн рублей"),
+)
+_FACT = re.compile("|".join(f"({pattern})" for _, pattern in _FACTS))
+
+
+@dataclass
+class Pair:
+    original: str
+    corrected: str
+    # FactChange-shaped dicts for the facts that were swapped
+    fact_changes: list[dict[str, str]] = field(default_factory=list)
+
+
+def _fact(rng: random.Random, kind: int | None = None) -> str:
+    make, _ = _FACTS[rng.randrange(len(_FACTS)) if kind is None else kind]
+    return make(rng)
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 16))]
+    if rng.random() < 0.4:
+        at = rng.randint(2, len(words) - 1)
+        words[at - 1] += ","
+        words.insert(at, rng.choice(CONJUNCTIONS))
+    if rng.random() < 0.35:
+        words.insert(rng.randint(1, len(words)), _fact(rng))
+    text = " ".join(words)
+    return text[0].upper() + text[1:] + rng.choice(".....!?")
+
+
+def make_text(pages: int, seed: int = 0) -> str:
+    """About ``pages`` pages of paragraphs (one per line) of generated Russian prose."""
+    rng = random.Random(f"text:{pages}:{seed}")
+    paragraphs = []
+    size = 0
+    while size < pages * PAGE_CHARS:
+        paragraph = " ".join(_sentence(rng) for _ in range(rng.randint(2, 7)))
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 1
+    return "\n".join(paragraphs)
+
+
+def make_pair(text: str, kind: EditKind, seed: int = 0) -> Pair:
+    """An (original, corrected) pair made by applying one kind of edit to ``text``.
+
+    - ``punctuation``: a couple of comma, dash and ё fixes in about 5% of paragraphs
+    - ``rewrite``: about 40% of the words replaced in 60% of paragraphs, plus dropped
+      and added sentences
+    - ``facts``: a tenth of the names, dates, places and sums swapped, with fact changes
+    - ``moves``: about 10% of paragraphs moved elsewhere, text otherwise unchanged
+    """
+    rng = random.Random(f"pair:{kind}:{seed}")
+    paragraphs = text.split("\n")
+    match kind:
+        case "punctuation":
+            corrected = [_fix_punctuation(p, rng) if rng.random() < 0.05 else p for p in paragraphs]
+            return Pair(text, "\n".join(corrected))
+        case "rewrite":
+            corrected = [_rewrite(p, rng) if rng.random() < 0.6 else p for p in paragraphs]
+            return Pair(text, "\n".join(corrected))
+        case "facts":
+            return _swap_facts(text, rng)
+        case "moves":
+            corrected = list(paragraphs)
+            for _ in range(max(1, len(corrected) // 10)):
+                moved = corrected.pop(rng.randrange(len(corrected)))
+                corrected.insert(rng.randrange(len(corrected) + 1), moved)
+            return Pair(text, "\n".join(corrected))
+    raise ValueError(f"Unknown edit kind: {kind}")
+
+
+def _fix_punctuation(paragraph: str, rng: random.Random) -> str:
+    for _ in range(rng.randint(1, 3)):
+        match rng.randrange(4):
+            case 0:
+                paragraph = paragraph.replace(", ", " ", 1)
+            case 1:
+                paragraph = paragraph.replace(" что ", ", что ", 1)
+            case 2:
+                paragraph = paragraph.replace("ё", "е", 1)
+            case _:
+                paragraph = paragraph.replace(". ", " — ", 1)
+    return paragraph
+
+
+def _rewrite(paragraph: str, rng: random.Random) -> str:
+    words = [rng.choice(WORDS) if rng.random() < 0.4 else word for word in paragraph.split(" ")]
+    sentences = " ".join(words).split(". ")
+    if len(sentences) > 1 and rng.random() < 0.3:
+        sentences.pop(rng.randrange(len(sentences)))
+    if rng.random() < 0.3:
+        sentences.insert(rng.randrange(len(sentences) + 1), _sentence(rng).rstrip(".!?"))
+    return ". ".join(sentences)
+
+
+def _swap_facts(text: str, rng: random.Random) -> Pair:
+    fact_changes: list[dict[str, str]] = []
+
+    def swap(match: re.Match) -> str:
+        original = match.group(0)
+        if rng.random() >= 0.1:
+            return original
+        corrected = _fact(rng, match.lastindex - 1).removeprefix("в ")
+        if corrected == original:
+            return original
+        start = max(0, match.start() - 40)
+        fact_changes.append(
+            {
+                "original": original,
+                "corrected": corrected,
+                "context": text[start : match.end() + 40],
+            }
+        )
+        return corrected
+
+    return Pair(text, _FACT.sub(swap, text), fact_changes)
+
+
+def to_txt(text: str) -> bytes:
+    return text.encode("utf-8")
+
+
+def to_docx(text: str) -> bytes:
+    document = Document()
+    for paragraph in text.split("\n"):
+        document.add_paragraph(paragraph)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+# Single-byte font encoding for Cyrillic: codes from 128 map to the Adobe "afii" glyph
+# names, which PDF text extraction translates back to Unicode.
+_UPPER = "АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ"
+_GLYPHS = [f"/afii{10017 + i}" for i in range(33)] + [f"/afii{10065 + i}" for i in range(33)]
+_GLYPHS += ["/emdash"]
+_CODES = {char: 128 + i for i, char in enumerate(_UPPER + _UPPER.lower() + "—")}
+
+
+def _pdf_string(line: str) -> bytes:
+    encoded = bytearray()
+    for char in line:
+        code = _CODES.get(char, ord(char) if ord(char) < 128 else ord("?"))
+        if char in "()\\":
+            encoded += b"\\"
+        encoded.append(code)
+    return b"(" + bytes(encoded) + b")"
+
+
+def to_pdf(text: str, pages: int) -> bytes:
+    """``text`` wrapped into lines and laid out over ``pages`` pages."""
+    writer = PdfWriter()
+    differences = ArrayObject([NumberObject(128), *map(NameObject, _GLYPHS)])
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+                NameObject("/Encoding"): DictionaryObject(
+                    {
+                        NameObject("/Type"): NameObject("/Encoding"),
+                        NameObject("/Differences"): differences,
+                    }
+                ),
+            }
+        )
+    )
+
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            if line and len(line) + 1 + len(word) > PDF_LINE_CHARS:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+
+    per_page = -(-len(lines) // pages)
+    for start in range(0, len(lines), per_page):
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        body = b" Tj T* ".join(_pdf_string(line) for line in lines[start : start + per_page])
+        content = DecodedStreamObject()
+        content.set_data(b"BT /F1 7 Tf 10 TL 36 760 Td " + body + b" Tj ET")
+        page[NameObject("/Contents")] = writer._add_object(content)
+
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
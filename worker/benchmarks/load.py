@@ -0,0 +1,374 @@
+"""Open-loop load test of the worker with the traffic the core service sends.
+
+Usage (from ``worker/``)::
+
+    python -m benchmarks.load --workers 2 --rates 1,2,4,8 --duration 30
+    python -m benchmarks.load --url http://localhost:8000 --rates 5   # an already running worker
+    python -m benchmarks.load --env EXECUTOR_WORKERS=4 --env EXECUTOR_QUEUE_SIZE=32
+
+Unless ``--url`` is given, the app is started with ``uvicorn --workers N`` on a
+free port. Its parse and generate caches are disabled (``--keep-cache`` leaves
+them on), so every request does the work a new document would.
+
+Requests are sent the way ``HttpWorkerClient`` sends them:
+- raw uploads to ``/parse/raw?file_type=...``
+- ``/generate`` with ``Accept: multipart/form-data``
+
+Arrivals are Poisson at each rate of the ramp, whether or not earlier requests
+have finished, so queueing shows up as latency instead of a lower send rate.
+
+Each step reports:
+- achieved throughput
+- latency percentiles
+- error and rejection (503) rates
+- RSS of the server's process tree (uvicorn workers and their pools) and its
+  growth since the start
+
+The saturation point is the first rate where p99 exceeds ``--slo``, errors
+exceed ``--max-error-rate``, or completed throughput falls below 90% of the
+rate actually offered.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import httpx
+
+from benchmarks.corpus import EDIT_KINDS, make_pair, make_text, to_docx, to_pdf, to_txt
+from benchmarks.run import percentile
+
+WORKER_DIR = Path(__file__).resolve().parent.parent
+PAGE_SIZES = (1, 2, 5, 10, 20)  # pages per document, picked uniformly
+VARIANTS = 4  # distinct documents per (kind, size)
+
+
+@dataclass
+class Request:
+    kind: str  # parse/<type> or generate/<edit kind>
+    url: str
+    headers: dict[str, str]
+    content: bytes
+
+
+@dataclass
+class Outcome:
+    kind: str
+    seconds: float
+    status: int  # 0 when the request failed without a response
+    error: str | None = None
+
+
+@dataclass
+class Step:
+    rate: float
+    sent: int
+    offered_rps: float  # sent / step duration; Poisson arrivals scatter around the rate
+    completed_rps: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    error_rate: float
+    rejected_rate: float  # share of 503 responses
+    rss_mb: float
+    rss_growth_mb: float
+
+
+def build_requests(parse_share: float, seed: int) -> tuple[list[Request], list[Request]]:
+    """Parse and generate requests over a spread of document sizes and edit kinds."""
+    parse: list[Request] = []
+    generate: list[Request] = []
+    for pages in PAGE_SIZES:
+        for variant in range(VARIANTS):
+            text = make_text(pages, seed=seed + variant)
+            if parse_share > 0:
+                for file_type, data in (
+                    ("txt", to_txt(text)),
+                    ("docx", to_docx(text)),
+                    ("pdf", to_pdf(text, pages)),
+                ):
+                    parse.append(
+                        Request(
+                            f"parse/{file_type}",
+                            f"/parse/raw?file_type={file_type}",
+                            {"Content-Type": "application/octet-stream"},
+                            data,
+                        )
+                    )
+            if parse_share < 1:
+                for kind in EDIT_KINDS:
+                    pair = make_pair(text, kind, seed=variant)
+                    body = {
+                        "original": pair.original,
+                        "corrected": pair.corrected,
+                        "fact_changes": pair.fact_changes,
+                    }
+                    generate.append(
+                        Request(
+                            f"generate/{kind}",
+                            "/generate",
+                            {"Content-Type": "application/json", "Accept": "multipart/form-data"},
+                            json.dumps(body, ensure_ascii=False).encode(),
+                        )
+                    )
+    return parse, generate
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(
+    workers: int, env: dict[str, str], keep_cache: bool
+) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    environment = {**os.environ, **env}
+    if not keep_cache:
+        environment.setdefault("PARSE_CACHE_MAX_MB", "0")
+        environment.setdefault("GENERATE_CACHE_MAX_MB", "0")
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=WORKER_DIR,
+        env=environment,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_healthy(client: httpx.AsyncClient, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("Worker did not become healthy")
+        await asyncio.sleep(0.2)
+
+
+def _children() -> dict[int, list[int]]:
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces; fields after it are fixed
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def tree_rss_mb(pid: int) -> float:
+    """Resident memory of ``pid`` and all its descendants, from /proc."""
+    children = _children()
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending += children.get(current, [])
+        try:
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+async def send(client: httpx.AsyncClient, request: Request) -> Outcome:
+    started = time.perf_counter()
+    try:
+        response = await client.post(request.url, headers=request.headers, content=request.content)
+    except httpx.HTTPError as e:
+        return Outcome(request.kind, time.perf_counter() - started, 0, type(e).__name__)
+
+    seconds = time.perf_counter() - started
+    error = response.headers.get("X-Error")
+    if response.status_code != 200:
+        error = f"HTTP {response.status_code}"
+    elif request.kind.startswith("parse/"):
+        error = response.json().get("error")
+    return Outcome(request.kind, seconds, response.status_code, error)
+
+
+async def run_step(
+    client: httpx.AsyncClient,
+    rate: float,
+    duration: float,
+    parse: list[Request],
+    generate: list[Request],
+    parse_share: float,
+    rng: random.Random,
+) -> tuple[list[Outcome], float]:
+    """Send Poisson arrivals at ``rate`` for ``duration`` seconds and wait for them."""
+    tasks: list[asyncio.Task[Outcome]] = []
+    started = time.perf_counter()
+    arrival = 0.0
+    while True:
+        arrival += rng.expovariate(rate)
+        if arrival >= duration:
+            break
+        delay = started + arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        pool = parse if not generate or (parse and rng.random() < parse_share) else generate
+        tasks.append(asyncio.create_task(send(client, rng.choice(pool))))
+
+    outcomes = list(await asyncio.gather(*tasks))
+    return outcomes, time.perf_counter() - started
+
+
+def summarize(
+    rate: float, duration: float, outcomes: list[Outcome], elapsed: float, rss: float, base: float
+) -> Step:
+    """``elapsed`` runs until the last response, past ``duration`` when requests queue up."""
+    latencies = [o.seconds * 1000 for o in outcomes] or [0.0]
+    sent = len(outcomes)
+    ok = sum(o.error is None for o in outcomes)
+    return Step(
+        rate=rate,
+        sent=sent,
+        offered_rps=round(sent / duration, 2),
+        completed_rps=round(ok / max(elapsed, duration), 2),
+        p50_ms=round(percentile(latencies, 0.5), 1),
+        p90_ms=round(percentile(latencies, 0.9), 1),
+        p99_ms=round(percentile(latencies, 0.99), 1),
+        error_rate=round((sent - ok) / sent, 4) if sent else 0.0,
+        rejected_rate=round(sum(o.status == 503 for o in outcomes) / sent, 4) if sent else 0.0,
+        rss_mb=round(rss, 1),
+        rss_growth_mb=round(rss - base, 1),
+    )
+
+
+def saturated(step: Step, slo_ms: float, max_error_rate: float) -> bool:
+    return (
+        step.p99_ms > slo_ms
+        or step.error_rate > max_error_rate
+        or step.completed_rps < 0.9 * step.offered_rps
+    )
+
+
+async def load_test(args: argparse.Namespace) -> list[Step]:
+    parse, generate = build_requests(args.parse_share, args.seed)
+    env = dict(item.split("=", 1) for item in args.env)
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args.workers, env, args.keep_cache)
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+            await wait_healthy(client)
+            rng = random.Random(args.seed)
+            # Warm every process (imports, templates) before the baseline RSS is taken
+            await run_step(client, 2, 2, parse, generate, args.parse_share, rng)
+            base_rss = tree_rss_mb(process.pid) if process else 0.0
+
+            steps = []
+            print(
+                f"{'rate':>6} {'sent':>6} {'sent/s':>7} {'ok/s':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+                f"{'errors':>7} {'503s':>7} {'RSS MB':>8} {'+RSS':>7}"
+            )
+            for rate in args.rates:
+                outcomes, elapsed = await run_step(
+                    client, rate, args.duration, parse, generate, args.parse_share, rng
+                )
+                rss = tree_rss_mb(process.pid) if process else 0.0
+                step = summarize(rate, args.duration, outcomes, elapsed, rss, base_rss)
+                steps.append(step)
+                print(
+                    f"{step.rate:>6g} {step.sent:>6} {step.offered_rps:>7.2f} {step.completed_rps:>7.2f} "
+                    f"{step.p50_ms:>9.1f} {step.p90_ms:>9.1f} {step.p99_ms:>9.1f} "
+                    f"{step.error_rate:>7.1%} {step.rejected_rate:>7.1%} "
+                    f"{step.rss_mb:>8.1f} {step.rss_growth_mb:>+7.1f}",
+                    flush=True,
+                )
+                errors = {o.error for o in outcomes if o.error}
+                if errors:
+                    print(f"       errors: {', '.join(sorted(errors)[:5])}", flush=True)
+                if saturated(step, args.slo * 1000, args.max_error_rate) and not args.full_ramp:
+                    break
+            return steps
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="test a running worker instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="settings override for the started worker, may repeat",
+    )
+    parser.add_argument("--keep-cache", action="store_true", help="leave result caches enabled")
+    parser.add_argument(
+        "--rates",
+        type=lambda s: [float(r) for r in s.split(",")],
+        default=[1, 2, 4, 8, 16],
+        help="comma-separated request rates (per second) to ramp through",
+    )
+    parser.add_argument("--duration", type=float, default=20, help="seconds per rate")
+    parser.add_argument("--parse-share", type=float, default=0.5, help="share of /parse requests")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout seconds")
+    parser.add_argument("--slo", type=float, default=5, help="p99 latency limit in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--full-ramp", action="store_true", help="keep going past saturation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the steps to this JSON file")
+    args = parser.parse_args(argv)
+
+    steps = asyncio.run(load_test(args))
+    limit = next(
+        (step for step in steps if saturated(step, args.slo * 1000, args.max_error_rate)), None
+    )
+    if limit is None:
+        print(f"Not saturated up to {steps[-1].rate:g} req/s" if steps else "No steps ran")
+    else:
+        sustained = [step.rate for step in steps if step.rate < limit.rate]
+        print(
+            f"Saturated at {limit.rate:g} req/s"
+            + (f"; last sustained rate {max(sustained):g} req/s" if sustained else "")
+        )
+    if args.output:
+        args.output.write_text(json.dumps([asdict(step) for step in steps], indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""Parse, diff and render benchmarks on the synthetic corpus.
+
+Usage (from ``worker/``)::
+
+    python -m benchmarks.run                      # quick profile, compare with baseline.json
+    python -m benchmarks.run --profile full       # 1 to 500 pages
+    python -m benchmarks.run --filter diff/       # only cases whose name contains "diff/"
+    python -m benchmarks.run --save               # store this run as the new baseline
+
+Each case runs in a fresh process, so its peak RSS is its own. The corpus is
+built before timing starts. Cases run until ``--budget`` seconds or ``--max-runs``
+runs have passed, and at least ``--min-runs`` times. The report has p50/p99
+latency, input throughput, peak RSS and its growth over the RSS before the first
+call. With few runs p99 is the slowest run.
+
+The exit status is 1 when a case's p50 or RSS growth is more than ``--threshold``
+above the baseline (and above small absolute slacks, so sub-millisecond cases
+don't fail on noise). Timings depend on the machine, so store the baseline on
+the machine that runs the comparison.
+"""
+
+import argparse
+import gc
+import json
+import math
+import multiprocessing
+import resource
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from benchmarks.corpus import EDIT_KINDS, make_pair, make_text, to_docx, to_pdf, to_txt
+
+BASELINE = Path(__file__).with_name("baseline.json")
+PROFILES = {"quick": (1, 10, 50), "full": (1, 10, 100, 500)}
+# Differences below these never count as regressions
+LATENCY_SLACK_MS = 1.0
+RSS_SLACK_MB = 5.0
+
+
+@dataclass(frozen=True)
+class Case:
+    stage: str  # parse | diff | render
+    variant: str  # file type for parse, edit kind for diff and render
+    pages: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.stage}/{self.variant}/{self.pages}"
+
+
+@dataclass
+class Result:
+    name: str
+    runs: int
+    p50_ms: float
+    p99_ms: float
+    throughput_mb_s: float  # input megabytes per second at p50
+    peak_rss_mb: float  # peak RSS of the process, corpus included
+    rss_growth_mb: float  # peak RSS while running above RSS before the first call
+
+
+def cases(pages: tuple[int, ...]) -> list[Case]:
+    found = []
+    for count in pages:
+        found += [Case("parse", file_type, count) for file_type in ("txt", "docx", "pdf")]
+        found += [Case("diff", kind, count) for kind in EDIT_KINDS]
+        found.append(Case("render", "rewrite", count))
+    return found
+
+
+def _prepare(case: Case) -> tuple[Callable[[], Any], int]:
+    """The call to time for ``case`` and its input size in bytes."""
+    from app.models.requests import FactChange
+    from app.services.diff_service import DiffService
+    from app.services.parser_service import ParserService
+
+    text = make_text(case.pages)
+    if case.stage == "parse":
+        data = {"txt": to_txt, "docx": to_docx, "pdf": lambda t: to_pdf(t, case.pages)}[
+            case.variant
+        ](text)
+        service = ParserService()
+        return lambda: service.extract(data, case.variant), len(data)
+
+    pair = make_pair(text, case.variant)
+    facts = [FactChange(**fact) for fact in pair.fact_changes]
+    size = len(pair.original.encode()) + len(pair.corrected.encode())
+    service = DiffService()
+    if case.stage == "diff":
+        return lambda: service.diff_runs(pair.original, pair.corrected, facts), size
+    clean, diff = service.diff_runs(pair.original, pair.corrected, facts)
+    return lambda: service.write(clean, diff), size
+
+
+def _status_mb(field: str) -> float | None:
+    """A memory field of /proc/self/status (VmRSS, VmHWM) in MB, None off Linux."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> None:
+    """Reset the kernel's peak RSS mark (VmHWM), so it only covers what follows."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    peak = _status_mb("VmHWM")
+    if peak is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    return peak
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, ``q`` in [0, 1]."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(q * len(ordered)))) - 1]
+
+
+def run_case(case: Case, budget: float, min_runs: int, max_runs: int) -> Result:
+    call, size = _prepare(case)
+    gc.collect()
+    # The corpus is built; measure peak RSS from here, including the cold first call
+    _reset_peak_rss()
+    rss_before = _status_mb("VmRSS") or _peak_rss_mb()
+    call()  # warm-up: lazy imports, template loading
+
+    latencies: list[float] = []
+    deadline = time.perf_counter() + budget
+    while len(latencies) < min_runs or (
+        len(latencies) < max_runs and time.perf_counter() < deadline
+    ):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+
+    p50 = percentile(latencies, 0.5)
+    return Result(
+        name=case.name,
+        runs=len(latencies),
+        p50_ms=round(p50 * 1000, 3),
+        p99_ms=round(percentile(latencies, 0.99) * 1000, 3),
+        throughput_mb_s=round(size / 2**20 / p50, 3),
+        peak_rss_mb=round(_peak_rss_mb(), 1),
+        rss_growth_mb=round(max(0.0, _peak_rss_mb() - rss_before), 1),
+    )
+
+
+def compare(
+    results: list[Result], baseline: dict[str, dict[str, Any]], threshold: float
+) -> list[str]:
+    """Regressions of ``results`` against ``baseline``, one message per failed check."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        allowed_ms = max(base["p50_ms"] * (1 + threshold), base["p50_ms"] + LATENCY_SLACK_MS)
+        if result.p50_ms > allowed_ms:
+            regressions.append(
+                f"{result.name}: p50 {result.p50_ms:.1f} ms vs baseline {base['p50_ms']:.1f} ms"
+            )
+        allowed_mb = max(
+            base["rss_growth_mb"] * (1 + threshold), base["rss_growth_mb"] + RSS_SLACK_MB
+        )
+        if result.rss_growth_mb > allowed_mb:
+            regressions.append(
+                f"{result.name}: RSS growth {result.rss_growth_mb:.1f} MB "
+                f"vs baseline {base['rss_growth_mb']:.1f} MB"
+            )
+    return regressions
+
+
+def _print_row(result: Result, base: dict[str, Any] | None) -> None:
+    change = f"{result.p50_ms / base['p50_ms'] - 1:+7.1%}" if base and base["p50_ms"] else ""
+    print(
+        f"{result.name:<24} {result.runs:>5} {result.p50_ms:>10.2f} {result.p99_ms:>10.2f} "
+        f"{result.throughput_mb_s:>9.2f} {result.peak_rss_mb:>8.1f} {result.rss_growth_mb:>8.1f}"
+        f"  {change}",
+        flush=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=PROFILES, default="quick")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds of runs per case")
+    parser.add_argument("--min-runs", type=int, default=3)
+    parser.add_argument("--max-runs", type=int, default=50)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%"
+    )
+    parser.add_argument("--save", action="store_true", help="write the results as the baseline")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    selected = [case for case in cases(PROFILES[args.profile]) if args.filter in case.name]
+
+    print(
+        f"{'case':<24} {'runs':>5} {'p50 ms':>10} {'p99 ms':>10} {'MB/s':>9} {'peak MB':>8} {'+RSS MB':>8}"
+    )
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for case in selected:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_case, case, args.budget, args.min_runs, args.max_runs).result()
+        results.append(result)
+        _print_row(result, baseline.get(result.name))
+
+    data = {result.name: asdict(result) for result in results}
+    if args.output:
+        args.output.write_text(json.dumps(data, indent=2) + "\n")
+    if args.save:
+        args.baseline.write_text(json.dumps({**baseline, **data}, indent=2) + "\n")
+        print(f"Saved {len(data)} results to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
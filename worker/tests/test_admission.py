@@ -0,0 +1,189 @@
+import base64
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.middleware import AdmissionMiddleware
+from app.core import settings
+from app.core.admission import AdmissionController, working_set_bytes
+from app.main import app
+
+MAX_FILE_BYTES = 1024
+
+
+def _client(controller: AdmissionController) -> AsyncClient:
+    middleware = AdmissionMiddleware(app, controller, MAX_FILE_BYTES, retry_after=7)
+    return AsyncClient(transport=ASGITransport(app=middleware), base_url="http://test")
+
+
+def _text(size: int) -> bytes:
+    # Unique, so the parse isn't answered from the cache
+    return (uuid.uuid4().hex + "а" * size).encode()[:size]
+
+
+@pytest.mark.asyncio
+async def test_declared_length_over_limit_is_rejected_unread():
+    controller = AdmissionController()
+    async with _client(controller) as client:
+        response = await client.post(
+            "/parse/raw?file_type=txt",
+            content=b"x" * (MAX_FILE_BYTES + 1),
+            headers={"Content-Type": "application/octet-stream"},
+        )
+
+    assert response.status_code == 413
+    assert controller.rejected["body_too_large"] == 1
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_body_is_cut_off_at_limit():
+    sent = 0
+
+    async def chunks():
+        nonlocal sent
+        for _ in range(100):
+            sent += 1
+            yield b"x" * 256
+
+    controller = AdmissionController()
+    async with _client(controller) as client:
+        response = await client.post(
+            "/parse/raw?file_type=txt",
+            content=chunks(),
+            headers={"Content-Type": "application/octet-stream"},
+        )
+
+    assert response.status_code == 413
+    assert "larger than 1024 bytes" in response.json()["detail"]
+    assert sent < 100
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_file_at_limit_is_accepted_raw_and_as_base64_json():
+    data = _text(MAX_FILE_BYTES)
+    async with _client(AdmissionController()) as client:
+        raw = await client.post(
+            "/parse/raw?file_type=txt",
+            content=data,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        encoded = await client.post(
+            "/parse",
+            json={
+                "file_content": base64.b64encode(_text(MAX_FILE_BYTES)).decode(),
+                "file_type": "txt",
+            },
+        )
+
+    assert raw.status_code == 200
+    assert raw.json()["error"] is None
+    assert encoded.status_code == 200
+    assert encoded.json()["error"] is None
+
+
+@pytest.mark.asyncio
+async def test_batch_paths_have_their_own_body_budget():
+    # Three files at the limit, well over what a single upload may carry
+    max_file_bytes = 48 * 1024
+    items = [
+        {"file_content": base64.b64encode(_text(max_file_bytes)).decode(), "file_type": "txt"}
+        for _ in range(3)
+    ]
+    middleware = AdmissionMiddleware(
+        app, AdmissionController(), max_file_bytes, batch_max_body_bytes=256 * 1024
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=middleware), base_url="http://test"
+    ) as client:
+        single = await client.post("/parse", json={"items": items})
+        batch = await client.post("/parse/batch", json={"items": items})
+        too_many = await client.post("/parse/batch", json={"items": items * 2})
+
+    assert single.status_code == 413
+    assert batch.status_code == 200
+    assert [r["error"] for r in batch.json()["results"]] == [None] * 3
+    assert too_many.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_batch_file_over_limit_fails_alone(monkeypatch):
+    monkeypatch.setattr(settings, "max_file_size_mb", 1)
+    items = [
+        {"file_content": base64.b64encode(_text(1024 * 1024 + 1)).decode(), "file_type": "txt"},
+        {"file_content": base64.b64encode(_text(100)).decode(), "file_type": "txt"},
+    ]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/parse/batch", json={"items": items})
+
+    first, second = response.json()["results"]
+    assert "larger than 1048576 bytes" in first["error"]
+    assert second["error"] is None
+
+
+@pytest.mark.asyncio
+async def test_in_flight_budget_returns_503_with_retry_after():
+    controller = AdmissionController(max_in_flight=2)
+    controller.in_flight = 2  # two requests being handled
+
+    async with _client(controller) as client:
+        rejected = await client.get("/stats")
+        health = await client.get("/health")
+        scrape = await client.get("/metrics")
+
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "7"
+    assert controller.rejected["in_flight"] == 1
+    assert health.status_code == 200
+    assert scrape.status_code == 200
+    assert 'worker_admission_rejected_total{reason="in_flight"} 1' in scrape.text
+
+
+@pytest.mark.asyncio
+async def test_memory_watermark_returns_503():
+    usage = 900
+
+    controller = AdmissionController(
+        memory_watermark_bytes=1000, probe=lambda: usage, probe_interval=0
+    )
+    async with _client(controller) as client:
+        admitted = await client.get("/stats")
+        usage = 1000
+        rejected = await client.get("/stats")
+
+    assert admitted.status_code == 200
+    assert rejected.status_code == 503
+    assert controller.rejected["memory"] == 1
+    assert controller.in_flight == 0
+
+
+class TestAdmissionController:
+    def test_acquire_and_release(self):
+        controller = AdmissionController(max_in_flight=1)
+
+        assert controller.try_acquire() is None
+        assert controller.try_acquire() == "in_flight"
+        controller.release()
+        assert controller.try_acquire() is None
+
+    def test_memory_is_sampled_at_most_once_per_interval(self):
+        calls = []
+        controller = AdmissionController(
+            memory_watermark_bytes=100, probe=lambda: calls.append(1) or 10, probe_interval=60
+        )
+
+        for _ in range(5):
+            assert controller.try_acquire() is None
+
+        assert len(calls) == 1
+
+    def test_unreadable_memory_admits(self):
+        controller = AdmissionController(memory_watermark_bytes=100, probe=lambda: None)
+
+        assert controller.try_acquire() is None
+
+
+def test_working_set_bytes():
+    assert working_set_bytes() > 0
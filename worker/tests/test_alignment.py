@@ -0,0 +1,80 @@
+import random
+
+from app.services.alignment import ParagraphAligner, _heaviest_chain
+from benchmarks.corpus import make_text
+
+PARAGRAPHS = [
+    "Совещание по бюджету прошло в Казани, решения будут согласованы в течение недели.",
+    "Отдел разработки представил план внедрения новой системы контроля качества.",
+    "Руководитель проекта Иван Петров предложил сократить сроки поставки оборудования.",
+    "Финансовый отчёт за третий квартал показал значительный рост прибыли компании.",
+]
+
+
+def _edit(paragraph: str) -> str:
+    return paragraph.replace(",", "").replace("новой", "новейшей")
+
+
+class TestParagraphAligner:
+    def test_pairs_edited_paragraphs(self):
+        corrected = [_edit(p) for p in PARAGRAPHS]
+
+        assert ParagraphAligner().align(PARAGRAPHS, corrected) == [(0, 0), (1, 1), (2, 2), (3, 3)]
+
+    def test_split_paragraph_does_not_shift_later_pairs(self):
+        first, second = PARAGRAPHS[1].split(" новой ")
+        corrected = [PARAGRAPHS[0], f"{first}.", f"Речь о новой {second}", *PARAGRAPHS[2:]]
+
+        pairs = ParagraphAligner().align(PARAGRAPHS, corrected)
+
+        assert pairs[0] == (0, 0)
+        assert pairs[1] in ((1, 1), (1, 2))
+        assert pairs[2:] == [(2, 3), (3, 4)]
+
+    def test_unrelated_paragraphs_stay_unpaired(self):
+        corrected = ["Погода в Москве будет солнечной.", "Завтра ожидается дождь."]
+
+        assert ParagraphAligner().align(PARAGRAPHS, corrected) == []
+
+    def test_ignores_case_and_punctuation(self):
+        assert ParagraphAligner().align(["Привет, мир!"], ["привет мир"]) == [(0, 0)]
+
+    def test_empty_paragraphs_are_never_paired(self):
+        assert ParagraphAligner().align(["", PARAGRAPHS[0]], ["", PARAGRAPHS[0]]) == [(1, 1)]
+
+    def test_lsh_candidates_match_exact_comparison(self):
+        rng = random.Random(0)
+        original = make_text(20).split("\n")
+        corrected = []
+        for paragraph in original:
+            words = paragraph.split(" ")
+            if rng.random() < 0.2:
+                continue  # dropped paragraph
+            words = [rng.choice(words) if rng.random() < 0.2 else word for word in words]
+            corrected.append(" ".join(words))
+        corrected.insert(5, "Совсем новый абзац.")
+
+        lsh = ParagraphAligner(exact_pairs=0).align(original, corrected)
+        exact = ParagraphAligner(exact_pairs=len(original) * len(corrected)).align(
+            original, corrected
+        )
+
+        assert lsh == exact
+        assert len(lsh) == len(corrected) - 1
+
+
+class TestHeaviestChain:
+    def test_picks_heaviest_monotone_pairs(self):
+        scored = [(0, 1, 0.9), (1, 0, 0.5), (1, 2, 0.6), (2, 1, 0.8), (2, 2, 0.3)]
+
+        assert _heaviest_chain(scored, 3) == [(0, 1), (1, 2)]
+
+    def test_uses_each_row_and_column_once(self):
+        scored = [(0, 0, 0.5), (0, 1, 0.5), (1, 1, 0.5), (1, 0, 0.6)]
+
+        chain = _heaviest_chain(scored, 2)
+
+        assert chain == [(0, 0), (1, 1)]
+
+    def test_empty(self):
+        assert _heaviest_chain([], 0) == []
@@ -1,11 +1,29 @@
+import asyncio
 import base64
+import json
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from io import BytesIO
 
 import pytest
+from docx import Document
 from httpx import ASGITransport, AsyncClient
 
+from app.api import routes
+from app.core import executor, settings
 from app.main import app
 
 
+def parse_multipart(response) -> dict[str, bytes]:
+    header = f"Content-Type: {response.headers['content-type']}\r\n\r\n".encode()
+    message = BytesParser(policy=HTTP).parsebytes(header + response.content)
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+        for part in message.iter_parts()
+    }
+
+
 @pytest.fixture
 async def client():
     transport = ASGITransport(app=app)
@@ -34,6 +52,38 @@ async def test_parse_txt_file(client):
     data = response.json()
     assert data["text"] == text
     assert data["error"] is None
+    assert data["encoding"] == "utf-8"
+
+
+@pytest.mark.asyncio
+async def test_parse_raw_koi8_reports_encoding(client):
+    text = "Текст в кодировке KOI8-R"
+    response = await client.post(
+        "/parse/raw", params={"file_type": "txt"}, content=text.encode("koi8-r")
+    )
+    data = response.json()
+    assert data["text"] == text
+    assert data["encoding"] == "koi8-r"
+    assert 0 < data["encoding_confidence"] <= 1
+
+    stream = await client.post(
+        "/parse/stream", params={"file_type": "txt"}, content=text.encode("koi8-r")
+    )
+    assert read_ndjson(stream)[-1]["encoding"] == "koi8-r"
+
+
+@pytest.mark.asyncio
+async def test_parse_repeated_file_hits_cache(client):
+    content = base64.b64encode("Повторный файл".encode()).decode()
+
+    before = (await client.get("/stats")).json()["parse_cache"]
+    for _ in range(2):
+        response = await client.post("/parse", json={"file_content": content, "file_type": "txt"})
+        assert response.json()["text"] == "Повторный файл"
+    after = (await client.get("/stats")).json()["parse_cache"]
+
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
 
 
 @pytest.mark.asyncio
@@ -64,6 +114,161 @@ async def test_parse_unsupported_format(client):
     assert response.status_code == 422
 
 
+@pytest.mark.asyncio
+async def test_parse_raw_octet_stream(client):
+    text = "Привет, мир!"
+
+    response = await client.post(
+        "/parse/raw",
+        params={"file_type": "txt"},
+        content=text.encode("utf-8"),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["text"] == text
+    assert data["error"] is None
+
+
+@pytest.mark.asyncio
+async def test_parse_raw_multipart(client):
+    text = "Hello, World!"
+
+    response = await client.post(
+        "/parse/raw",
+        params={"file_type": "md"},
+        files={"file": ("notes.md", text.encode(), "text/markdown")},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["text"] == text
+
+
+@pytest.mark.asyncio
+async def test_parse_raw_over_limit_is_413(client, monkeypatch):
+    monkeypatch.setattr(settings, "max_file_size_mb", 1)
+
+    async def body():
+        for _ in range(3):
+            yield b"a" * 512 * 1024
+
+    response = await client.post("/parse/raw", params={"file_type": "txt"}, content=body())
+
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_parse_raw_empty_body(client):
+    response = await client.post("/parse/raw", params={"file_type": "txt"}, content=b"")
+
+    assert response.status_code == 200
+    assert "empty" in response.json()["error"].lower()
+
+
+@pytest.mark.asyncio
+async def test_parse_raw_pdf_split_across_pool(client, make_pdf, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_pages_per_task", 1)
+    monkeypatch.setattr(executor, "max_workers", 3)
+    pages = ["Page one", "Page two", "", "Page four", "Page five"]
+
+    response = await client.post("/parse/raw", params={"file_type": "pdf"}, content=make_pdf(pages))
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["text"] == "Page one\nPage two\nPage four\nPage five"
+    assert [page["index"] for page in data["pages"]] == [0, 1, 2, 3, 4]
+    assert [page["chars"] for page in data["pages"]] == [8, 8, 0, 9, 9]
+
+
+@pytest.mark.asyncio
+async def test_parse_raw_pdf_ranges_wait_for_pool_slots(client, make_pdf, monkeypatch):
+    # One slot is left for the request, which then fans out into two page ranges
+    monkeypatch.setattr(settings, "pdf_pages_per_task", 1)
+    monkeypatch.setattr(executor, "max_workers", 2)
+    monkeypatch.setattr(executor, "queue_size", 0)
+    blocker = asyncio.ensure_future(executor.run(time.sleep, 0.3))
+    await asyncio.sleep(0)
+
+    pages = ["Page one", "Page two", "Page three", "Page four"]
+    response = await client.post("/parse/raw", params={"file_type": "pdf"}, content=make_pdf(pages))
+
+    await blocker
+    assert response.status_code == 200
+    assert response.json()["text"] == "\n".join(pages)
+
+
+@pytest.mark.asyncio
+async def test_parse_txt_has_no_page_report(client):
+    response = await client.post("/parse/raw", params={"file_type": "txt"}, content=b"text")
+
+    assert response.json()["pages"] is None
+
+
+def read_ndjson(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_parse_stream_docx(client):
+    doc = Document()
+    doc.add_paragraph("Первый абзац")
+    doc.add_paragraph("")
+    doc.add_paragraph("Второй абзац")
+    doc.add_table(rows=1, cols=2).rows[0].cells[0].text = "ячейка"
+    buffer = BytesIO()
+    doc.save(buffer)
+
+    response = await client.post(
+        "/parse/stream", params={"file_type": "docx"}, content=buffer.getvalue()
+    )
+    parsed = await client.post(
+        "/parse/raw", params={"file_type": "docx"}, content=buffer.getvalue()
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    *records, done = read_ndjson(response)
+    text = parsed.json()["text"]
+    assert [r["text"] for r in records] == ["Первый абзац", "Второй абзац", "ячейка"]
+    assert "".join(r["separator"] + r["text"] for r in records) == text
+    assert all(text[r["start"] : r["end"]] == r["text"] for r in records)
+    assert done == {"done": True, "length": len(text), "pages": None}
+
+
+@pytest.mark.asyncio
+async def test_parse_stream_pdf_pages(client, make_pdf, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_stream_pages_per_task", 2)
+    data = make_pdf(["Page one", "", "Page three", "Page four", "Page five"])
+
+    response = await client.post("/parse/stream", params={"file_type": "pdf"}, content=data)
+
+    *records, done = read_ndjson(response)
+    assert [r["text"] for r in records] == ["Page one", "Page three", "Page four", "Page five"]
+    assert [page["index"] for page in done["pages"]] == [0, 1, 2, 3, 4]
+
+    cached = await client.post("/parse/stream", params={"file_type": "pdf"}, content=data)
+    *cached_records, cached_done = read_ndjson(cached)
+    assert cached_records == records
+    assert cached_done == done
+
+
+@pytest.mark.asyncio
+async def test_parse_stream_error_record(client):
+    response = await client.post("/parse/stream", params={"file_type": "pdf"}, content=b"%PDF-")
+
+    assert response.status_code == 200
+    [record] = read_ndjson(response)
+    assert "Cannot parse PDF" in record["error"]
+
+
+@pytest.mark.asyncio
+async def test_parse_raw_unsupported_format(client):
+    response = await client.post("/parse/raw", params={"file_type": "xlsx"}, content=b"test")
+
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_generate_documents(client):
     response = await client.post(
@@ -136,3 +341,286 @@ async def test_generate_same_text(client):
     assert data["clean_doc"] != ""
     assert data["diff_doc"] != ""
     assert data["error"] is None
+
+
+@pytest.mark.asyncio
+async def test_generate_multipart(client):
+    response = await client.post(
+        "/generate",
+        json={"original": "Привет мир", "corrected": "Привет прекрасный мир"},
+        headers={"Accept": "multipart/form-data"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("multipart/form-data")
+    assert "x-error" not in response.headers
+
+    parts = parse_multipart(response)
+    assert set(parts) == {"clean_doc", "diff_doc"}
+    clean_doc = Document(BytesIO(parts["clean_doc"]))
+    assert clean_doc.paragraphs[0].text == "Привет прекрасный мир"
+
+
+@pytest.mark.asyncio
+async def test_generate_multipart_error_header(client):
+    response = await client.post(
+        "/generate",
+        json={"original": "", "corrected": ""},
+        headers={"Accept": "multipart/form-data"},
+    )
+
+    assert response.status_code == 200
+    assert "empty" in response.headers["x-error"].lower()
+    assert parse_multipart(response) == {}
+
+
+@pytest.mark.asyncio
+async def test_generate_repeated_request_hits_cache(client):
+    payload = {"original": "Кеш тест", "corrected": "Кэш тест"}
+
+    first = await client.post("/generate", json=payload)
+    second = await client.post("/generate", json=payload)
+
+    assert first.headers["x-cache"] == "miss"
+    assert second.headers["x-cache"] == "hit"
+    assert first.json() == second.json()
+
+
+@pytest.mark.asyncio
+async def test_generate_idempotency_key(client):
+    headers = {"Idempotency-Key": "job-42"}
+    payload = {"original": "Первый", "corrected": "Первый текст"}
+    first = await client.post("/generate", json=payload, headers=headers)
+    retry = await client.post("/generate", json=payload, headers=headers)
+
+    assert retry.headers["x-cache"] == "hit"
+    assert retry.json() == first.json()
+
+
+@pytest.mark.asyncio
+async def test_generate_idempotency_key_reused_for_other_body_is_rejected(client):
+    headers = {"Idempotency-Key": "job-43"}
+    original = {"original": "Второй", "corrected": "Второй текст"}
+    other = {"original": "Второй", "corrected": "Другой текст"}
+    await client.post("/generate", json=original, headers=headers)
+    routes.generate_cache.clear()
+
+    reused = await client.post("/generate", json=other, headers=headers)
+    plain = await client.post("/generate", json=original)
+
+    assert reused.status_code == 422
+    assert plain.headers["x-cache"] == "miss"
+    assert plain.json()["clean_doc"]
+
+
+@pytest.mark.asyncio
+async def test_diff_session_matches_generate(client):
+    chunks = [
+        ("Первый абзатс текста.", "Первый абзац текста."),
+        ("Второй абзац.\nЕщё строка", "Второй абзац!\nЕщё строка"),
+        ("Третий.", "Третий, новый."),
+    ]
+    session = (await client.post("/sessions", json={"separator": "\n\n"})).json()
+    session_id = session["session_id"]
+
+    for index in (2, 0, 1):
+        original, corrected = chunks[index]
+        response = await client.post(
+            f"/sessions/{session_id}/chunks",
+            json={"index": index, "original": original, "corrected": corrected},
+        )
+        assert response.status_code == 200
+    assert response.json()["chunks"] == 3
+
+    finalized = await client.post(f"/sessions/{session_id}/finalize", json={"total_chunks": 3})
+    generated = await client.post(
+        "/generate",
+        json={
+            "original": "\n\n".join(o for o, _ in chunks),
+            "corrected": "\n\n".join(c for _, c in chunks),
+        },
+    )
+
+    def paragraphs(response, name):
+        doc = Document(BytesIO(base64.b64decode(response.json()[name])))
+        return [[(run.text, run.style.name) for run in p.runs] for p in doc.paragraphs]
+
+    assert finalized.json()["error"] is None
+    for name in ("clean_doc", "diff_doc"):
+        assert paragraphs(finalized, name) == paragraphs(generated, name)
+    assert (await client.post(f"/sessions/{session_id}/finalize")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_diff_session_missing_chunks(client):
+    session_id = (await client.post("/sessions", json={})).json()["session_id"]
+    await client.post(
+        f"/sessions/{session_id}/chunks", json={"index": 1, "original": "a", "corrected": "b"}
+    )
+
+    response = await client.post(f"/sessions/{session_id}/finalize", json={"total_chunks": 3})
+
+    assert response.json()["error"] == "Missing chunks: 0, 2"
+    assert (await client.delete(f"/sessions/{session_id}")).status_code == 204
+    assert (await client.delete(f"/sessions/{session_id}")).status_code == 404
+
+
+def _hold(monkeypatch, task: str) -> asyncio.Event:
+    """Make pool calls of ``task`` wait until the returned event is set."""
+    release = asyncio.Event()
+    run = executor.run
+
+    async def held(fn, *args):
+        if fn.__name__ == task:
+            await release.wait()
+        return await run(fn, *args)
+
+    monkeypatch.setattr(executor, "run", held)
+    return release
+
+
+@pytest.mark.asyncio
+async def test_diff_session_chunk_finished_after_close_is_404(client, monkeypatch):
+    session_id = (await client.post("/sessions", json={})).json()["session_id"]
+    release = _hold(monkeypatch, "diff_chunk")
+    chunk = asyncio.ensure_future(
+        client.post(
+            f"/sessions/{session_id}/chunks", json={"index": 0, "original": "a", "corrected": "b"}
+        )
+    )
+    await asyncio.sleep(0.05)
+
+    await client.delete(f"/sessions/{session_id}")
+    release.set()
+
+    assert (await chunk).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_diff_session_chunk_during_finalize_is_409(client, monkeypatch):
+    session_id = (await client.post("/sessions", json={})).json()["session_id"]
+    await client.post(
+        f"/sessions/{session_id}/chunks", json={"index": 0, "original": "a", "corrected": "b"}
+    )
+    release = _hold(monkeypatch, "write_documents")
+    finalize = asyncio.ensure_future(client.post(f"/sessions/{session_id}/finalize"))
+    await asyncio.sleep(0.05)
+
+    late = await client.post(
+        f"/sessions/{session_id}/chunks", json={"index": 1, "original": "c", "corrected": "d"}
+    )
+    release.set()
+
+    assert late.status_code == 409
+    assert (await finalize).json()["clean_doc"]
+
+
+@pytest.mark.asyncio
+async def test_diff_session_unknown(client):
+    response = await client.post(
+        "/sessions/nope/chunks", json={"index": 0, "original": "a", "corrected": "b"}
+    )
+
+    assert response.status_code == 404
+
+
+def b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+@pytest.mark.asyncio
+async def test_parse_batch_in_order(client):
+    items = [
+        {"file_content": b64("Первый".encode()), "file_type": "txt"},
+        {"file_content": b64(b""), "file_type": "txt"},
+        {"file_content": b64(b"%PDF-"), "file_type": "pdf"},
+        {"file_content": b64("Четвёртый".encode()), "file_type": "md"},
+    ]
+
+    response = await client.post("/parse/batch", json={"items": items})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["text"] for r in results] == ["Первый", "", "", "Четвёртый"]
+    assert results[0]["error"] is None
+    assert "empty" in results[1]["error"].lower()
+    assert "Cannot parse PDF" in results[2]["error"]
+
+
+@pytest.mark.asyncio
+async def test_parse_batch_of_pdfs_waits_for_pool_slots(client, make_pdf, monkeypatch):
+    # Each PDF fans out into two page ranges, so two items at once need more than the 3 slots
+    monkeypatch.setattr(settings, "pdf_pages_per_task", 1)
+    monkeypatch.setattr(executor, "max_workers", 2)
+    monkeypatch.setattr(executor, "queue_size", 1)
+    pdfs = [make_pdf([f"Batch {i} page {page}" for page in range(4)]) for i in range(6)]
+
+    response = await client.post(
+        "/parse/batch",
+        json={"items": [{"file_content": b64(pdf), "file_type": "pdf"} for pdf in pdfs]},
+    )
+
+    results = response.json()["results"]
+    assert [r["error"] for r in results] == [None] * 6
+    assert [r["text"].split("\n")[0] for r in results] == [f"Batch {i} page 0" for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_parse_batch_ndjson(client):
+    items = [{"file_content": b64(f"Файл {i}".encode()), "file_type": "txt"} for i in range(5)]
+
+    response = await client.post(
+        "/parse/batch", json={"items": items}, headers={"Accept": "application/x-ndjson"}
+    )
+
+    records = read_ndjson(response)
+    assert sorted((r["index"], r["text"]) for r in records) == [(i, f"Файл {i}") for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_generate_batch(client):
+    items = [
+        {"original": "Hello world", "corrected": "Hello beautiful world"},
+        {"original": "", "corrected": ""},
+        {"original": "Привет", "corrected": "Привет!"},
+    ]
+
+    response = await client.post("/generate/batch", json={"items": items})
+
+    results = response.json()["results"]
+    assert [r["error"] is None for r in results] == [True, False, True]
+    doc = Document(BytesIO(base64.b64decode(results[2]["clean_doc"])))
+    assert doc.paragraphs[0].text == "Привет!"
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limit(client, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_items", 2)
+    items = [{"original": "a", "corrected": "b"}] * 3
+
+    response = await client.post("/generate/batch", json={"items": items})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_metrics(client):
+    content = b64("Метрики".encode())
+    await client.post("/parse", json={"file_content": content, "file_type": "txt"})
+    await client.post("/generate", json={"original": "один два", "corrected": "один три"})
+    await client.delete("/sessions/unknown")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'worker_parse_stage_seconds_count{stage="decode",file_type="txt"}' in body
+    assert 'worker_parse_stage_seconds_count{stage="extract",file_type="txt"}' in body
+    assert 'worker_parse_input_bytes_count{file_type="txt"}' in body
+    for stage in ("diff", "write_clean", "write_diff", "encode"):
+        assert f'worker_generate_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'worker_generate_output_bytes_count{document="diff"}' in body
+    assert 'worker_task_seconds_count{task="generate_documents"}' in body
+    assert 'handler="/sessions/{session_id}",status="404"' in body
+    assert "worker_executor_queue_depth 0" in body
+    assert "worker_http_requests_in_flight 1" in body
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import time
+
+from app.services.parser_service import ParserService
+from benchmarks.corpus import make_pair, make_text, to_pdf
+from benchmarks.load import Outcome, saturated, summarize, tree_rss_mb
+from benchmarks.run import Result, compare, percentile
+
+
+def _result(p50_ms: float, rss_growth_mb: float = 0.0) -> Result:
+    return Result("diff/rewrite/1", 10, p50_ms, p50_ms, 1.0, 50.0, rss_growth_mb)
+
+
+class TestCorpus:
+    def test_deterministic(self):
+        assert make_text(3) == make_text(3)
+        assert make_text(3, seed=1) != make_text(3)
+        assert make_pair(make_text(3), "rewrite") == make_pair(make_text(3), "rewrite")
+
+    def test_moves_keep_paragraphs(self):
+        pair = make_pair(make_text(5), "moves")
+        assert pair.corrected != pair.original
+        assert sorted(pair.corrected.split("\n")) == sorted(pair.original.split("\n"))
+
+    def test_fact_swaps_are_reported(self):
+        pair = make_pair(make_text(10), "facts")
+        assert pair.fact_changes
+        for fact in pair.fact_changes:
+            assert fact["original"] in pair.original
+            assert fact["corrected"] in pair.corrected
+
+    def test_pdf_text_is_extractable(self):
+        text = make_text(2)
+        result = ParserService().extract(to_pdf(text, 2), "pdf")
+        assert len(result.pages) == 2
+        assert result.text.split() == text.split()
+
+
+class TestCompare:
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile([3.0], 0.99) == 3
+
+    def test_slowdown_beyond_threshold_regresses(self):
+        baseline = {"diff/rewrite/1": {"p50_ms": 10.0, "rss_growth_mb": 0.0}}
+        assert compare([_result(12.0)], baseline, threshold=0.25) == []
+        assert compare([_result(13.0)], baseline, threshold=0.25)
+
+    def test_small_absolute_changes_are_noise(self):
+        baseline = {"diff/rewrite/1": {"p50_ms": 0.1, "rss_growth_mb": 0.5}}
+        assert compare([_result(0.5, rss_growth_mb=3.0)], baseline, threshold=0.25) == []
+        assert len(compare([_result(5.0, rss_growth_mb=10.0)], baseline, threshold=0.25)) == 2
+
+    def test_unknown_cases_are_skipped(self):
+        assert compare([_result(100.0)], {}, threshold=0.25) == []
+
+
+class TestLoad:
+    def test_tree_rss_includes_children(self):
+        own = tree_rss_mb(os.getpid())
+        with subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"]) as child:
+            try:
+                time.sleep(0.2)
+                assert tree_rss_mb(os.getpid()) > own
+            finally:
+                child.kill()
+
+    def test_saturation(self):
+        outcomes = [Outcome("parse/txt", 0.1, 200)] * 9 + [
+            Outcome("parse/txt", 8.0, 503, "HTTP 503")
+        ]
+        step = summarize(2, 5, outcomes, elapsed=5, rss=100, base=90)
+        assert step.offered_rps == 2 and step.completed_rps == 1.8
+        assert step.error_rate == 0.1 and step.rejected_rate == 0.1
+        assert step.rss_growth_mb == 10
+        assert saturated(step, slo_ms=10_000, max_error_rate=0.01)
+        assert not saturated(step, slo_ms=10_000, max_error_rate=0.2)
+        # Responses finishing long after the step ended mean the worker fell behind
+        late = summarize(2, 5, [Outcome("parse/txt", 0.1, 200)] * 10, elapsed=20, rss=0, base=0)
+        assert saturated(late, slo_ms=10_000, max_error_rate=0.01)
@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from app.services.cache import ResultCache
+
+
+class TestResultCache:
+    def test_get_put(self):
+        cache = ResultCache(max_bytes=100)
+        cache.put("a", b"12345")
+
+        assert cache.get("a") == b"12345"
+        assert cache.get("b") is None
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries, stats.size_bytes) == (1, 1, 1, 5)
+
+    def test_evicts_least_recently_used_by_size(self):
+        cache = ResultCache(max_bytes=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")
+        cache.put("c", b"1234")
+
+        assert cache.get("a") == b"1234"
+        assert cache.get("b") is None
+        assert cache.get("c") == b"1234"
+        assert cache.stats().evictions == 1
+
+    def test_skips_values_larger_than_budget(self):
+        cache = ResultCache(max_bytes=4)
+        cache.put("a", b"12345")
+
+        assert cache.get("a") is None
+
+    def test_disabled_with_zero_budget(self):
+        cache = ResultCache(max_bytes=0)
+        cache.put("a", b"1")
+
+        assert cache.get("a") is None
+        assert cache.stats().misses == 0
+
+    def test_ttl_expiry(self, monkeypatch):
+        now = time.monotonic()
+        cache = ResultCache(max_bytes=100, ttl_seconds=10)
+        cache.put("a", b"1")
+
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+        assert cache.get("a") is None
+        assert cache.stats().entries == 0
+
+    def test_spills_to_disk_and_promotes_back(self, tmp_path):
+        cache = ResultCache(max_bytes=8, disk_dir=tmp_path, disk_max_bytes=1024)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.flush()
+
+        assert cache.stats().disk_entries == 1
+        assert cache.get("a") == b"12345"
+        assert cache.stats().disk_hits == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        cache = ResultCache(max_bytes=8, disk_dir=tmp_path, disk_max_bytes=1024)
+        cache.put("a", "текст")
+        cache.put("b", "текст")
+        cache.flush()
+
+        restarted = ResultCache(max_bytes=8, disk_dir=tmp_path, disk_max_bytes=1024)
+
+        assert restarted.get("a") == "текст"
+
+    @pytest.mark.parametrize("disk_max_bytes", [0, 4])
+    def test_disk_budget(self, tmp_path, disk_max_bytes):
+        cache = ResultCache(max_bytes=8, disk_dir=tmp_path, disk_max_bytes=disk_max_bytes)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.flush()
+
+        assert cache.stats().disk_entries == 0
+        assert cache.get("a") is None
+
+    def test_evicted_entry_is_served_before_it_is_written(self, tmp_path, monkeypatch):
+        cache = ResultCache(max_bytes=8, disk_dir=tmp_path, disk_max_bytes=1024)
+        writes = []
+        monkeypatch.setattr(cache._spiller, "submit", lambda *call: writes.append(call))
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+
+        assert cache.get("a") == b"12345"
+        for fn, *args in writes:
+            fn(*args)
+        # "a" was promoted, so its late write is dropped; "b", evicted by the promotion, is kept
+        assert [f.name for f in tmp_path.iterdir()] == [cache._disk_path("b").name]
+        assert cache.stats().disk_entries == 1
+
+    def test_clear_empties_disk_tier(self, tmp_path):
+        cache = ResultCache(max_bytes=8, disk_dir=tmp_path, disk_max_bytes=1024)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+
+        cache.clear()
+
+        assert cache.get("a") is None
+        assert cache.stats().disk_entries == 0
+        assert list(tmp_path.iterdir()) == []
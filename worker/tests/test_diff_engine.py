@@ -0,0 +1,159 @@
+import random
+
+import pytest
+
+from app.services.diff_engine import (
+    DifflibEngine,
+    MyersEngine,
+    SimilarityMatcher,
+    create_engine,
+)
+
+
+def apply_opcodes(a, b, opcodes):
+    result = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert list(a[i1:i2]) == list(b[j1:j2])
+            result.extend(a[i1:i2])
+        else:
+            assert tag in {"delete", "insert", "replace"}
+            result.extend(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return result
+
+
+def lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def matched(opcodes):
+    return sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal")
+
+
+class TestMyersEngine:
+    @pytest.mark.parametrize(
+        ("a", "b"),
+        [
+            ("", ""),
+            ("abc", ""),
+            ("", "abc"),
+            ("abc", "abc"),
+            ("abcabba", "cbabac"),
+            ("Привет мир", "Привет, прекрасный мир"),
+        ],
+    )
+    def test_opcodes_transform_a_into_b(self, a, b):
+        opcodes = MyersEngine().get_opcodes(a, b)
+
+        assert "".join(apply_opcodes(a, b, opcodes)) == b
+        assert matched(opcodes) == lcs_length(a, b)
+
+    def test_matches_difflib_on_empty_and_identical_inputs(self):
+        myers, difflib = MyersEngine(), DifflibEngine()
+
+        for a, b in [("", ""), ("same", "same"), ("abc", ""), ("", "abc")]:
+            assert myers.get_opcodes(a, b) == difflib.get_opcodes(a, b)
+
+    def test_random_sequences_are_minimal(self):
+        rng = random.Random(7)
+        engine = MyersEngine()
+        for _ in range(300):
+            a = [rng.choice("abc") for _ in range(rng.randint(0, 12))]
+            b = [rng.choice("abc") for _ in range(rng.randint(0, 12))]
+
+            opcodes = engine.get_opcodes(a, b)
+
+            assert apply_opcodes(a, b, opcodes) == b
+            assert matched(opcodes) == lcs_length(a, b)
+
+    def test_falls_back_to_difflib_past_max_d(self):
+        rng = random.Random(3)
+        a = [rng.choice("abcd") for _ in range(200)]
+        b = [rng.choice("abcd") for _ in range(200)]
+
+        opcodes = MyersEngine(max_d=2).get_opcodes(a, b)
+
+        assert apply_opcodes(a, b, opcodes) == b
+
+    def test_long_sequence_with_few_edits(self):
+        a = [f"word{i % 50} " for i in range(100_000)]
+        b = list(a)
+        b[500] = "changed "
+        del b[70_000]
+
+        opcodes = MyersEngine().get_opcodes(a, b)
+
+        assert [tag for tag, *_ in opcodes] == ["equal", "replace", "equal", "delete", "equal"]
+
+    def test_bounded_search_matches_full_search(self):
+        rng = random.Random(11)
+        engine = MyersEngine()
+        for _ in range(300):
+            a = [rng.choice("abc") for _ in range(rng.randint(0, 12))]
+            b = [rng.choice("abc") for _ in range(rng.randint(0, 12))]
+            edits = len(a) + len(b) - 2 * lcs_length(a, b)
+
+            assert engine.get_opcodes_within(a, b, edits) == engine.get_opcodes(a, b)
+            assert engine.get_opcodes_within(a, b, edits - 1) is None
+
+    def test_bounded_search_past_max_d(self):
+        # Past max_d the difflib fallback's edits are checked against the bound afterwards
+        a = list("abcd" * 10)
+        b = list("dcba" * 10)
+        engine = MyersEngine(max_d=2)
+
+        assert apply_opcodes(a, b, engine.get_opcodes_within(a, b, len(a) + len(b))) == b
+        assert engine.get_opcodes_within(a, b, 5) is None
+
+
+class TestSimilarityMatcher:
+    def test_similar_words_get_character_opcodes(self):
+        opcodes = SimilarityMatcher(0.6).opcodes("документ", "документы")
+        assert opcodes == [("equal", 0, 8, 0, 8), ("insert", 8, 8, 8, 9)]
+
+    def test_threshold_is_exclusive(self):
+        # LCS "abc": ratio 2 * 3 / 10 = 0.6
+        assert SimilarityMatcher(0.6).opcodes("abcde", "abcxy") is None
+        assert SimilarityMatcher(0.59).opcodes("abcde", "abcxy") is not None
+
+    @pytest.mark.parametrize(
+        "a, b",
+        [
+            ("а", "абвгдежзик"),  # length bound
+            ("абвгд", "еёжзи"),  # no shared characters
+            ("абвгде", "едгвба"),  # same characters, reversed
+        ],
+    )
+    def test_dissimilar_pairs(self, a, b):
+        assert SimilarityMatcher(0.6).opcodes(a, b) is None
+
+    def test_agrees_with_lcs_ratio(self):
+        rng = random.Random(5)
+        matcher = SimilarityMatcher(0.6)
+        for _ in range(300):
+            a = "".join(rng.choice("абв") for _ in range(rng.randint(1, 10)))
+            b = "".join(rng.choice("абв") for _ in range(rng.randint(1, 10)))
+            similar = 2 * lcs_length(a, b) / (len(a) + len(b)) > 0.6
+
+            opcodes = matcher.opcodes(a, b)
+
+            assert (opcodes is not None) == similar
+            if similar:
+                assert "".join(apply_opcodes(a, b, opcodes)) == b
+
+
+def test_create_engine():
+    assert isinstance(create_engine("myers"), MyersEngine)
+    assert isinstance(create_engine("difflib"), DifflibEngine)
+    with pytest.raises(ValueError):
+        create_engine("patience")
@@ -5,7 +5,10 @@ import pytest
 from docx import Document
 
 from app.models.requests import FactChange
-from app.services.diff_service import DiffService
+from app.services.diff_engine import DifflibEngine
+from app.services.diff_service import DiffService, cache_key
+from app.services.docx_writer import PythonDocxWriter
+from app.services.facts import FactMatcher
 
 
 @pytest.fixture
@@ -130,3 +133,132 @@ class TestDiffService:
         paragraphs = [p.text for p in clean_doc.paragraphs]
         assert len(paragraphs) == 3
         assert "Second." in paragraphs
+
+    def test_render_returns_raw_docx(self, diff_service):
+        clean_bytes, diff_bytes = diff_service.render("Hello world", "Hello there")
+
+        assert clean_bytes.startswith(b"PK")
+        assert diff_bytes.startswith(b"PK")
+        clean_doc = Document(BytesIO(clean_bytes))
+        assert clean_doc.paragraphs[0].text == "Hello there"
+
+    def test_cache_key_normalizes_fact_changes(self):
+        facts = [
+            FactChange(original="Дональд Трамп", corrected="Илон Маск", context="Глава Tesla"),
+            FactChange(original="2020", corrected="2021", context="год"),
+        ]
+        reordered = [
+            FactChange(original="2020", corrected="2021", context="другой контекст"),
+            FactChange(original="дональд трамп", corrected="илон маск", context="Глава Tesla"),
+        ]
+
+        key = cache_key("a", "b", facts)
+        assert key == cache_key("a", "b", reordered)
+        assert key != cache_key("a", "b")
+        assert cache_key("ab", "c") != cache_key("a", "bc")
+
+    def test_difflib_engine(self):
+        service = DiffService(engine=DifflibEngine())
+
+        clean_bytes, diff_bytes = service.render("First.\nSecond.", "First!\nSecond.")
+
+        diff_doc = Document(BytesIO(diff_bytes))
+        assert [p.text for p in diff_doc.paragraphs][1] == "Second."
+
+    def test_python_docx_writer_matches_stream_writer(self, diff_service):
+        original = "Первый абзац.\nВторой абзац с ошибкой."
+        corrected = "Первый абзац.\nВторой абзац исправлен.\nТретий."
+        reference = DiffService(writer=PythonDocxWriter())
+
+        for stream_doc, docx_doc in zip(
+            diff_service.render(original, corrected),
+            reference.render(original, corrected),
+            strict=True,
+        ):
+            stream_text = [p.text for p in Document(BytesIO(stream_doc)).paragraphs]
+            docx_text = [p.text for p in Document(BytesIO(docx_doc)).paragraphs]
+            assert stream_text == docx_text
+
+    def test_adjacent_runs_with_same_style_are_merged(self, diff_service):
+        runs = diff_service._inserted_paragraph("новый абзац текста", FactMatcher([]))
+
+        assert runs == [("новый абзац текста", "added")]
+
+    def test_diff_runs_are_coalesced(self, diff_service):
+        (runs,) = diff_service._diff_paragraphs(
+            "Кот сидит на окне", "Кот спит на тёплом окне у батареи"
+        )
+
+        styles = [style for _, style in runs]
+        assert all(a != b for a, b in zip(styles, styles[1:]))
+        assert "".join(text for text, style in runs if style != "deleted") == (
+            "Кот спит на тёплом окне у батареи"
+        )
+
+    def test_split_paragraph_keeps_later_paragraphs_aligned(self, diff_service):
+        original = (
+            "Отдел разработки представил план внедрения новой системы контроля качества.\n"
+            "Руководитель проекта предложил сократить сроки поставки оборудования."
+        )
+        corrected = (
+            "Отдел разработки представил план.\n"
+            "Он касается внедрения новой системы контроля качества.\n"
+            "Руководитель проекта предложил сократить сроки поставки оборудования!"
+        )
+
+        paragraphs = list(diff_service._diff_paragraphs(original, corrected))
+
+        assert len(paragraphs) == 3
+        # One part of the split is paired with the original, the other is inserted
+        assert [("Отдел разработки представил план.", "added")] in paragraphs[:2]
+        # The last paragraphs are diffed with each other, not against the split part
+        assert paragraphs[2][0] == (
+            "Руководитель проекта предложил сократить сроки поставки оборудования",
+            None,
+        )
+
+    def test_multi_word_fact_is_highlighted(self, diff_service):
+        fact_changes = [
+            FactChange(original="Дональд Трамп", corrected="Илон Маск", context="Глава Tesla")
+        ]
+
+        (runs,) = diff_service._diff_paragraphs(
+            "Глава Tesla Дональд Трамп объявил о новом продукте.",
+            "Глава Tesla Илон  Маск объявил о новом продукте.",
+            fact_changes,
+        )
+
+        assert runs == [
+            ("Глава Tesla ", None),
+            ("Дональд Трамп Илон  Маск ", "fact"),
+            ("объявил о новом продукте.", None),
+        ]
+
+    def test_edits_next_to_a_fact_keep_their_styles(self, diff_service):
+        fact_changes = [FactChange(original="Трамп", corrected="Маск", context="")]
+
+        (runs,) = diff_service._diff_paragraphs(
+            "Вчера Трамп сказал, что всё готово.",
+            "Сегодня Маск заявил, что всё готово.",
+            fact_changes,
+        )
+
+        assert runs == [
+            ("Вчера ", "deleted"),
+            ("Трамп ", "fact"),
+            ("сказал, ", "deleted"),
+            ("Сегодня ", "added"),
+            ("Маск ", "fact"),
+            ("заявил, ", "added"),
+            ("что всё готово.", None),
+        ]
+
+    def test_inserted_paragraph_highlights_fact(self, diff_service):
+        fact_changes = [FactChange(original="2019", corrected="в 2020 году", context="")]
+
+        runs = list(
+            diff_service._diff_paragraphs("Первый.", "Первый.\nЭто было в 2020 году.", fact_changes)
+        )
+
+        # Highlighting is by word, so the trailing punctuation goes with the fact
+        assert runs[1] == [("Это было ", "added"), ("в 2020 году.", "fact")]
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from app.models.requests import FactChange
+from app.services.diff_service import DiffService
+from app.services.diff_session import DiffSession, SessionLimitError, SessionStore
+
+CHUNKS = [
+    (
+        "Глава Tesla Илон Маск объявил о запуске.\nВторая строка.",
+        "Глава Tesla Дональд Трамп объявил о запуске.\nВторая строка.",
+    ),
+    ("Средний абзац без ошибок.", "Средний абзац без ошибок."),
+    ("Последний абзатс.", "Последний абзац."),
+]
+
+
+@pytest.mark.parametrize("separator", ["\n\n", "\n", " ", "\n-\n"])
+def test_joined_chunks_match_full_diff(separator):
+    service = DiffService()
+    facts = [FactChange(original="Илон Маск", corrected="Дональд Трамп", context="")]
+    session = DiffSession("s", separator)
+    for index, (original, corrected) in reversed(list(enumerate(CHUNKS))):
+        session.add(index, *service.diff_runs(original, corrected, facts))
+
+    clean, diff = session.paragraphs()
+    expected_clean, expected_diff = service.diff_runs(
+        separator.join(o for o, _ in CHUNKS), separator.join(c for _, c in CHUNKS), facts
+    )
+    assert list(clean) == expected_clean
+    assert list(diff) == expected_diff
+
+
+def test_missing_chunks():
+    session = DiffSession("s")
+    session.add(0, [], [])
+    session.add(3, [], [])
+
+    assert session.missing() == [1, 2]
+    assert session.missing(total=5) == [1, 2, 4]
+
+
+class TestSessionStore:
+    def test_open_and_get(self):
+        store = SessionStore(max_sessions=2, ttl_seconds=60)
+
+        session = store.open(separator="\n")
+
+        assert store.get(session.session_id) is session
+        assert store.close(session.session_id) is session
+        assert store.get(session.session_id) is None
+
+    def test_limit(self):
+        store = SessionStore(max_sessions=1, ttl_seconds=60)
+        store.open()
+
+        with pytest.raises(SessionLimitError):
+            store.open()
+
+    def test_expired_sessions_are_dropped(self):
+        store = SessionStore(max_sessions=1, ttl_seconds=0.05)
+        session = store.open()
+        time.sleep(0.1)
+
+        assert store.get(session.session_id) is None
+        store.open()
+        assert len(store) == 1
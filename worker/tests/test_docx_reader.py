@@ -0,0 +1,125 @@
+import zipfile
+from io import BytesIO
+
+import pytest
+from docx import Document
+
+from app.services.docx_reader import iter_docx_blocks
+from app.services.parser_service import CorruptedFileError, EmptyFileError, ParserService
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def save(doc) -> bytes:
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def with_body(body_xml: str) -> bytes:
+    """A docx whose document.xml body is ``body_xml``."""
+    source = zipfile.ZipFile(BytesIO(save(Document())))
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as package:
+        for name in source.namelist():
+            if name == "word/document.xml":
+                package.writestr(
+                    name, f'<w:document xmlns:w="{W_NS}"><w:body>{body_xml}</w:body></w:document>'
+                )
+            else:
+                package.writestr(name, source.read(name))
+    return buffer.getvalue()
+
+
+def texts(data: bytes) -> list[str]:
+    return [text for _, text in iter_docx_blocks(BytesIO(data))]
+
+
+def test_tables_stay_in_body_order():
+    doc = Document()
+    doc.add_paragraph("До таблицы")
+    table = doc.add_table(rows=2, cols=2)
+    for i, row in enumerate(table.rows):
+        for j, cell in enumerate(row.cells):
+            cell.text = f"{i}{j}"
+    doc.add_paragraph("После таблицы")
+
+    assert texts(save(doc)) == ["До таблицы", "00\t01", "10\t11", "После таблицы"]
+
+
+def test_merged_cells_are_read_once():
+    doc = Document()
+    table = doc.add_table(rows=3, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1)).text = "шапка"
+    table.cell(0, 2).text = "справа"
+    table.cell(1, 0).merge(table.cell(2, 0)).text = "слева"
+
+    assert texts(save(doc)) == ["шапка\tсправа", "слева\t\t", "\t\t"]
+
+
+def test_nested_table_becomes_lines_of_outer_cell():
+    doc = Document()
+    outer = doc.add_table(rows=1, cols=2)
+    outer.cell(0, 0).text = "внешняя"
+    inner = outer.cell(0, 1).add_table(rows=2, cols=1)
+    inner.cell(0, 0).text = "a"
+    inner.cell(1, 0).text = "b"
+
+    assert texts(save(doc)) == ["внешняя\t\na\nb\n"]
+
+
+def test_run_content_matches_python_docx():
+    body = (
+        "<w:p><w:pPr><w:tabs><w:tab w:val='left' w:pos='720'/></w:tabs></w:pPr>"
+        "<w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t>"
+        "<w:br w:type='page'/><w:noBreakHyphen/><w:cr/></w:r>"
+        "<w:hyperlink><w:r><w:t xml:space='preserve'> ссылка</w:t></w:r></w:hyperlink></w:p>"
+    )
+    data = with_body(body)
+
+    assert texts(data) == [Document(BytesIO(data)).paragraphs[0].text]
+
+
+def test_skips_deleted_text_and_text_boxes():
+    body = (
+        "<w:p><w:r><w:t>видно</w:t></w:r>"
+        "<w:del><w:r><w:tab/><w:delText>удалено</w:delText></w:r></w:del>"
+        "<w:ins><w:r><w:t> вставлено</w:t></w:r></w:ins>"
+        "<w:r><w:drawing><w:txbxContent><w:p><w:r><w:t>надпись</w:t></w:r></w:p>"
+        "</w:txbxContent></w:drawing></w:r></w:p>"
+        "<w:sdt><w:sdtContent><w:p><w:r><w:t>в элементе управления</w:t></w:r></w:p>"
+        "</w:sdtContent></w:sdt>"
+    )
+
+    assert texts(with_body(body)) == ["видно вставлено", "в элементе управления"]
+
+
+def test_matches_python_docx_engine_without_tables():
+    doc = Document()
+    for i in range(50):
+        doc.add_paragraph(f"Абзац {i}\tс табом")
+    data = save(doc)
+
+    fast = ParserService(docx_engine="iterparse").extract(data, "docx").text
+    slow = ParserService(docx_engine="python-docx").extract(data, "docx").text
+    assert fast == slow
+
+
+class TestParserServiceEngines:
+    @pytest.mark.parametrize("engine", ["iterparse", "python-docx"])
+    def test_corrupted_docx(self, engine):
+        with pytest.raises(CorruptedFileError):
+            ParserService(docx_engine=engine).extract(b"PK\x03\x04 broken", "docx")
+
+    @pytest.mark.parametrize("engine", ["iterparse", "python-docx"])
+    def test_empty_docx(self, engine):
+        with pytest.raises(EmptyFileError):
+            ParserService(docx_engine=engine).extract(save(Document()), "docx")
+
+    def test_broken_xml(self):
+        with pytest.raises(CorruptedFileError):
+            ParserService().extract(with_body("<w:p><w:r><w:t>oops</w:r></w:p>"), "docx")
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            ParserService(docx_engine="antiword")
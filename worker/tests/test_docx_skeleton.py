@@ -0,0 +1,58 @@
+import zipfile
+from io import BytesIO
+
+import pytest
+from docx import Document
+from docx.shared import Pt
+
+from app.services.docx_skeleton import DOCUMENT_PART, DocxSkeleton
+from app.services.docx_writer import PythonDocxWriter, StreamingDocxWriter
+
+
+@pytest.fixture
+def house_template(tmp_path):
+    doc = Document()
+    doc.styles["Normal"].font.name = "Times New Roman"
+    doc.styles["Normal"].font.size = Pt(14)
+    doc.add_paragraph("Шаблонный текст, который не должен попасть в документ")
+    path = tmp_path / "house.docx"
+    doc.save(path)
+    return path
+
+
+def test_default_template_has_empty_body():
+    skeleton = DocxSkeleton.load()
+
+    assert DOCUMENT_PART not in zipfile.ZipFile(BytesIO(skeleton.package)).namelist()
+    assert b"<w:p>" not in skeleton.document_head + skeleton.document_tail
+    assert b"<w:sectPr" in skeleton.document_tail
+    assert skeleton.new_document().paragraphs == []
+
+
+def test_new_document_is_independent_copy():
+    skeleton = DocxSkeleton.load()
+
+    skeleton.new_document().add_paragraph("первый")
+
+    assert skeleton.new_document().paragraphs == []
+
+
+def test_invalid_template():
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as package:
+        package.writestr("hello.txt", "not a docx")
+
+    with pytest.raises(ValueError):
+        DocxSkeleton(buffer.getvalue())
+
+
+@pytest.mark.parametrize("writer_class", [PythonDocxWriter, StreamingDocxWriter])
+def test_writers_use_house_template(writer_class, house_template):
+    writer = writer_class(DocxSkeleton.load(house_template))
+
+    doc = Document(BytesIO(writer.write([[("текст", "added")]])))
+
+    assert [p.text for p in doc.paragraphs] == ["текст"]
+    assert doc.styles["Normal"].font.name == "Times New Roman"
+    assert doc.styles["Normal"].font.size == Pt(14)
+    assert doc.paragraphs[0].runs[0].style.name == "Added"
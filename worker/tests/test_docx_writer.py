@@ -0,0 +1,79 @@
+from io import BytesIO
+
+import pytest
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.ns import qn
+from docx.shared import RGBColor
+
+from app.services.docx_writer import (
+    PythonDocxWriter,
+    StreamingDocxWriter,
+    create_writer,
+)
+
+PARAGRAPHS = [
+    [("Глава Tesla ", None), ("Дональд Трамп", "fact"), (" объявил", None)],
+    [],
+    [("удалено ", "deleted"), ("добавлено", "added")],
+    [("a < b & c\tтаб", None)],
+]
+
+
+def read(data: bytes) -> Document:
+    return Document(BytesIO(data))
+
+
+@pytest.mark.parametrize("writer", [PythonDocxWriter(), StreamingDocxWriter()])
+class TestWriters:
+    def test_paragraph_text(self, writer):
+        doc = read(writer.write(PARAGRAPHS))
+
+        assert [p.text for p in doc.paragraphs] == [
+            "Глава Tesla Дональд Трамп объявил",
+            "",
+            "удалено добавлено",
+            "a < b & c\tтаб",
+        ]
+
+    def test_runs_reference_character_styles(self, writer):
+        doc = read(writer.write(PARAGRAPHS))
+
+        fact = doc.paragraphs[0].runs[1]
+        deleted, added = doc.paragraphs[2].runs
+        assert fact.style.name == "Fact"
+        assert deleted.style.name == "Deleted"
+        assert added.style.name == "Added"
+        assert added.font.color.rgb is None
+        assert doc.paragraphs[0].runs[0].style.name == "Default Paragraph Font"
+
+    def test_character_styles_defined_once(self, writer):
+        doc = read(writer.write(PARAGRAPHS))
+
+        added = doc.styles["Added"]
+        assert added.type == WD_STYLE_TYPE.CHARACTER
+        assert added.font.color.rgb == RGBColor(0x00, 0x50, 0x00)
+        assert added.element.rPr.find(qn("w:shd")).get(qn("w:fill")) == "00FF00"
+        assert doc.styles["Deleted"].element.rPr.find(qn("w:shd")).get(qn("w:fill")) == "FF0000"
+        assert doc.styles["Fact"].element.rPr.find(qn("w:shd")).get(qn("w:fill")) == "FFFF00"
+
+
+class TestStreamingDocxWriter:
+    def test_accepts_generator(self):
+        paragraphs = ([(f"Абзац {i}", None)] for i in range(3))
+
+        doc = read(StreamingDocxWriter().write(paragraphs))
+
+        assert [p.text for p in doc.paragraphs] == ["Абзац 0", "Абзац 1", "Абзац 2"]
+
+    def test_strips_characters_invalid_in_xml(self):
+        doc = read(StreamingDocxWriter().write([[("a\x00b\x0bc", None)]]))
+
+        assert doc.paragraphs[0].text == "abc"
+
+
+def test_create_writer():
+    assert isinstance(create_writer("stream"), StreamingDocxWriter)
+    assert isinstance(create_writer("python-docx"), PythonDocxWriter)
+    with pytest.raises(ValueError):
+        create_writer("odt")
@@ -0,0 +1,83 @@
+import codecs
+
+import pytest
+
+from app.services.encoding import decode, detect, iter_decode
+
+TEXT = (
+    "Съешь же ещё этих мягких французских булок, да выпей чаю.\n"
+    "В чащах юга жил бы цитрус? Да, но фальшивый экземпляр!"
+)
+
+
+class TestDetect:
+    @pytest.mark.parametrize(
+        "encoding", ["utf-8", "cp1251", "koi8-r", "mac-cyrillic", "utf-16-le", "utf-16-be"]
+    )
+    def test_cyrillic_encodings(self, encoding):
+        data = TEXT.encode(encoding)
+        detection = detect(data)
+        assert detection.encoding == encoding
+        assert detection.confidence >= 0.8
+        assert decode(data, detection) == TEXT
+
+    @pytest.mark.parametrize(
+        "bom, encoding",
+        [
+            (codecs.BOM_UTF8, "utf-8"),
+            (codecs.BOM_UTF16_LE, "utf-16-le"),
+            (codecs.BOM_UTF16_BE, "utf-16-be"),
+            (codecs.BOM_UTF32_LE, "utf-32-le"),
+        ],
+    )
+    def test_bom(self, bom, encoding):
+        data = bom + TEXT.encode(encoding)
+        detection = detect(data)
+        assert (detection.encoding, detection.confidence, detection.bom) == (
+            encoding,
+            1.0,
+            len(bom),
+        )
+        assert decode(data, detection) == TEXT
+
+    def test_ascii_is_utf8(self):
+        assert detect(b"plain text").encoding == "utf-8"
+
+    def test_sample_starts_at_first_non_ascii_byte(self):
+        data = b"x" * 1000 + "Привет, мир".encode("koi8-r")
+        assert detect(data, sample_size=100).encoding == "koi8-r"
+
+    def test_utf8_cut_at_sample_end(self):
+        data = ("я" * 100).encode()
+        assert detect(data, sample_size=51).encoding == "utf-8"
+
+    def test_short_text_has_lower_confidence(self):
+        short = detect("Привет".encode("cp1251"))
+        long = detect(TEXT.encode("cp1251"))
+        assert short.encoding == long.encoding == "cp1251"
+        assert short.confidence < long.confidence
+
+    @pytest.mark.parametrize("encoding", ["cp1251", "koi8-r"])
+    def test_capitals(self, encoding):
+        # Reading cp1251 capitals as KOI8-R gives lowercase letters, and the other way round
+        heading = "ИТОГИ ГОДА И ПЛАНЫ НА СЛЕДУЮЩИЙ ПЕРИОД РАБОТЫ КОМПАНИИ"
+        assert detect(heading.encode(encoding)).encoding == encoding
+        assert detect("ПРИВЕТ МИР".encode(encoding)).confidence < 0.5
+
+    def test_binary_noise_has_low_confidence(self):
+        noise = bytes(range(0x80, 0x100)) * 8
+        assert detect(noise).confidence < 0.5
+
+
+class TestDecode:
+    @pytest.mark.parametrize("encoding", ["utf-8", "utf-16-le", "koi8-r"])
+    def test_incremental_matches_whole(self, encoding):
+        data = (TEXT * 50).encode(encoding)
+        detection = detect(data)
+        chunks = list(iter_decode(data, detection, chunk_size=7))
+        assert len(chunks) > 1
+        assert "".join(chunks) == TEXT * 50
+
+    def test_invalid_bytes_are_replaced(self):
+        data = "Привет".encode() + b"\xff"
+        assert decode(data, detect(data, sample_size=4)) == "Привет�"
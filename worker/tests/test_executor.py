@@ -0,0 +1,123 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.executor import ExecutorBusyError, SharedBytes, TaskExecutor, share_bytes
+
+
+def _pid() -> int:
+    return os.getpid()
+
+
+def _read(source: SharedBytes) -> bytes:
+    return source.read()
+
+
+def _sleep(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def _count(n: int, delay: float):
+    for i in range(n):
+        yield i
+        time.sleep(delay)
+
+
+def _broken(n: int):
+    yield from range(n)
+    raise ValueError("broken generator")
+
+
+@pytest.fixture
+def pool():
+    executor = TaskExecutor(max_workers=1, queue_size=1)
+    yield executor
+    executor.shutdown()
+
+
+class TestTaskExecutor:
+    @pytest.mark.asyncio
+    async def test_runs_in_separate_process(self, pool):
+        pid = await pool.run(_pid)
+        assert pid != os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self, pool):
+        running = [asyncio.ensure_future(pool.run(_sleep, 0.5)) for _ in range(pool.capacity)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(ExecutorBusyError):
+            await pool.run(_sleep, 0)
+
+        assert await asyncio.gather(*running) == [0.5, 0.5]
+        assert pool.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_waiting_context_waits_for_a_free_slot(self, pool):
+        running = [asyncio.ensure_future(pool.run(_sleep, 0.2)) for _ in range(pool.capacity)]
+        await asyncio.sleep(0)
+
+        with pool.waiting():
+            waited = [asyncio.ensure_future(pool.run(_sleep, 0)) for _ in range(3)]
+        assert await asyncio.gather(*waited) == [0, 0, 0]
+
+        assert await asyncio.gather(*running) == [0.2, 0.2]
+        assert pool.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_items_as_they_are_produced(self, pool):
+        arrivals = []
+        async for i in pool.stream(_count, 4, 0.2):
+            arrivals.append((i, time.perf_counter()))
+
+        assert [i for i, _ in arrivals] == [0, 1, 2, 3]
+        assert arrivals[-1][1] - arrivals[0][1] > 0.4
+        assert pool.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_raises_generator_error_after_its_items(self, pool):
+        received = []
+        with pytest.raises(ValueError, match="broken generator"):
+            async for i in pool.stream(_broken, 5):
+                received.append(i)
+
+        assert received == [0, 1, 2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_stream_rejects_when_queue_is_full(self, pool):
+        running = [asyncio.ensure_future(pool.run(_sleep, 0.3)) for _ in range(pool.capacity)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(ExecutorBusyError):
+            await anext(pool.stream(_count, 1, 0))
+
+        await asyncio.gather(*running)
+
+    @pytest.mark.asyncio
+    async def test_stream_does_not_need_the_default_thread_pool(self, pool):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(1))
+        release = threading.Event()
+        blocked = asyncio.ensure_future(asyncio.to_thread(release.wait))
+        await asyncio.sleep(0)
+
+        received = [i async for i in pool.stream(_count, 3, 0)]
+
+        release.set()
+        await blocked
+        assert received == [0, 1, 2]
+
+    def test_defaults_to_cpu_count(self):
+        assert TaskExecutor().max_workers == (os.cpu_count() or 1)
+
+    @pytest.mark.asyncio
+    async def test_shared_bytes_reach_pool(self, pool):
+        data = "общие байты".encode() * 1000
+
+        with share_bytes(data) as source:
+            assert await pool.run(_read, source) == data
@@ -0,0 +1,69 @@
+from app.services.facts import FactMatcher, normalize, overlapping
+
+
+def _found(matcher: FactMatcher, text: str) -> list[str]:
+    return [text[start:end] for start, end in matcher.find(text)]
+
+
+class TestFactMatcher:
+    def test_finds_multi_word_phrase(self):
+        matcher = FactMatcher(["Дональд Трамп"])
+
+        assert _found(matcher, "Глава Tesla Дональд Трамп объявил") == ["Дональд Трамп"]
+
+    def test_ignores_case_and_whitespace(self):
+        matcher = FactMatcher(["  дональд   ТРАМП "])
+
+        assert _found(matcher, "ДОНАЛЬД  Трамп объявил") == ["ДОНАЛЬД  Трамп"]
+        assert _found(matcher, "Дональд\tТрамп") == ["Дональд\tТрамп"]
+
+    def test_finds_many_phrases_in_one_pass(self):
+        matcher = FactMatcher(["в 2019 году", "Москве", "2019", "Иван Петров"])
+        text = "Иван Петров переехал в Москве в 2019 году."
+
+        assert _found(matcher, text) == ["Иван Петров", "Москве", "в 2019 году"]
+
+    def test_phrase_inside_another_phrase(self):
+        matcher = FactMatcher(["петров", "иван петров иванович"])
+
+        assert _found(matcher, "Иван Петров Иванович и Петров") == [
+            "Иван Петров Иванович",
+            "Петров",
+        ]
+
+    def test_match_starts_at_word_boundary(self):
+        assert FactMatcher(["год"]).find("полугодие") == []
+
+    def test_phrase_ending_in_letter_matches_inflected_word(self):
+        matcher = FactMatcher(["Трамп"])
+
+        assert matcher.find("Трампа") == [(0, 5)]
+
+    def test_phrase_ending_in_digit_must_end_the_number(self):
+        matcher = FactMatcher(["2019"])
+
+        assert matcher.find("в 20190 раз") == []
+        assert matcher.find("в 2019, 2020") == [(2, 6)]
+
+    def test_expanding_casefold_keeps_offsets(self):
+        matcher = FactMatcher(["strasse"])
+
+        assert _found(matcher, "Große  Straße 5") == ["Straße"]
+        assert _found(FactMatcher(["große straße"]), "GROSSE  Straße 5") == ["GROSSE  Straße"]
+
+    def test_no_phrases(self):
+        matcher = FactMatcher(["", "   "])
+
+        assert not matcher
+        assert matcher.find("любой текст") == []
+
+
+def test_normalize():
+    assert normalize("  Дональд\t\nТрамп ") == "дональд трамп"
+
+
+def test_overlapping():
+    tokens = ["Глава ", "Дональд ", "Трамп ", "объявил"]
+
+    assert overlapping(tokens, [(6, 19)]) == [False, True, True, False]
+    assert overlapping(tokens, []) == [False] * 4
@@ -0,0 +1,320 @@
+import asyncio
+import time
+import uuid
+from collections.abc import Callable
+from functools import partial
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api import routes
+from app.core import executor, settings
+from app.main import app
+from app.services.jobs import (
+    Job,
+    JobQueue,
+    JobQueueFullError,
+    MemoryJobQueue,
+    RedisJobQueue,
+    _job_from_hash,
+    _job_to_hash,
+)
+from tests.test_api import parse_multipart
+
+
+async def _wait(queue: JobQueue, job_id: str) -> Job:
+    for _ in range(500):
+        job = await queue.get(job_id, with_result=True)
+        if job is None or job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+async def _until_running(queue: JobQueue, count: int = 1) -> None:
+    for _ in range(500):
+        if queue.running == count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{count} jobs did not start")
+
+
+async def _echo(job: Job) -> dict[str, bytes]:
+    if job.params.get("fail"):
+        raise ValueError("broken input")
+    return {"echo": job.data}
+
+
+@pytest.fixture
+def redis_queue(monkeypatch) -> Callable[..., RedisJobQueue]:
+    """RedisJobQueue factory; its queues share a fake server of their own."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # Lua scripting
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        "redis.asyncio.from_url", lambda url: fakeredis.FakeAsyncRedis(server=server)
+    )
+    return partial(RedisJobQueue, url="redis://fake")
+
+
+@pytest.fixture(params=["memory", "redis"])
+def make_queue(request) -> Callable[..., JobQueue]:
+    if request.param == "memory":
+        return MemoryJobQueue
+    return request.getfixturevalue("redis_queue")
+
+
+class TestJobQueue:
+    @pytest.mark.asyncio
+    async def test_runs_job_and_keeps_result(self, make_queue):
+        queue = make_queue(_echo, concurrency=1, queue_size=4, ttl_seconds=60)
+
+        job = await queue.submit("parse", {}, b"payload")
+        done = await _wait(queue, job.job_id)
+        await queue.stop()
+
+        assert done.status == "done"
+        assert done.result == {"echo": b"payload"}
+        assert done.data == b""
+        assert done.expires_at == pytest.approx(time.time() + 60, abs=5)
+
+    @pytest.mark.asyncio
+    async def test_handler_error_fails_job(self, make_queue):
+        queue = make_queue(_echo, concurrency=1, queue_size=4, ttl_seconds=60)
+
+        job = await queue.submit("parse", {"fail": True})
+        failed = await _wait(queue, job.job_id)
+        await queue.stop()
+
+        assert failed.status == "failed"
+        assert failed.error == "broken input"
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects(self, make_queue):
+        release = asyncio.Event()
+
+        async def blocked(job: Job) -> dict[str, bytes]:
+            await release.wait()
+            return {}
+
+        queue = make_queue(blocked, concurrency=1, queue_size=1, ttl_seconds=60)
+        await queue.submit("parse", {})
+        await _until_running(queue)  # the consumer takes the first job
+        await queue.submit("parse", {})
+
+        with pytest.raises(JobQueueFullError):
+            await queue.submit("parse", {})
+        release.set()
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_expire(self, make_queue):
+        queue = make_queue(_echo, concurrency=1, queue_size=4, ttl_seconds=0)
+
+        job = await queue.submit("parse", {})
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if await queue.get(job.job_id) is None:
+                break
+
+        assert await queue.get(job.job_id) is None
+        if isinstance(queue, MemoryJobQueue):
+            assert len(queue) == 0
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_deleted_queued_job_is_skipped(self, make_queue):
+        release = asyncio.Event()
+        ran = []
+
+        async def record(job: Job) -> dict[str, bytes]:
+            ran.append(job.job_id)
+            await release.wait()
+            return {}
+
+        queue = make_queue(record, concurrency=1, queue_size=4, ttl_seconds=60)
+        running = await queue.submit("parse", {})
+        await _until_running(queue)
+        first = await queue.submit("parse", {})
+        second = await queue.submit("parse", {})
+        assert await queue.delete(first.job_id)
+        release.set()
+        await _wait(queue, second.job_id)
+
+        assert ran == [running.job_id, second.job_id]
+        assert not await queue.delete(first.job_id)
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_stopped_redis_queue_hands_running_job_back(redis_queue):
+    async def forever(job: Job) -> dict[str, bytes]:
+        await asyncio.Event().wait()
+        return {}
+
+    stopping = redis_queue(forever, concurrency=1, queue_size=4, ttl_seconds=60)
+    job = await stopping.submit("generate", {"original": "а"})
+    await _until_running(stopping)
+    await stopping.stop()
+
+    replica = redis_queue(_echo, concurrency=1, queue_size=4, ttl_seconds=60)
+    assert (await replica.get(job.job_id)).status == "queued"
+    replica.start()
+    done = await _wait(replica, job.job_id)
+    await replica.stop()
+
+    assert done.status == "done"
+    assert done.params == {"original": "а"}
+
+
+def test_redis_hash_round_trip():
+    job = Job("abc", "generate", {"original": "а"}, status="done", error=None, expires_at=12.5)
+    job.result = {"clean_doc": b"PK\x03", "diff_doc": b"PK\x04"}
+
+    # As redis-py returns them: names and values as bytes
+    fields = {
+        name.encode(): value.encode() if isinstance(value, str) else value
+        for name, value in _job_to_hash(job).items()
+    }
+
+    assert _job_from_hash("abc", fields) == job
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    queue = MemoryJobQueue(routes._run_job, concurrency=2, queue_size=8, ttl_seconds=60)
+    monkeypatch.setattr(routes, "jobs", queue)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    await queue.stop()
+
+
+async def _poll(client: AsyncClient, job_id: str) -> dict:
+    for _ in range(500):
+        status = (await client.get(f"/jobs/{job_id}")).json()
+        if status["status"] in ("done", "failed"):
+            return status
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.mark.asyncio
+async def test_parse_job(client):
+    text = f"Асинхронный разбор {uuid.uuid4()}"
+    submitted = await client.post(
+        "/jobs/parse?file_type=txt",
+        content=text.encode(),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+
+    assert submitted.status_code == 202
+    assert submitted.json()["status"] == "queued"
+    status = await _poll(client, submitted.json()["job_id"])
+    assert status["status"] == "done"
+    assert 0 < status["expires_in"] <= 60
+
+    result = await client.get(f"/jobs/{status['job_id']}/result")
+    assert result.status_code == 200
+    assert result.json()["text"] == text
+    assert result.json()["encoding"] == "utf-8"
+
+
+@pytest.mark.asyncio
+async def test_pdf_jobs_wait_for_pool_slots(client, make_pdf, monkeypatch):
+    # The pool is full when the jobs start, and two PDF jobs with two page ranges each
+    # then need more than its 3 slots at once
+    monkeypatch.setattr(settings, "pdf_pages_per_task", 1)
+    monkeypatch.setattr(executor, "max_workers", 2)
+    monkeypatch.setattr(executor, "queue_size", 1)
+    run = executor.run
+    calls = []
+
+    async def counted(fn, *args):
+        calls.append(fn.__name__)
+        return await run(fn, *args)
+
+    monkeypatch.setattr(executor, "run", counted)
+    blockers = [asyncio.ensure_future(run(time.sleep, 0.3)) for _ in range(executor.capacity)]
+    await asyncio.sleep(0)
+    pdfs = [
+        make_pdf([f"Job {i} page {page} {uuid.uuid4()}" for page in range(4)]) for i in range(2)
+    ]
+
+    submitted = [
+        await client.post(
+            "/jobs/parse?file_type=pdf",
+            content=pdf,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        for pdf in pdfs
+    ]
+    statuses = [await _poll(client, job.json()["job_id"]) for job in submitted]
+
+    await asyncio.gather(*blockers)
+    assert [status["status"] for status in statuses] == ["done", "done"]
+    # Each job ran once: a full pool is waited for, not retried from the start
+    assert calls.count("pdf_page_count") == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_parse_job_reports_error_in_result(client):
+    submitted = await client.post(
+        "/jobs/parse?file_type=txt",
+        content=b"",
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    status = await _poll(client, submitted.json()["job_id"])
+
+    assert status["status"] == "failed"
+    result = await client.get(f"/jobs/{status['job_id']}/result")
+    assert result.json()["text"] == ""
+    assert result.json()["error"] == status["error"]
+
+
+@pytest.mark.asyncio
+async def test_generate_job_with_multipart_result(client):
+    submitted = await client.post(
+        "/jobs/generate",
+        json={"original": "Привет мир", "corrected": f"Привет, мир {uuid.uuid4()}"},
+    )
+    status = await _poll(client, submitted.json()["job_id"])
+
+    assert status["kind"] == "generate"
+    assert status["status"] == "done"
+    result = await client.get(
+        f"/jobs/{status['job_id']}/result", headers={"Accept": "multipart/form-data"}
+    )
+    parts = parse_multipart(result)
+    assert parts["clean_doc"].startswith(b"PK")
+    assert parts["diff_doc"].startswith(b"PK")
+
+
+@pytest.mark.asyncio
+async def test_unfinished_job_result_is_409(client):
+    release = asyncio.Event()
+
+    async def blocked(job: Job) -> dict[str, bytes]:
+        await release.wait()
+        return {"response": b"{}"}
+
+    routes.jobs.handler = blocked
+    submitted = await client.post("/jobs/generate", json={"original": "а", "corrected": "б"})
+    job_id = submitted.json()["job_id"]
+
+    result = await client.get(f"/jobs/{job_id}/result")
+    release.set()
+
+    assert result.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_unknown_and_deleted_jobs_are_404(client):
+    submitted = await client.post("/jobs/generate", json={"original": "а", "corrected": "б"})
+    job_id = submitted.json()["job_id"]
+
+    deleted = await client.delete(f"/jobs/{job_id}")
+
+    assert deleted.status_code == 204
+    assert (await client.get(f"/jobs/{job_id}")).status_code == 404
+    assert (await client.get("/jobs/missing/result")).status_code == 404
+    assert (await client.delete(f"/jobs/{job_id}")).status_code == 404
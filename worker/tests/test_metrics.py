@@ -0,0 +1,79 @@
+import pytest
+
+from app.core import metrics
+from app.core.executor import TaskExecutor
+from app.core.metrics import Gauge, Histogram, Registry, TimedIterator
+
+
+def _observe_in_task(value: float) -> float:
+    metrics.observe(metrics.GENERATE_TOKENS, value)
+    return value
+
+
+class TestHistogram:
+    def test_exposition(self):
+        histogram = Histogram("test_seconds", "Test.", ("stage",), buckets=(0.1, 1))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        histogram.observe(5, stage="a")
+
+        assert list(histogram.expose()) == [
+            "# HELP test_seconds Test.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{stage="a",le="0.1"} 1',
+            'test_seconds_bucket{stage="a",le="1"} 2',
+            'test_seconds_bucket{stage="a",le="+Inf"} 3',
+            'test_seconds_sum{stage="a"} 5.55',
+            'test_seconds_count{stage="a"} 3',
+        ]
+
+    def test_bucket_bound_is_inclusive(self):
+        histogram = Histogram("test_bytes", "Test.", buckets=(10,))
+        histogram.observe(10)
+        assert 'test_bytes_bucket{le="10"} 1' in list(histogram.expose())
+
+    def test_label_values_are_escaped(self):
+        histogram = Histogram("test_seconds", "Test.", ("handler",))
+        histogram.observe(1, handler='a"b\\c\n')
+        assert 'test_seconds_count{handler="a\\"b\\\\c\\n"} 1' in list(histogram.expose())
+
+
+class TestRegistry:
+    def test_gauge_reads_on_expose(self):
+        registry = Registry()
+        value = {(): 1}
+        registry.register(Gauge("test_in_flight", "Test.", lambda: value))
+        value[()] = 7
+        assert registry.expose().endswith("test_in_flight 7\n")
+
+
+class TestCollecting:
+    def test_buffers_instead_of_recording(self):
+        histogram = metrics.GENERATE_TOKENS
+        before = histogram.count()
+        with metrics.collecting() as observations:
+            metrics.observe(histogram, 3)
+        assert histogram.count() == before
+        assert observations == [(histogram.name, 3, {})]
+
+        metrics.replay(observations)
+        assert histogram.count() == before + 1
+
+    @pytest.mark.asyncio
+    async def test_pool_task_observations_reach_parent(self):
+        pool = TaskExecutor(max_workers=1)
+        try:
+            before = metrics.GENERATE_TOKENS.count()
+            task_runs = metrics.TASK_SECONDS.count(task="_observe_in_task")
+            assert await pool.run(_observe_in_task, 5) == 5
+        finally:
+            pool.shutdown()
+        assert metrics.GENERATE_TOKENS.count() == before + 1
+        assert metrics.TASK_SECONDS.count(task="_observe_in_task") == task_runs + 1
+
+
+def test_timed_iterator_counts_items():
+    items = TimedIterator(iter("abc"))
+    assert list(items) == ["a", "b", "c"]
+    assert items.count == 3
+    assert items.seconds >= 0
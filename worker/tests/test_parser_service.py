@@ -1,7 +1,9 @@
 import base64
+import sys
 
 import pytest
 
+from app.services.cache import ResultCache
 from app.services.parser_service import (
     CorruptedFileError,
     EmptyFileError,
@@ -40,6 +42,14 @@ class TestParserService:
         result = parser.parse(content, "txt")
         assert result == text
 
+    @pytest.mark.parametrize("encoding", ["koi8-r", "utf-16"])
+    def test_extract_txt_reports_encoding(self, parser, encoding):
+        text = "Привет, мир! Это текст в другой кодировке."
+        result = parser.extract(text.encode(encoding), "txt")
+        assert result.text == text
+        assert result.encoding == ("utf-16-le" if encoding == "utf-16" else encoding)
+        assert result.encoding_confidence > 0.8
+
     def test_parse_empty_content(self, parser):
         with pytest.raises(EmptyFileError):
             parser.parse("", "txt")
@@ -73,3 +83,51 @@ class TestParserService:
         content = base64.b64encode(text.encode()).decode()
         result = parser.parse(content, "TXT")
         assert result == text
+
+    def test_parse_bytes(self, parser):
+        text = "Привет, мир!"
+        assert parser.parse_bytes(text.encode("utf-8"), "txt") == text
+
+    def test_parse_bytes_empty(self, parser):
+        with pytest.raises(EmptyFileError):
+            parser.parse_bytes(b"", "pdf")
+
+    def test_parse_uses_cache(self):
+        cache = ResultCache(max_bytes=1024 * 1024, size_of=sys.getsizeof)
+        parser = ParserService(cache=cache)
+        content = base64.b64encode("Привет".encode()).decode()
+
+        assert parser.parse(content, "txt") == "Привет"
+        assert parser.parse(content, "TXT") == "Привет"
+        stats = cache.stats()
+        assert (stats.hits, stats.misses) == (1, 1)
+
+    def test_cache_key_depends_on_file_type(self, parser):
+        assert parser.cache_key(b"data", "txt") != parser.cache_key(b"data", "md")
+
+    def test_parse_pdf_reports_pages(self, parser, make_pdf):
+        result = parser.extract(make_pdf(["First page", "", "Third page"]), "pdf")
+
+        assert result.text == "First page\nThird page"
+        assert [(page.index, page.chars, page.error) for page in result.pages] == [
+            (0, 10, None),
+            (1, 0, None),
+            (2, 10, None),
+        ]
+
+    def test_parse_pdf_without_text(self, parser, make_pdf):
+        with pytest.raises(EmptyFileError):
+            parser.parse_bytes(make_pdf([""]), "pdf")
+
+    def test_parse_corrupted_pdf(self, parser):
+        with pytest.raises(CorruptedFileError):
+            parser.parse_bytes(b"%PDF-1.4 garbage", "pdf")
+
+    def test_extract_pdf_page_range(self, parser, make_pdf):
+        data = make_pdf(["one", "two", "three", "four"])
+
+        pages = parser.extract_pdf_pages(data, 1, 3)
+
+        assert parser.pdf_page_count(data) == 4
+        assert [text for text, _ in pages] == ["two", "three"]
+        assert parser.join_pdf_pages(pages).text == "two\nthree"
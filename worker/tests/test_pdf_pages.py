@@ -0,0 +1,60 @@
+import time
+from io import BytesIO
+
+import pytest
+from pypdf import PageObject, PdfReader
+
+from app.services.pdf_pages import extract_pages, split_pages
+
+
+@pytest.fixture
+def reader(make_pdf):
+    return PdfReader(BytesIO(make_pdf(["fast", "slow", "broken", "fast again"])))
+
+
+@pytest.fixture
+def troublesome_pages(monkeypatch):
+    original = PageObject.extract_text
+
+    def extract_text(self, *args, **kwargs):
+        text = original(self, *args, **kwargs)
+        if text == "slow":
+            time.sleep(5)
+        if text == "broken":
+            raise ValueError("bad content stream")
+        return text
+
+    monkeypatch.setattr(PageObject, "extract_text", extract_text)
+
+
+def test_extract_pages_reports_timing(reader):
+    pages = extract_pages(reader, 0, 4)
+
+    assert [text for text, _ in pages] == ["fast", "slow", "broken", "fast again"]
+    assert all(report.seconds >= 0 and report.error is None for _, report in pages)
+
+
+def test_slow_and_failing_pages_are_skipped(reader, troublesome_pages):
+    started = time.perf_counter()
+    pages = extract_pages(reader, 0, 4, timeout=0.2)
+
+    assert time.perf_counter() - started < 2
+    assert [text for text, _ in pages] == ["fast", "", "", "fast again"]
+    errors = [report.error for _, report in pages]
+    assert errors[1] == "Timed out after 0.2s"
+    assert errors[2] == "ValueError: bad content stream"
+    assert errors[0] is None and errors[3] is None
+
+
+@pytest.mark.parametrize(
+    ("count", "workers", "per_task", "expected"),
+    [
+        (10, 4, 25, [(0, 10)]),
+        (100, 4, 25, [(0, 25), (25, 50), (50, 75), (75, 100)]),
+        (300, 4, 25, [(0, 75), (75, 150), (150, 225), (225, 300)]),
+        (51, 8, 25, [(0, 17), (17, 34), (34, 51)]),
+        (3, 1, 0, [(0, 3)]),
+    ],
+)
+def test_split_pages(count, workers, per_task, expected):
+    assert split_pages(count, workers, per_task) == expected
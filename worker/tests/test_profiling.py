@@ -0,0 +1,75 @@
+import base64
+import json
+import pstats
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.middleware import ProfilingMiddleware
+from app.main import app
+
+
+def _client(middleware: ProfilingMiddleware) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=middleware), base_url="http://test")
+
+
+def _parse_request() -> dict:
+    # Unique text so the parse runs in the pool instead of coming from the cache
+    text = f"Профиль {uuid.uuid4()}"
+    return {"file_content": base64.b64encode(text.encode()).decode(), "file_type": "txt"}
+
+
+@pytest.mark.asyncio
+async def test_header_profiles_request_and_pool_task(tmp_path):
+    async with _client(ProfilingMiddleware(app, str(tmp_path), token="secret")) as client:
+        response = await client.post(
+            "/parse", json=_parse_request(), headers={"X-Profile": "secret"}
+        )
+
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    features = json.loads((tmp_path / f"{profile_id}.json").read_text())
+    assert features["trigger"] == "header"
+    assert features["path"] == "/parse"
+    assert features["status"] == 200
+    assert features["request_bytes"] == int(response.request.headers["content-length"])
+    assert features["response_bytes"] == len(response.content)
+    assert [task["task"] for task in features["tasks"]] == ["parse_bytes"]
+
+    stats = pstats.Stats(str(tmp_path / f"{profile_id}.prof"))
+    functions = {name for _, _, name in stats.stats}
+    assert "extract" in functions  # ParserService.extract ran in the pool process
+
+
+@pytest.mark.asyncio
+async def test_wrong_or_missing_header_is_not_profiled(tmp_path):
+    async with _client(ProfilingMiddleware(app, str(tmp_path), token="secret")) as client:
+        missing = await client.get("/health")
+        wrong = await client.get("/health", headers={"X-Profile": "guess"})
+
+    assert "x-profile-id" not in missing.headers
+    assert "x-profile-id" not in wrong.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_sampled_request_is_profiled(tmp_path):
+    async with _client(ProfilingMiddleware(app, str(tmp_path), sample_rate=1.0)) as client:
+        response = await client.get("/stats")
+
+    features = json.loads((tmp_path / f"{response.headers['x-profile-id']}.json").read_text())
+    assert features["trigger"] == "sample"
+    assert features["tasks"] == []
+
+
+@pytest.mark.asyncio
+async def test_health_and_metrics_are_not_profiled(tmp_path):
+    middleware = ProfilingMiddleware(app, str(tmp_path), token="secret", sample_rate=1.0)
+    async with _client(middleware) as client:
+        health = await client.get("/health", headers={"X-Profile": "secret"})
+        scrape = await client.get("/metrics")
+
+    assert "x-profile-id" not in health.headers
+    assert "x-profile-id" not in scrape.headers
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,42 @@
+import pytest
+
+from app.services.text_stream import TextStream, join_blocks
+
+CASES = [
+    [("\n", "Первый абзац"), ("\n", ""), ("\n", "Второй абзац")],
+    [("\n", "  "), ("\n", "\t  начало"), ("\n", "конец  "), ("\n", " "), ("\n\n", "")],
+    [("\n", "абзац"), ("\n\n", "ячейка\tячейка"), ("\n", "ещё\tряд")],
+    [("\n", "один")],
+    [("\n", ""), ("\n", "   ")],
+]
+
+
+def stream(blocks):
+    text_stream = TextStream()
+    records = [record for block in blocks for record in text_stream.push(*block)]
+    return records + text_stream.finish(), text_stream
+
+
+@pytest.mark.parametrize("blocks", CASES)
+def test_records_rebuild_joined_text(blocks):
+    records, text_stream = stream(blocks)
+    text = join_blocks(blocks)
+
+    assert "".join(r["separator"] + r["text"] for r in records) == text
+    assert all(text[r["start"] : r["end"]] == r["text"] for r in records)
+    assert [r["index"] for r in records] == list(range(len(records)))
+    assert text_stream.length == len(text)
+
+
+def test_whitespace_only_blocks_fold_into_separator():
+    records, _ = stream([("\n", "a"), ("\n", ""), ("\n", " "), ("\n", "b")])
+
+    assert [(r["separator"], r["text"]) for r in records] == [("", "a"), ("\n\n \n", "b")]
+
+
+def test_last_text_block_is_held_back():
+    text_stream = TextStream()
+
+    assert text_stream.push("\n", "first") == []
+    assert [r["text"] for r in text_stream.push("\n", "second ")] == ["first"]
+    assert [r["text"] for r in text_stream.finish()] == ["second"]
@@ -0,0 +1,19 @@
+from app.services.tokens import TokenTable, encode_chars
+
+
+class TestTokenTable:
+    def test_same_token_gets_same_id(self):
+        table = TokenTable()
+
+        first = table.encode(["Привет ", "мир", "Привет "])
+        second = table.encode(["мир", "новый"])
+
+        assert first.tolist() == [0, 1, 0]
+        assert second.tolist() == [1, 2]
+        assert len(table) == 3
+        assert first.typecode == "I"
+
+
+def test_encode_chars():
+    assert encode_chars("ёж!").tolist() == [ord("ё"), ord("ж"), ord("!")]
+    assert len(encode_chars("")) == 0